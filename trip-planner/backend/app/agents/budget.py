@@ -0,0 +1,81 @@
+"""行程预算计算
+
+由每日行程中的门票、酒店与餐饮费用以及交通费用模型计算 Budget,
+保证各项之和与明细一致。
+"""
+
+from typing import Dict, List, Optional
+
+from ..geo import haversine_km
+from ..models.schemas import Budget, DayPlan, Location
+
+# 交通方式 -> 费用模型
+#   per_leg: 每段行程的起步费用(元)
+#   per_km: 每公里费用(元)
+#   per_day: 每天的固定费用(元), 如停车费
+#   walk_km: 不超过该距离的行程按步行计算, 不产生费用
+TRANSPORT_COSTS: Dict[str, Dict[str, float]] = {
+    "公共交通": {"per_leg": 3, "per_km": 0.3, "per_day": 0, "walk_km": 1.0},
+    "自驾": {"per_leg": 0, "per_km": 0.8, "per_day": 30, "walk_km": 0},
+    "步行": {"per_leg": 0, "per_km": 0, "per_day": 0, "walk_km": 0},
+    "混合": {"per_leg": 5, "per_km": 0.6, "per_day": 0, "walk_km": 1.5},
+}
+
+# 未知交通方式按公共交通计算
+DEFAULT_TRANSPORT = "公共交通"
+
+# 直线距离换算为道路距离的系数
+DETOUR_FACTOR = 1.3
+
+
+def day_stops(day: DayPlan) -> List[Location]:
+    """当日途经的地点: 酒店出发, 依次游览景点, 返回酒店"""
+    stops = [a.location for a in day.attractions]
+    if day.hotel and day.hotel.location:
+        stops = [day.hotel.location, *stops, day.hotel.location]
+    return stops
+
+
+def transport_cost(day: DayPlan, transportation: Optional[str] = None) -> int:
+    """
+    估算单日交通费用
+
+    Args:
+        day: 单日行程
+        transportation: 交通方式, 默认使用行程中的交通方式
+    """
+    model = TRANSPORT_COSTS.get(transportation or day.transportation) or TRANSPORT_COSTS[DEFAULT_TRANSPORT]
+    stops = day_stops(day)
+
+    cost = model["per_day"] if stops else 0
+    for origin, destination in zip(stops, stops[1:]):
+        km = haversine_km(origin, destination) * DETOUR_FACTOR
+        if km > model["walk_km"]:
+            cost += model["per_leg"] + km * model["per_km"]
+
+    return round(cost)
+
+
+def compute_budget(days: List[DayPlan], transportation: Optional[str] = None) -> Budget:
+    """
+    汇总每日行程的费用
+
+    Args:
+        days: 每日行程
+        transportation: 交通方式(取自请求), 默认使用每日行程中的交通方式
+
+    Returns:
+        Budget
+    """
+    total_attractions = sum(a.ticket_price for day in days for a in day.attractions)
+    total_hotels = sum(day.hotel.estimated_cost for day in days if day.hotel)
+    total_meals = sum(m.estimated_cost for day in days for m in day.meals)
+    total_transportation = sum(transport_cost(day, transportation) for day in days)
+
+    return Budget(
+        total_attractions=total_attractions,
+        total_hotels=total_hotels,
+        total_meals=total_meals,
+        total_transportation=total_transportation,
+        total=total_attractions + total_hotels + total_meals + total_transportation,
+    )
@@ -0,0 +1,88 @@
+"""按地理位置把候选景点分配到每一天
+
+在 planner 之前把压缩后的候选景点划分为 travel_days 个紧凑的簇,
+每簇的游览时长尽量均衡。planner 只需为每天的景点编写行程, 不必再做分配。
+"""
+
+from typing import List
+
+import numpy as np
+
+from ..config import get_settings
+from ..geo import balanced_clusters, to_radians
+from ..models.schemas import POIInfo
+from ..workflow.state import AgentState
+from .compactor import POI_COLUMNS, format_poi_row, parse_poi_rows
+
+# 每天安排的景点数
+ATTRACTIONS_PER_DAY = 3
+
+# 类别关键词 -> 建议游览时长(分钟)
+VISIT_MINUTES = {
+    "博物馆": 150,
+    "风景名胜": 150,
+    "名胜古迹": 120,
+    "公园": 120,
+    "美术馆": 90,
+    "艺术": 90,
+    "步行街": 90,
+    "购物": 120,
+    "美食": 60,
+}
+
+DEFAULT_VISIT_MINUTES = 120
+
+
+def estimate_visit_minutes(poi: POIInfo) -> int:
+    """按类别估算游览时长"""
+    text = f"{poi.type}{poi.name}"
+    for keyword, minutes in VISIT_MINUTES.items():
+        if keyword in text:
+            return minutes
+    return DEFAULT_VISIT_MINUTES
+
+
+def cluster_attractions(pois: List[POIInfo], travel_days: int) -> List[List[POIInfo]]:
+    """
+    把候选景点划分为每天的景点组
+
+    只取排名靠前的 travel_days × ATTRACTIONS_PER_DAY 个候选
+    """
+    candidates = pois[:travel_days * ATTRACTIONS_PER_DAY]
+    if not candidates:
+        return [[] for _ in range(travel_days)]
+
+    points = to_radians([poi.location for poi in candidates])
+    weights = np.array([estimate_visit_minutes(poi) for poi in candidates], dtype=float)
+    clusters = balanced_clusters(points, weights, travel_days)
+    return [[candidates[i] for i in cluster] for cluster in clusters]
+
+
+def format_day_clusters(clusters: List[List[POIInfo]]) -> str:
+    """每天一组的景点表格"""
+    lines = [POI_COLUMNS]
+    for index, cluster in enumerate(clusters):
+        lines.append(f"第{index + 1}天")
+        lines.extend(format_poi_row(poi) for poi in cluster)
+    return "\n".join(lines)
+
+
+async def cluster_node(state: AgentState) -> AgentState:
+    """
+    压缩节点与 planner 之间的分组节点
+
+    候选景点无法解析出坐标时不分组, 由 planner 自行分配
+    """
+    settings = get_settings()
+    context = state.get("planner_context")
+    if not settings.day_clustering_enabled or not context:
+        return {"day_clusters": None}
+
+    request = state["request"]
+    pois = parse_poi_rows(context["attractions"])
+    if not pois:
+        return {"day_clusters": None}
+
+    clusters = cluster_attractions(pois, request.travel_days)
+    print(f"🗺️  景点分组完成: {request.travel_days} 天, 每天 {[len(c) for c in clusters]} 个景点")
+    return {"day_clusters": clusters}
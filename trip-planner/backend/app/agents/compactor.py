@@ -0,0 +1,276 @@
+"""specialist 结果压缩
+
+在 planner 之前把景点、天气、酒店信息整理成紧凑的表格:
+去重、按用户偏好排序, 并按 token 预算截断, 以缩短 planner 的输入。
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from ..config import get_settings
+from ..models.schemas import TripRequest, POIInfo, Location, WeatherInfo
+from ..workflow.state import AgentState
+from .specialists import PREFERENCE_KEYWORDS
+
+# 表头: planner 按列名理解每一行
+POI_COLUMNS = "名称|类别|经纬度|评分|人均(元)|地址"
+WEATHER_COLUMNS = "日期|白天/夜间天气|白天/夜间温度|风向风力"
+
+# 文本结果中的POI行(specialists.format_pois 的输出格式)
+_POI_LINE = re.compile(
+    r"^\s*-\s*(?P<name>[^|\n]+?)\s*\|\s*(?P<type>[^|\n]*?)\s*\|\s*(?P<address>[^|\n]*?)\s*\|"
+    r"\s*经纬度\s*(?P<lng>-?[\d.]+),(?P<lat>-?[\d.]+)(?P<rest>[^\n]*)$",
+    re.MULTILINE,
+)
+_RATING = re.compile(r"评分\s*([\d.]+)")
+_COST = re.compile(r"人均\s*([\d.]+)")
+
+_CJK = re.compile(r"[⺀-鿿＀-￯]")
+
+# 预算分配: 天气行数很少, 先全部保留, 剩余部分按比例分给景点与酒店
+ATTRACTION_SHARE = 0.7
+
+# 地址最多保留的字符数
+MAX_ADDRESS_CHARS = 24
+
+# 未知评分按此值参与排序
+DEFAULT_RATING = 4.0
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数: 中文约每字 1 token, 其余约每 4 字符 1 token"""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def parse_poi_lines(text: str) -> List[POIInfo]:
+    """从 format_pois 格式的文本中解析POI"""
+    pois = []
+    for index, match in enumerate(_POI_LINE.finditer(text)):
+        rating = _RATING.search(match["rest"])
+        cost = _COST.search(match["rest"])
+        pois.append(POIInfo(
+            id=f"text-{index}",
+            name=match["name"],
+            type=match["type"],
+            address=match["address"],
+            location=Location(longitude=float(match["lng"]), latitude=float(match["lat"])),
+            rating=float(rating.group(1)) if rating else None,
+            cost=float(cost.group(1)) if cost else None,
+        ))
+    return pois
+
+
+def _name_key(name: str) -> str:
+    return re.sub(r"[\s()（）·\-]", "", name).lower()
+
+
+def dedupe_pois(pois: List[POIInfo]) -> List[POIInfo]:
+    """按ID与规范化名称去重, 保留先出现的"""
+    seen_ids, seen_names = set(), set()
+    unique = []
+    for poi in pois:
+        key = _name_key(poi.name)
+        if poi.id in seen_ids or key in seen_names:
+            continue
+        seen_ids.add(poi.id)
+        seen_names.add(key)
+        unique.append(poi)
+    return unique
+
+
+def preference_terms(request: TripRequest) -> List[str]:
+    """用户偏好对应的匹配词"""
+    terms = []
+    for preference in request.preferences:
+        terms.append(preference)
+        terms.extend(PREFERENCE_KEYWORDS.get(preference, []))
+    return terms
+
+
+def rank_pois(pois: List[POIInfo], terms: List[str]) -> List[POIInfo]:
+    """按偏好匹配与评分排序, 同分保持原有(搜索结果)顺序"""
+    def score(poi: POIInfo) -> float:
+        text = f"{poi.name}{poi.type}"
+        matched = any(term and term in text for term in terms)
+        rating = poi.rating if poi.rating is not None else DEFAULT_RATING
+        return rating + (1.0 if matched else 0.0)
+
+    return sorted(pois, key=score, reverse=True)
+
+
+def _format_number(value: Optional[float]) -> str:
+    return "" if value is None else f"{value:g}"
+
+
+def _cell(text: str) -> str:
+    """表格单元: 替换分隔符与换行, 保证 parse_poi_rows 能按列拆分"""
+    return text.replace("|", "｜").replace("\r", " ").replace("\n", " ")
+
+
+def format_poi_row(poi: POIInfo) -> str:
+    """单行紧凑POI: 坐标保留5位小数(约1米)"""
+    category = poi.type.split(";")[-1] if poi.type else ""
+    address = poi.address[:MAX_ADDRESS_CHARS]
+    return "|".join([
+        _cell(poi.name),
+        _cell(category),
+        f"{poi.location.longitude:.5f},{poi.location.latitude:.5f}",
+        _format_number(poi.rating),
+        _format_number(poi.cost),
+        _cell(address),
+    ])
+
+
+def parse_poi_rows(table: str) -> List[POIInfo]:
+    """解析 format_poi_row 输出的表格行(表头与无法解析的行会被跳过)"""
+    pois = []
+    for index, line in enumerate(table.splitlines()):
+        parts = line.split("|")
+        if len(parts) != 6:
+            continue
+        name, category, coords, rating, cost, address = parts
+        try:
+            lng, lat = (float(v) for v in coords.split(","))
+            pois.append(POIInfo(
+                id=f"row-{index}",
+                name=name,
+                type=category,
+                address=address,
+                location=Location(longitude=lng, latitude=lat),
+                rating=float(rating) if rating else None,
+                cost=float(cost) if cost else None,
+            ))
+        except ValueError:
+            continue
+    return pois
+
+
+def format_weather_row(weather: WeatherInfo) -> str:
+    return "|".join([
+        weather.date,
+        f"{weather.day_weather}/{weather.night_weather}",
+        f"{weather.day_temp}/{weather.night_temp}",
+        f"{weather.wind_direction}{weather.wind_power}",
+    ])
+
+
+def render_table(columns: str, rows: List[str], budget: int, max_rows: Optional[int] = None) -> str:
+    """按 token 预算截断表格, 至少保留表头"""
+    lines = [columns]
+    used = estimate_tokens(columns)
+    for row in rows[:max_rows]:
+        cost = estimate_tokens(row) + 1
+        if used + cost > budget:
+            break
+        lines.append(row)
+        used += cost
+    return "\n".join(lines) if len(lines) > 1 else ""
+
+
+def truncate_text(text: str, budget: int) -> str:
+    """无法解析为表格的文本按预算截断"""
+    if estimate_tokens(text) <= budget:
+        return text
+    lines, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def collect_pois(structured: List[POIInfo], texts: List[str]) -> List[POIInfo]:
+    """优先使用结构化结果, 否则从文本结果中解析"""
+    if structured:
+        return structured
+    return [poi for text in texts for poi in parse_poi_lines(text)]
+
+
+def _trip_weather(forecasts: List[WeatherInfo], request: TripRequest) -> List[WeatherInfo]:
+    """只保留行程日期内的天气, 没有重叠时保留全部"""
+    in_trip = [w for w in forecasts if request.start_date <= w.date <= request.end_date]
+    return in_trip or forecasts
+
+
+def compact_specialist_results(state: AgentState, token_budget: int) -> Dict[str, str]:
+    """
+    将 specialist 结果整理为 planner 输入
+
+    Returns:
+        {"attractions": ..., "weather": ..., "hotels": ...}
+    """
+    request = state["request"]
+
+    # 天气
+    forecasts = _trip_weather(state.get("weather_forecasts", []), request)
+    if forecasts:
+        weather = "\n".join([WEATHER_COLUMNS, *(format_weather_row(w) for w in forecasts)])
+    else:
+        weather = truncate_text("\n".join(state.get("weather_results", [])), token_budget // 10)
+
+    remaining = max(0, token_budget - estimate_tokens(weather))
+    attraction_budget = int(remaining * ATTRACTION_SHARE)
+    hotel_budget = remaining - attraction_budget
+
+    # 景点: 每天 2-3 个, 最多保留两倍的候选
+    attraction_texts = state.get("attraction_results", [])
+    attraction_pois = collect_pois(state.get("attraction_pois", []), attraction_texts)
+    if attraction_pois:
+        ranked = rank_pois(dedupe_pois(attraction_pois), preference_terms(request))
+        attractions = render_table(
+            POI_COLUMNS,
+            [format_poi_row(poi) for poi in ranked],
+            attraction_budget,
+            max_rows=request.travel_days * 6,
+        )
+    else:
+        attractions = truncate_text("\n".join(attraction_texts), attraction_budget)
+
+    # 酒店: 评分优先, 只需要少量候选
+    hotel_texts = state.get("hotel_results", [])
+    hotel_pois = collect_pois(state.get("hotel_pois", []), hotel_texts)
+    if hotel_pois:
+        ranked = rank_pois(dedupe_pois(hotel_pois), [request.accommodation])
+        hotels = render_table(
+            POI_COLUMNS,
+            [format_poi_row(poi) for poi in ranked],
+            hotel_budget,
+            max_rows=5,
+        )
+    else:
+        hotels = truncate_text("\n".join(hotel_texts), hotel_budget)
+
+    return {
+        "attractions": attractions,
+        "weather": weather,
+        "hotels": hotels,
+    }
+
+
+def context_token_budget(travel_days: int) -> int:
+    """planner 输入的token预算: 随天数增长, 保证长行程每天仍有足够的候选景点"""
+    settings = get_settings()
+    budget = settings.planner_context_token_budget + settings.planner_context_tokens_per_day * travel_days
+    return min(budget, settings.planner_context_token_budget_max)
+
+
+async def compact_node(state: AgentState) -> AgentState:
+    """
+    specialist 与 planner 之间的压缩节点
+    """
+    context = compact_specialist_results(state, context_token_budget(state["request"].travel_days))
+
+    raw = sum(
+        estimate_tokens(text)
+        for key in ("attraction_results", "weather_results", "hotel_results")
+        for text in state.get(key, [])
+    )
+    compacted = sum(estimate_tokens(text) for text in context.values())
+    print(f"🗜️  planner输入压缩: 约 {raw} → {compacted} tokens")
+
+    return {
+        "planner_context": context
+    }
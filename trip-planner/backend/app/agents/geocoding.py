@@ -0,0 +1,125 @@
+"""计划坐标校验
+
+planner 输出的经纬度由模型编写, 常与实际位置不符。收集计划中所有带地址的地点
+(景点、酒店、餐饮), 按地址去重后一次并发地理编码, 模型坐标缺失或与编码结果相差过大时
+以编码结果替换; 无法编码且明显不在目的地城市范围内的坐标记入计划的提示信息。
+
+与候选POI(空间索引中的搜索结果)名称和坐标一致的地点沿用POI坐标, 不参与编码;
+只有精确到兴趣点或门牌号的编码结果才会替换模型坐标。
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..config import get_settings
+from ..geo import find_spatial_index, haversine_km
+from ..models.schemas import Attraction, GeocodeResult, Hotel, Location, Meal, TripPlan
+from ..tools.amap_tool import get_amap_service
+
+Place = Union[Attraction, Hotel, Meal]
+
+# 距城市中心超过该距离的坐标视为不在目的地城市
+CITY_RADIUS_KM = 80.0
+
+# 可以替换模型坐标的编码匹配级别
+PRECISE_LEVELS = ("兴趣点", "门牌号")
+
+# 与候选POI坐标相差不超过该距离(且名称一致)时视为照抄了POI坐标
+CANDIDATE_MATCH_KM = 0.05
+
+
+def _query(place: Place) -> str:
+    """地理编码使用的查询: 优先地址, 没有地址时使用名称"""
+    return (place.address or place.name or "").strip()
+
+
+def _names_match(a: str, b: str) -> bool:
+    return bool(a and b) and (a in b or b in a)
+
+
+def collect_places(plan: TripPlan) -> List[Tuple[int, Place]]:
+    """
+    收集计划中需要校验坐标的地点
+
+    Returns:
+        (第几天, 地点) 列表; 没有地址的餐饮不参与校验
+    """
+    places: List[Tuple[int, Place]] = []
+    for day in plan.days:
+        places.extend((day.day_index, attraction) for attraction in day.attractions)
+        if day.hotel:
+            places.append((day.day_index, day.hotel))
+        places.extend((day.day_index, meal) for meal in day.meals if meal.address)
+    return places
+
+
+def is_candidate(place: Place, city: str) -> bool:
+    """地点的名称与坐标是否与城市空间索引中的某个候选POI一致"""
+    index = find_spatial_index(city)
+    if index is None or place.location is None:
+        return False
+    nearest = index.nearest(place.location.latitude, place.location.longitude, k=1)
+    return bool(nearest) and nearest[0][1] <= CANDIDATE_MATCH_KM and _names_match(nearest[0][0].name, place.name)
+
+
+def _in_city(location: Optional[Location], center: Optional[Location]) -> bool:
+    """坐标有效且在城市范围内(城市中心未知时只检查坐标有效)"""
+    if location is None or (location.longitude == 0 and location.latitude == 0):
+        return False
+    return center is None or haversine_km(location, center) <= CITY_RADIUS_KM
+
+
+def _trusted_location(result: Optional[GeocodeResult], center: Optional[Location]) -> Optional[Location]:
+    """
+    可以用来替换模型坐标的编码结果
+
+    城市中心未知时无法判断结果是否编码到了其他城市, 一律不采用
+    """
+    if result is None or center is None or result.level not in PRECISE_LEVELS:
+        return None
+    return result.location if _in_city(result.location, center) else None
+
+
+async def validate_locations(plan: TripPlan, city: str) -> Tuple[int, List[str]]:
+    """
+    批量地理编码并校正计划中的坐标
+
+    Args:
+        plan: 旅行计划, 坐标就地修改
+        city: 目的地城市
+
+    Returns:
+        (修正的地点数, 无法核实的地点提示)
+    """
+    settings = get_settings()
+    places = [(day_index, place) for day_index, place in collect_places(plan) if not is_candidate(place, city)]
+    if not places:
+        return 0, []
+
+    queries = [_query(place) for _, place in places]
+    geocoded: Dict[str, Optional[GeocodeResult]] = await asyncio.wait_for(
+        get_amap_service().geocode_many(
+            [city] + queries,
+            city=city,
+            concurrency=settings.geocode_concurrency,
+        ),
+        timeout=settings.geocode_timeout,
+    )
+    center_result = geocoded.get(city)
+    center = center_result.location if center_result else None
+
+    corrected = 0
+    warnings: Dict[str, str] = {}
+    for (day_index, place), query in zip(places, queries):
+        location = _trusted_location(geocoded.get(query), center)
+
+        if location is None:
+            if not _in_city(place.location, center) and place.name not in warnings:
+                warnings[place.name] = f"第{day_index + 1}天「{place.name}」的位置未能核实, 请以实际地址为准"
+            continue
+
+        if not _in_city(place.location, center) or haversine_km(place.location, location) > settings.geocode_tolerance_km:
+            place.location = location
+            corrected += 1
+
+    return corrected, list(warnings.values())
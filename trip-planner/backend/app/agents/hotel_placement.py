@@ -0,0 +1,175 @@
+"""酒店选址
+
+按每天景点中心的距离、评分以及与住宿偏好匹配的价格区间为候选酒店打分,
+再以换酒店的惩罚在天数上求最优的入住安排。得分矩阵(酒店 × 天)一次向量化计算。
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from ..geo import haversine_matrix, to_radians
+from ..models.schemas import POIInfo
+from ..workflow.state import AgentState
+from .compactor import POI_COLUMNS, collect_pois, dedupe_pois, format_poi_row, parse_poi_rows
+
+# 住宿偏好 -> 每晚价格区间(元)
+PRICE_BANDS = {
+    "经济型酒店": (100, 300),
+    "舒适型酒店": (250, 500),
+    "豪华酒店": (600, 3000),
+    "民宿": (150, 500),
+}
+
+# 各项得分的权重
+SCORE_WEIGHTS = {
+    "distance": 0.5,
+    "rating": 0.3,
+    "price": 0.2,
+}
+
+# 距离得分 = 1 / (1 + 距离 / DISTANCE_SCALE_KM)
+DISTANCE_SCALE_KM = 3.0
+
+# 每更换一次酒店扣除的得分, 避免为了少量距离收益频繁换酒店
+SWITCH_PENALTY = 0.15
+
+# 未知评分/价格的得分
+UNKNOWN_RATING_SCORE = 0.5
+UNKNOWN_PRICE_SCORE = 0.5
+
+
+def _rating_scores(hotels: List[POIInfo]) -> np.ndarray:
+    """评分 3.0~5.0 映射到 0~1"""
+    ratings = np.array([h.rating if h.rating is not None else np.nan for h in hotels], dtype=float)
+    scores = np.clip((ratings - 3.0) / 2.0, 0.0, 1.0)
+    return np.where(np.isnan(ratings), UNKNOWN_RATING_SCORE, scores)
+
+
+def _price_scores(hotels: List[POIInfo], accommodation: str) -> np.ndarray:
+    """价格落在区间内得 1 分, 偏离越多得分越低"""
+    prices = np.array([h.cost if h.cost else np.nan for h in hotels], dtype=float)
+    band = PRICE_BANDS.get(accommodation)
+    if band is None:
+        return np.full(len(hotels), UNKNOWN_PRICE_SCORE)
+
+    low, high = band
+    gap = np.maximum(low - prices, 0) + np.maximum(prices - high, 0)
+    scores = 1.0 - np.clip(gap / (high - low), 0.0, 1.0)
+    return np.where(np.isnan(prices), UNKNOWN_PRICE_SCORE, scores)
+
+
+def score_hotels(
+        hotels: List[POIInfo],
+        centroids: np.ndarray,
+        accommodation: str,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算每家酒店在每一天的得分
+
+    Args:
+        hotels: 候选酒店
+        centroids: (days, 2) 每天景点中心的弧度坐标
+        accommodation: 住宿偏好
+
+    Returns:
+        (得分矩阵, 距离矩阵(公里)), 形状均为 (酒店数, 天数)
+    """
+    distances = haversine_matrix(to_radians([h.location for h in hotels]), centroids)
+    scores = (
+        SCORE_WEIGHTS["distance"] / (1.0 + distances / DISTANCE_SCALE_KM)
+        + SCORE_WEIGHTS["rating"] * _rating_scores(hotels)[:, None]
+        + SCORE_WEIGHTS["price"] * _price_scores(hotels, accommodation)[:, None]
+    )
+    return scores, distances
+
+
+def assign_hotels(scores: np.ndarray, switch_penalty: float = SWITCH_PENALTY) -> List[int]:
+    """
+    按天选择酒店, 使总得分减去换酒店惩罚后最大(动态规划)
+
+    Returns:
+        每天入住的酒店下标
+    """
+    n_hotels, n_days = scores.shape
+    total = scores[:, 0].copy()
+    previous = np.zeros((n_days, n_hotels), dtype=int)
+
+    for day in range(1, n_days):
+        best = int(np.argmax(total))
+        # 续住: 来自同一酒店; 换酒店: 来自前一天得分最高的酒店并扣除惩罚
+        stay = total
+        switch = total[best] - switch_penalty
+        previous[day] = np.where(stay >= switch, np.arange(n_hotels), best)
+        total = np.maximum(stay, switch) + scores[:, day]
+
+    plan = [int(np.argmax(total))]
+    for day in range(n_days - 1, 0, -1):
+        plan.append(int(previous[day][plan[-1]]))
+    return plan[::-1]
+
+
+def day_centroids(clusters: List[List[POIInfo]], fallback: List[POIInfo]) -> np.ndarray:
+    """
+    每天景点的中心点(弧度)
+
+    当天没有景点时使用全部候选景点的中心
+    """
+    overall = to_radians([poi.location for poi in fallback]).mean(axis=0)
+    centroids = [
+        to_radians([poi.location for poi in cluster]).mean(axis=0) if cluster else overall
+        for cluster in clusters
+    ]
+    return np.array(centroids)
+
+
+def place_hotels(
+        hotels: List[POIInfo],
+        clusters: List[List[POIInfo]],
+        attractions: List[POIInfo],
+        accommodation: str,
+    ) -> List[Tuple[POIInfo, float]]:
+    """
+    为每天选择酒店
+
+    Returns:
+        每天的 (酒店, 到当天景点中心的距离(公里))
+    """
+    scores, distances = score_hotels(hotels, day_centroids(clusters, attractions), accommodation)
+    return [(hotels[h], float(distances[h, day])) for day, h in enumerate(assign_hotels(scores))]
+
+
+def format_day_hotels(day_hotels: List[POIInfo]) -> str:
+    """每天入住酒店的表格, 连续入住同一酒店的天数合并为一行"""
+    lines = [POI_COLUMNS]
+    start = 0
+    for day in range(1, len(day_hotels) + 1):
+        if day < len(day_hotels) and day_hotels[day].name == day_hotels[start].name:
+            continue
+        label = f"第{start + 1}天" if day - start == 1 else f"第{start + 1}-{day}天"
+        lines.extend([label, format_poi_row(day_hotels[start])])
+        start = day
+    return "\n".join(lines)
+
+
+async def hotel_placement_node(state: AgentState) -> AgentState:
+    """
+    分组节点与 planner 之间的酒店选址节点
+
+    没有带坐标的候选酒店或景点时不选址, 由 planner 自行选择
+    """
+    request = state["request"]
+    context = state.get("planner_context") or {}
+
+    hotels = dedupe_pois(collect_pois(state.get("hotel_pois", []), state.get("hotel_results", [])))
+    attractions = parse_poi_rows(context.get("attractions", ""))
+    if not hotels or not attractions:
+        return {"day_hotels": None}
+
+    clusters = state.get("day_clusters") or [attractions] * request.travel_days
+    placements = place_hotels(hotels, clusters, attractions, request.accommodation)
+
+    names = {hotel.name for hotel, _ in placements}
+    average = sum(distance for _, distance in placements) / len(placements)
+    print(f"🏨 酒店选址完成: {len(names)} 家酒店, 距每日景点中心平均 {average:.1f}km")
+    return {"day_hotels": [hotel for hotel, _ in placements]}
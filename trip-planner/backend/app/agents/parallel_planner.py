@@ -0,0 +1,411 @@
+"""按天并行的 planner(map-reduce)
+
+长行程一次生成全部 DayPlan 时, 耗时随天数线性增长, 且任何一处格式错误都会
+使整个计划失败。此模式下:
+    1. 骨架调用: 只输出每天分配的景点与酒店名称, 输出很短
+    2. 按天并行: 每天单独生成 DayPlan, 单日失败时重试一次, 仍失败则由骨架直接构造
+    3. 合并: 拼接每日行程, 预算由后处理统一计算
+"""
+
+import asyncio
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from langchain_core.callbacks.manager import adispatch_custom_event
+from pydantic import BaseModel, Field
+
+from ..models.schemas import TripRequest, TripPlan, DayPlan, Attraction, Hotel, POIInfo, WeatherInfo
+from ..services.LLM import get_llm_registry
+from ..services.limits import OverloadedError
+from .clustering import format_day_clusters
+from .hotel_placement import format_day_hotels
+from .compactor import POI_COLUMNS, WEATHER_COLUMNS, parse_poi_rows, format_poi_row, format_weather_row
+from .plan_parser import parse_json_model, TripPlanParseError
+
+# 并行模式下的LLM调用带此标签, 流式接口据此跳过交错的token
+PLAN_PART_TAG = "plan_part"
+
+# 每完成一天即派发的自定义事件名
+DAY_EVENT = "plan_day"
+
+# 单次生成时从输出中解析出天气信息即派发的自定义事件名
+WEATHER_EVENT = "plan_weather"
+
+# 单日生成的最大尝试次数
+DAY_ATTEMPTS = 2
+
+SKELETON_PROMPT = """你是行程规划专家。请把候选景点与酒店分配到每一天, 只输出行程骨架。
+
+请严格按照以下JSON格式返回:
+```json
+{
+  "days": [
+    {"day_index": 0, "theme": "当日主题", "attractions": ["景点名称"], "hotel": "酒店名称"}
+  ],
+  "overall_suggestions": "总体建议"
+}
+```
+
+**重要提示:**
+1. 景点与酒店名称必须与表格中的名称完全一致
+2. 每天安排2-3个景点, 同一天的景点尽量相邻, 不要重复安排
+3. 尽量减少更换酒店的次数
+"""
+
+DAY_PROMPT = """你是行程规划专家。请根据给定的景点、酒店与天气, 生成单日的详细行程。
+
+请严格按照以下JSON格式返回:
+```json
+{
+  "date": "YYYY-MM-DD",
+  "day_index": 0,
+  "description": "当日行程概述",
+  "transportation": "交通方式",
+  "accommodation": "住宿类型",
+  "hotel": {
+    "name": "酒店名称",
+    "address": "酒店地址",
+    "location": {"longitude": 116.397128, "latitude": 39.916527},
+    "price_range": "300-500元",
+    "rating": "4.5",
+    "distance": "距离景点2公里",
+    "type": "经济型酒店",
+    "estimated_cost": 400
+  },
+  "attractions": [
+    {
+      "name": "景点名称",
+      "address": "详细地址",
+      "location": {"longitude": 116.397128, "latitude": 39.916527},
+      "visit_duration": 120,
+      "description": "景点详细描述",
+      "category": "景点类别",
+      "ticket_price": 60
+    }
+  ],
+  "meals": [
+    {"type": "breakfast", "name": "早餐推荐", "description": "早餐描述", "estimated_cost": 30},
+    {"type": "lunch", "name": "午餐推荐", "description": "午餐描述", "estimated_cost": 50},
+    {"type": "dinner", "name": "晚餐推荐", "description": "晚餐描述", "estimated_cost": 80}
+  ]
+}
+```
+
+**重要提示:**
+1. 只安排给定的景点, 按合理的游览顺序排列
+2. 经纬度直接使用表格中的数值
+3. 必须包含早中晚三餐
+"""
+
+
+class DaySkeleton(BaseModel):
+    """骨架中的单日安排"""
+    day_index: int = Field(default=0)
+    theme: str = Field(default="")
+    attractions: List[str] = Field(default_factory=list)
+    hotel: Optional[str] = Field(default=None)
+
+
+class TripSkeleton(BaseModel):
+    """行程骨架"""
+    days: List[DaySkeleton] = Field(default_factory=list)
+    overall_suggestions: str = Field(default="")
+
+
+def _basic_info(request: TripRequest) -> str:
+    return f"""【基本信息】
+- 城市: {request.city}
+- 日期: {request.start_date} 至 {request.end_date}
+- 天数: {request.travel_days} 天
+- 交通方式: {request.transportation}
+- 住宿偏好: {request.accommodation}
+- 用户偏好: {", ".join(request.preferences) if request.preferences else "无"}
+"""
+
+
+def _build_skeleton_query(
+        request: TripRequest,
+        context: Dict[str, str],
+        errors: List[str],
+        clusters: Optional[List[List[POIInfo]]] = None,
+        day_hotels: Optional[List[POIInfo]] = None,
+    ) -> str:
+    if clusters:
+        attractions = "每天的景点已按地理位置分组, 请保持分组, 只需为每天拟定主题并选择酒店\n"
+        attractions += format_day_clusters(clusters)
+    else:
+        attractions = context["attractions"]
+
+    if day_hotels:
+        hotels = "每天入住的酒店已指定\n" + format_day_hotels(day_hotels)
+    else:
+        hotels = context["hotels"]
+
+    query = f"""请为 {request.city} 的 {request.travel_days} 天行程分配每日景点与酒店。
+
+{_basic_info(request)}
+【景点信息】
+{attractions}
+
+【酒店信息】
+{hotels}
+"""
+    if errors:
+        query += "\n【缺失信息】\n以下信息获取失败, 请基于常识合理补全:\n" + "\n".join(errors)
+
+    if request.free_text_input:
+        query += f"\n【额外要求】\n{request.free_text_input}"
+
+    return query
+
+
+def _build_day_query(
+        request: TripRequest,
+        day_index: int,
+        day_date: str,
+        skeleton: DaySkeleton,
+        attractions: List[POIInfo],
+        hotel: Optional[POIInfo],
+        weather: Optional[WeatherInfo],
+    ) -> str:
+    # 表格中找不到的名称(LLM改写或原始文本模式)按名称列出, 由模型补全
+    known = {poi.name for poi in attractions}
+    missing = [name for name in skeleton.attractions if name not in known]
+    attraction_table = "\n".join([POI_COLUMNS, *(format_poi_row(poi) for poi in attractions), *missing])
+
+    if hotel:
+        hotel_table = "\n".join([POI_COLUMNS, format_poi_row(hotel)])
+    else:
+        hotel_table = skeleton.hotel or "请推荐一家符合住宿偏好的酒店"
+
+    query = f"""请生成 {request.city} 第 {day_index + 1} 天({day_date})的行程, day_index 为 {day_index}。
+
+{_basic_info(request)}
+【当日主题】
+{skeleton.theme or "无"}
+
+【景点信息】
+{attraction_table}
+
+【酒店信息】
+{hotel_table}
+"""
+    if weather:
+        query += f"\n【天气信息】\n{WEATHER_COLUMNS}\n{format_weather_row(weather)}\n"
+
+    if request.free_text_input:
+        query += f"\n【额外要求】\n{request.free_text_input}"
+
+    return query
+
+
+def _trip_dates(request: TripRequest) -> List[str]:
+    start = date.fromisoformat(request.start_date)
+    return [(start + timedelta(days=i)).isoformat() for i in range(request.travel_days)]
+
+
+def _normalize_skeleton(
+        skeleton: TripSkeleton,
+        travel_days: int,
+        attractions: List[POIInfo],
+        clusters: Optional[List[List[POIInfo]]] = None,
+        day_hotels: Optional[List[POIInfo]] = None,
+    ) -> List[DaySkeleton]:
+    """保证骨架恰好覆盖每一天; 缺少的天从未分配的景点中补齐, 已分组/已选定酒店时以其为准"""
+    days = sorted(skeleton.days, key=lambda d: d.day_index)[:travel_days]
+    if clusters:
+        while len(days) < travel_days:
+            days.append(DaySkeleton(hotel=days[-1].hotel if days else None))
+        for day, cluster in zip(days, clusters):
+            day.attractions = [poi.name for poi in cluster]
+
+    assigned = {name for day in days for name in day.attractions}
+    spare = [poi.name for poi in attractions if poi.name not in assigned]
+
+    while len(days) < travel_days:
+        picked, spare = spare[:3], spare[3:]
+        days.append(DaySkeleton(attractions=picked, hotel=days[-1].hotel if days else None))
+
+    for index, day in enumerate(days):
+        day.day_index = index
+        if day_hotels:
+            day.hotel = day_hotels[index].name
+    return days
+
+
+def _fallback_skeleton(travel_days: int, attractions: List[POIInfo], hotels: List[POIInfo]) -> TripSkeleton:
+    """骨架生成失败时按排序依次分配景点"""
+    per_day = max(1, min(3, len(attractions) // max(1, travel_days)))
+    return TripSkeleton(days=[
+        DaySkeleton(
+            day_index=index,
+            attractions=[poi.name for poi in attractions[index * per_day:(index + 1) * per_day]],
+            hotel=hotels[0].name if hotels else None,
+        )
+        for index in range(travel_days)
+    ])
+
+
+def _fallback_day(
+        request: TripRequest,
+        day_index: int,
+        day_date: str,
+        skeleton: DaySkeleton,
+        attractions: List[POIInfo],
+        hotel: Optional[POIInfo],
+    ) -> DayPlan:
+    """单日生成失败时直接由骨架与候选数据构造行程"""
+    return DayPlan(
+        date=day_date,
+        day_index=day_index,
+        description=skeleton.theme or "、".join(poi.name for poi in attractions) or "自由活动",
+        transportation=request.transportation,
+        accommodation=request.accommodation,
+        hotel=Hotel(
+            name=hotel.name,
+            address=hotel.address,
+            location=hotel.location,
+            rating=f"{hotel.rating:g}" if hotel.rating is not None else "",
+            type=hotel.type,
+            estimated_cost=int(hotel.cost or 0),
+        ) if hotel else None,
+        attractions=[
+            Attraction(
+                name=poi.name,
+                address=poi.address,
+                location=poi.location,
+                visit_duration=120,
+                description=poi.name,
+                category=poi.type or "景点",
+                rating=poi.rating,
+            )
+            for poi in attractions
+        ],
+    )
+
+
+async def _generate_skeleton(
+        llm, registry, request, context, errors, attractions, hotels, clusters, day_hotels,
+    ) -> TripSkeleton:
+    messages = [
+        {"role": "system", "content": SKELETON_PROMPT},
+        {"role": "user", "content": _build_skeleton_query(request, context, errors, clusters, day_hotels)},
+    ]
+    try:
+        async with registry.slot():
+            response = await llm.ainvoke(messages, config={"tags": [PLAN_PART_TAG]})
+        return parse_json_model(response.content, TripSkeleton)
+    except TripPlanParseError as e:
+        print(f"⚠️  行程骨架解析失败, 按排序分配景点: {e}")
+        return _fallback_skeleton(request.travel_days, attractions, hotels)
+    except OverloadedError:
+        raise
+    except Exception as e:
+        # 超时或模型服务出错时同样按排序分配, 不让单次骨架调用拖垮整个计划
+        print(f"⚠️  行程骨架生成失败, 按排序分配景点: {e}")
+        return _fallback_skeleton(request.travel_days, attractions, hotels)
+
+
+async def _generate_day(
+        llm,
+        registry,
+        request: TripRequest,
+        day_index: int,
+        day_date: str,
+        skeleton: DaySkeleton,
+        candidates: Dict[str, POIInfo],
+        hotels: Dict[str, POIInfo],
+        forecasts: Dict[str, WeatherInfo],
+    ) -> DayPlan:
+    attractions = [candidates[name] for name in skeleton.attractions if name in candidates]
+    hotel = hotels.get(skeleton.hotel or "")
+    messages = [
+        {"role": "system", "content": DAY_PROMPT},
+        {"role": "user", "content": _build_day_query(
+            request, day_index, day_date, skeleton, attractions, hotel, forecasts.get(day_date),
+        )},
+    ]
+
+    day = None
+    for attempt in range(1, DAY_ATTEMPTS + 1):
+        try:
+            async with registry.slot():
+                response = await llm.ainvoke(messages, config={"tags": [PLAN_PART_TAG]})
+            day = parse_json_model(response.content, DayPlan)
+            break
+        except TripPlanParseError as e:
+            print(f"⚠️  第{day_index + 1}天行程解析失败(第{attempt}次): {e}")
+        except OverloadedError:
+            raise
+        except Exception as e:
+            # 单天调用失败只影响这一天, 使用骨架生成的默认行程
+            print(f"⚠️  第{day_index + 1}天行程生成失败: {e}")
+            break
+
+    if day is None:
+        day = _fallback_day(request, day_index, day_date, skeleton, attractions, hotel)
+
+    # 以骨架为准, 防止模型改写日期与序号
+    day.date, day.day_index = day_date, day_index
+    await adispatch_custom_event(DAY_EVENT, day.model_dump())
+    return day
+
+
+async def plan_trip_parallel(
+        request: TripRequest,
+        context: Dict[str, str],
+        forecasts: List[WeatherInfo],
+        errors: List[str],
+        clusters: Optional[List[List[POIInfo]]] = None,
+        day_hotels: Optional[List[POIInfo]] = None,
+    ) -> TripPlan:
+    """
+    骨架 + 按天并行生成旅行计划
+
+    Args:
+        request: 旅行请求
+        context: 压缩后的 planner 输入(attractions / weather / hotels)
+        forecasts: 结构化天气预报
+        errors: 失败的 specialist 分支
+        clusters: 按地理位置分好的每日景点, 提供时骨架只负责主题与酒店
+        day_hotels: 选址得出的每天入住酒店
+    """
+    registry = get_llm_registry()
+    llm = registry.get_chat_model(temperature=0.2)
+
+    attractions = parse_poi_rows(context["attractions"])
+    hotels = parse_poi_rows(context["hotels"]) + (day_hotels or [])
+    dates = _trip_dates(request)
+
+    skeleton = await _generate_skeleton(
+        llm, registry, request, context, errors, attractions, hotels, clusters, day_hotels,
+    )
+    day_skeletons = _normalize_skeleton(skeleton, request.travel_days, attractions, clusters, day_hotels)
+
+    candidates = {poi.name: poi for poi in attractions}
+    hotel_map = {poi.name: poi for poi in hotels}
+    weather_map = {w.date: w for w in forecasts}
+
+    tasks = [
+        asyncio.create_task(_generate_day(
+            llm, registry, request, index, dates[index], day_skeleton,
+            candidates, hotel_map, weather_map,
+        ))
+        for index, day_skeleton in enumerate(day_skeletons)
+    ]
+    try:
+        days = await asyncio.gather(*tasks)
+    finally:
+        # 任一天失败(如过载)时取消其余仍在进行的调用, 不再消耗LLM额度
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return TripPlan(
+        city=request.city,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        days=list(days),
+        weather_info=[weather_map[d] for d in dates if d in weather_map],
+        overall_suggestions=skeleton.overall_suggestions,
+    )
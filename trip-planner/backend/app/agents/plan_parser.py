@@ -0,0 +1,246 @@
+"""TripPlan 增量解析器
+
+逐块消费 planner 的输出文本, 在 days / weather_info 的元素以及 budget
+对象闭合的瞬间完成校验并产出, 无需等待整段 JSON 生成完毕。
+"""
+
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from ..models.schemas import TripPlan, DayPlan, WeatherInfo, Budget
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class TripPlanParseError(RuntimeError):
+    """planner 输出无法解析为 TripPlan"""
+
+
+# 顶层数组字段 -> (事件类型, 元素模型)
+ARRAY_ITEM_MODELS = {
+    "days": ("day", DayPlan),
+    "weather_info": ("weather", WeatherInfo),
+}
+
+# 顶层对象字段 -> (事件类型, 模型)
+OBJECT_MODELS = {
+    "budget": ("budget", Budget),
+}
+
+
+class _Frame:
+    """JSON 容器栈帧"""
+
+    __slots__ = ("kind", "key", "start", "current_key", "expect_key")
+
+    def __init__(self, kind: str, key: Optional[str], start: int):
+        self.kind = kind              # "{" 或 "["
+        self.key = key                # 该容器在父对象中的键
+        self.start = start            # 容器起始位置
+        self.current_key = None       # 对象中最近读取的键
+        self.expect_key = kind == "{"
+
+
+class TripPlanStreamParser:
+    """
+    TripPlan 流式解析器
+
+    用法:
+        parser = TripPlanStreamParser()
+        for chunk in chunks:
+            for kind, obj in parser.feed(chunk):
+                ...
+        plan = parser.close()
+    """
+
+    def __init__(self):
+        # 全部输出分块(close 时拼接一次), 以及尚未闭合元素所在的文本窗口;
+        # 窗口起点之前的文本不再需要扫描, 位置均为在全部输出中的绝对位置
+        self._chunks: List[str] = []
+        self._window = ""
+        self._offset = 0
+        self._pos = 0
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+
+    @property
+    def finished(self) -> bool:
+        """根对象是否已闭合"""
+        return self._root_end is not None
+
+    def feed(self, chunk: str) -> List[Tuple[str, BaseModel]]:
+        """
+        追加一段输出并返回其中新闭合的对象
+
+        Args:
+            chunk: planner 输出的增量文本
+
+        Returns:
+            (事件类型, 模型实例) 列表, 事件类型为 day / weather / budget
+
+        Raises:
+            TripPlanParseError: JSON 结构错误或对象校验失败
+        """
+        if self.finished or not chunk:
+            return []
+
+        self._chunks.append(chunk)
+        self._window += chunk
+        events: List[Tuple[str, BaseModel]] = []
+        text, base = self._window, self._offset
+
+        # 跳过 ```json 代码块标记等根对象之前的内容
+        if self._root_start is None:
+            start = text.find("{", self._pos - base)
+            if start == -1:
+                self._pos = base + len(text)
+                self._trim()
+                return events
+            self._root_start = base + start
+            self._stack.append(_Frame("{", None, base + start))
+            self._pos = base + start + 1
+
+        i = self._pos - base
+        n = len(text)
+        while i < n:
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    frame = self._stack[-1]
+                    if frame.kind == "{" and frame.expect_key:
+                        frame.current_key = json.loads(text[self._string_start - base:i + 1])
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = base + i
+            elif ch == ":":
+                self._stack[-1].expect_key = False
+            elif ch == ",":
+                frame = self._stack[-1]
+                if frame.kind == "{":
+                    frame.expect_key = True
+            elif ch in "{[":
+                parent = self._stack[-1]
+                key = parent.current_key if parent.kind == "{" else None
+                self._stack.append(_Frame(ch, key, base + i))
+            elif ch in "}]":
+                frame = self._stack.pop()
+                if (ch == "}") != (frame.kind == "{"):
+                    raise TripPlanParseError(f"TripPlan JSON 结构错误: 位置 {base + i} 处的 '{ch}' 不匹配")
+
+                if not self._stack:
+                    self._root_end = base + i + 1
+                    break
+
+                if ch == "}":
+                    event = self._validate_closed(frame, text[frame.start - base:i + 1])
+                    if event is not None:
+                        events.append(event)
+            i += 1
+
+        self._pos = base + (i + 1 if self.finished else i)
+        self._trim()
+        return events
+
+    def _trim(self):
+        """丢弃窗口中不再需要的前缀: 只保留仍可能被校验产出的未闭合元素与未结束的键"""
+        keep = self._pos
+        if len(self._stack) >= 3 and self._stack[1].kind == "[":
+            keep = min(keep, self._stack[2].start)
+        elif len(self._stack) >= 2 and self._stack[1].kind == "{":
+            keep = min(keep, self._stack[1].start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+
+        if keep > self._offset:
+            self._window = self._window[keep - self._offset:]
+            self._offset = keep
+
+    def _validate_closed(self, frame: _Frame, raw: str) -> Optional[Tuple[str, BaseModel]]:
+        """校验刚闭合的对象, 如果它是需要产出的顶层元素"""
+        depth = len(self._stack)
+
+        if depth == 2 and self._stack[1].kind == "[":
+            spec = ARRAY_ITEM_MODELS.get(self._stack[1].key)
+        elif depth == 1:
+            spec = OBJECT_MODELS.get(frame.key)
+        else:
+            spec = None
+
+        if spec is None:
+            return None
+
+        kind, model = spec
+        try:
+            return kind, model(**json.loads(raw))
+        except (ValueError, ValidationError) as e:
+            raise TripPlanParseError(f"{model.__name__} 解析失败: {e}") from e
+
+    def close(self) -> TripPlan:
+        """
+        结束解析并构造完整的 TripPlan
+
+        Raises:
+            TripPlanParseError: 输出不完整或校验失败
+        """
+        if self._root_start is None:
+            raise TripPlanParseError("TripPlan JSON 解析失败: 未找到JSON对象")
+        if not self.finished:
+            raise TripPlanParseError("TripPlan JSON 解析失败: 输出不完整")
+
+        try:
+            data = json.loads("".join(self._chunks)[self._root_start:self._root_end])
+            return TripPlan(**data)
+        except (ValueError, ValidationError) as e:
+            raise TripPlanParseError(f"TripPlan JSON 解析失败: {e}") from e
+
+
+async def parse_trip_plan_stream(chunks: AsyncIterator[str]) -> AsyncIterator[Tuple[str, BaseModel]]:
+    """
+    将 planner 的输出流解析为增量事件
+
+    依次产出 ("day", DayPlan) / ("weather", WeatherInfo) / ("budget", Budget),
+    读完全部输出后产出 ("plan", TripPlan)。根对象闭合后仍会读完剩余的分块。
+
+    Raises:
+        TripPlanParseError: 结构错误或对象校验失败(在出错的分块处立即抛出)
+    """
+    parser = TripPlanStreamParser()
+    async for chunk in chunks:
+        for event in parser.feed(chunk):
+            yield event
+    yield "plan", parser.close()
+
+
+def parse_json_model(text: str, model: Type[M]) -> M:
+    """
+    从 LLM 输出中取出 JSON 对象并校验为指定模型
+
+    兼容 ```json 代码块以及JSON前后的说明文字
+
+    Raises:
+        TripPlanParseError: 未找到JSON对象或校验失败
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise TripPlanParseError(f"{model.__name__} 解析失败: 未找到JSON对象")
+
+    try:
+        return model(**json.loads(text[start:end + 1]))
+    except (ValueError, ValidationError) as e:
+        raise TripPlanParseError(f"{model.__name__} 解析失败: {e}") from e
@@ -1,8 +1,13 @@
-import json
-from langchain_openai import ChatOpenAI
-
 from ..workflow.state import AgentState
 from ..models.schemas import TripPlan
+from langchain_core.callbacks.manager import adispatch_custom_event
+from .plan_parser import parse_trip_plan_stream
+from .clustering import format_day_clusters
+from .hotel_placement import format_day_hotels
+from .parallel_planner import plan_trip_parallel, DAY_EVENT, WEATHER_EVENT
+from .postprocess import finalize_plan
+from ..config import get_settings
+from ..services.LLM import get_llm_registry
 
 PLANNER_AGENT_PROMPT = """你是行程规划专家。你的任务是根据景点信息和天气信息,生成详细的旅行计划。
 
@@ -58,14 +63,7 @@ PLANNER_AGENT_PROMPT = """你是行程规划专家。你的任务是根据景点
       "wind_power": "1-3级"
     }
   ],
-  "overall_suggestions": "总体建议",
-  "budget": {
-    "total_attractions": 180,
-    "total_hotels": 1200,
-    "total_meals": 480,
-    "total_transportation": 200,
-    "total": 2060
-  }
+  "overall_suggestions": "总体建议"
 }
 ```
 
@@ -76,34 +74,55 @@ PLANNER_AGENT_PROMPT = """你是行程规划专家。你的任务是根据景点
 4. 考虑景点之间的距离和游览时间
 5. 每天必须包含早中晚三餐
 6. 提供实用的旅行建议
-7. **必须包含预算信息**:
+7. **必须包含费用信息**:
    - 景点门票价格(ticket_price)
    - 餐饮预估费用(estimated_cost)
    - 酒店预估费用(estimated_cost)
-   - 预算汇总(budget)包含各项总费用
+   - 无需返回预算汇总, 由系统根据以上费用计算
 """
 
-def planner_node(state: AgentState) -> AgentState:
+async def planner_node(state: AgentState) -> AgentState:
     """
     汇总各个 specialist 的结果，生成最终 TripPlan
     """
 
     request = state["request"]
 
-    attractions = "\n".join(state.get("attraction_results", []))
-    weather = "\n".join(state.get("weather_results", []))
-    hotels = "\n".join(state.get("hotel_results", []))
+    # 优先使用压缩节点整理好的表格
+    context = state.get("planner_context") or {
+        "attractions": "\n".join(state.get("attraction_results", [])),
+        "weather": "\n".join(state.get("weather_results", [])),
+        "hotels": "\n".join(state.get("hotel_results", [])),
+    }
+    errors = state.get("specialist_errors", [])
+    clusters = state.get("day_clusters")
+    day_hotels = state.get("day_hotels")
 
-    llm = ChatOpenAI(
-        model="Qwen/Qwen2.5-Coder-32B-Instruct",
-        temperature=0.2,
-    )
+    if _use_parallel(request.travel_days):
+        print(f"🧩 按天并行生成 {request.travel_days} 天行程")
+        plan = await plan_trip_parallel(
+            request=request,
+            context=context,
+            forecasts=state.get("weather_forecasts", []),
+            errors=errors,
+            clusters=clusters,
+            day_hotels=day_hotels,
+        )
+        return {
+            "final_plan": await finalize_plan(plan, request)
+        }
+
+    registry = get_llm_registry()
+    llm = registry.get_chat_model(temperature=0.2)
 
     human_content = _build_planner_query(
             request=request,
-            attractions=attractions,
-            weather=weather,
-            hotels=hotels,
+            attractions=format_day_clusters(clusters) if clusters else context["attractions"],
+            weather=context["weather"],
+            hotels=format_day_hotels(day_hotels) if day_hotels else context["hotels"],
+            errors=errors,
+            grouped=bool(clusters),
+            hotels_assigned=bool(day_hotels),
         )
 
     messages = [
@@ -111,76 +130,101 @@ def planner_node(state: AgentState) -> AgentState:
         {"role": "user", "content": human_content}
     ]
 
-    response = llm.invoke(messages)
-
-    plan = _parse_trip_plan(response.content, request)
+    async with registry.slot():
+        plan = await _stream_trip_plan(llm, messages)
 
     return {
-        "final_plan": plan
+        "final_plan": await finalize_plan(plan, request)
     }
 
 
+def _use_parallel(travel_days: int) -> bool:
+    """是否按天并行生成"""
+    settings = get_settings()
+    if settings.planner_mode == "parallel":
+        return True
+    if settings.planner_mode == "auto":
+        return travel_days >= settings.planner_parallel_min_days
+    return False
+
+
 def _build_planner_query(
         request,
         attractions: str,
         weather: str,
         hotels: str,
+        errors: list[str] | None = None,
+        grouped: bool = False,
+        hotels_assigned: bool = False,
     ) -> str:
-    query = f"""
-        请根据以下信息生成 {request.city} 的 {request.travel_days} 天旅行计划。
-
-        【基本信息】
-        - 城市: {request.city}
-        - 日期: {request.start_date} 至 {request.end_date}
-        - 天数: {request.travel_days} 天
-        - 交通方式: {request.transportation}
-        - 住宿偏好: {request.accommodation}
-        - 用户偏好: {", ".join(request.preferences) if request.preferences else "无"}
-
-        【景点信息】
-        {attractions}
-
-        【天气信息】
-        {weather}
-
-        【酒店信息】
-        {hotels}
-
-        【要求】
-        1. 每天安排 2–3 个景点
-        2. 每天包含早 / 中 / 晚餐建议
-        3. 每天推荐一家具体酒店（必须来自酒店信息）
-        4. 合理考虑交通距离与时间
-        5. 返回 **完整 JSON**
-        6. 景点需包含真实合理的经纬度
-        """
+    if grouped:
+        arrangement = "每天的景点已按地理位置分组, 按【景点信息】中的分组安排, 不要调整"
+    else:
+        arrangement = "每天安排 2–3 个景点"
+
+    if hotels_assigned:
+        lodging = "每天入住【酒店信息】中为当天指定的酒店"
+    else:
+        lodging = "每天推荐一家具体酒店（必须来自酒店信息）"
+
+    # 不缩进: 行首空白同样计入 token
+    query = f"""请根据以下信息生成 {request.city} 的 {request.travel_days} 天旅行计划。
+
+【基本信息】
+- 城市: {request.city}
+- 日期: {request.start_date} 至 {request.end_date}
+- 天数: {request.travel_days} 天
+- 交通方式: {request.transportation}
+- 住宿偏好: {request.accommodation}
+- 用户偏好: {", ".join(request.preferences) if request.preferences else "无"}
+
+【景点信息】
+{attractions}
+
+【天气信息】
+{weather}
+
+【酒店信息】
+{hotels}
+
+【要求】
+1. {arrangement}
+2. 每天包含早 / 中 / 晚餐建议
+3. {lodging}
+4. 合理考虑交通距离与时间
+5. 返回 **完整 JSON**
+6. 景点与酒店的经纬度直接使用上表中的数值
+"""
+
+    if errors:
+        query += "\n【缺失信息】\n以下信息获取失败, 请基于常识合理补全:\n" + "\n".join(errors)
 
     if request.free_text_input:
         query += f"\n【额外要求】\n{request.free_text_input}"
 
     return query
 
-def _parse_trip_plan(response: str, request) -> TripPlan:
-    """
-    从 LLM 输出中提取 JSON 并构造 TripPlan
+async def _stream_trip_plan(llm, messages) -> TripPlan:
     """
-    try:
-        if "```json" in response:
-            start = response.find("```json") + 7
-            end = response.find("```", start)
-            json_str = response[start:end].strip()
-        elif "```" in response:
-            start = response.find("```") + 3
-            end = response.find("```", start)
-            json_str = response[start:end].strip()
-        else:
-            start = response.find("{")
-            end = response.rfind("}") + 1
-            json_str = response[start:end]
-
-        data = json.loads(json_str)
-        return TripPlan(**data)
-
-    except Exception as e:
-        raise RuntimeError(f"TripPlan JSON 解析失败: {e}")
+    流式调用 LLM 并边生成边解析 TripPlan
 
+    JSON 结构错误或对象校验失败时立即终止生成
+    (根对象闭合后仍读完剩余输出, 末尾的分块携带token用量)
+    """
+    plan = None
+    async for kind, item in parse_trip_plan_stream(_contents(llm, messages)):
+        if kind == "plan":
+            plan = item
+        elif kind == "day":
+            await adispatch_custom_event(DAY_EVENT, item.model_dump())
+        elif kind == "weather":
+            await adispatch_custom_event(WEATHER_EVENT, item.model_dump())
+
+    return plan
+
+
+async def _contents(llm, messages):
+    """LLM 流式输出中的文本分块"""
+    async for chunk in llm.astream(messages):
+        if isinstance(chunk.content, str) and chunk.content:
+            yield chunk.content
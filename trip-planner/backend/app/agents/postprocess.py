@@ -0,0 +1,88 @@
+"""planner 输出的后处理
+
+LLM 生成的 TripPlan 依次经过 POSTPROCESS_STEPS 中的各个步骤,
+由确定性的计算补全或修正计划中的字段。
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List
+
+from ..config import get_settings
+from ..models.schemas import TripRequest, TripPlan
+from ..geo import optimize_routes, haversine_matrix, to_radians
+from .budget import compute_budget
+from .geocoding import validate_locations
+
+PostprocessStep = Callable[[TripPlan, TripRequest], Awaitable[TripPlan]]
+
+
+async def apply_geocoding(plan: TripPlan, request: TripRequest) -> TripPlan:
+    """按地址批量地理编码, 校正模型编写的坐标; 超时或失败时保留原坐标"""
+    if not get_settings().geocode_validation_enabled:
+        return plan
+
+    try:
+        corrected, warnings = await validate_locations(plan, request.city)
+    except asyncio.TimeoutError:
+        print("⚠️  地理编码校验超时, 保留模型坐标")
+        return plan
+    except Exception as e:
+        print(f"⚠️  地理编码校验失败: {str(e)}")
+        return plan
+
+    if corrected or warnings:
+        print(f"📍 坐标校验: 修正 {corrected} 处, {len(warnings)} 处未能核实")
+    plan.warnings.extend(warnings)
+    return plan
+
+
+async def apply_route_order(plan: TripPlan, request: TripRequest) -> TripPlan:
+    """按距离重排每天的景点顺序(从酒店出发并返回酒店)"""
+    before, after = optimize_routes(plan)
+    if after < before:
+        print(f"🧭 游览顺序优化: 路程 {before:.1f}km → {after:.1f}km")
+    return plan
+
+
+async def apply_hotel_distance(plan: TripPlan, request: TripRequest) -> TripPlan:
+    """由酒店与当天景点的坐标计算 Hotel.distance, 覆盖模型编写的描述"""
+    for day in plan.days:
+        if not (day.hotel and day.hotel.location and day.attractions):
+            continue
+        distances = haversine_matrix(
+            to_radians([day.hotel.location]),
+            to_radians([a.location for a in day.attractions]),
+        )[0]
+        day.hotel.distance = f"距当日景点平均{distances.mean():.1f}公里, 最远{distances.max():.1f}公里"
+    return plan
+
+
+async def apply_budget(plan: TripPlan, request: TripRequest) -> TripPlan:
+    """由每日费用明细与交通费用模型计算预算, 覆盖模型输出的预算"""
+    plan.budget = compute_budget(plan.days, request.transportation)
+    return plan
+
+
+# 按顺序执行的后处理步骤
+POSTPROCESS_STEPS: List[PostprocessStep] = [
+    apply_geocoding,
+    apply_route_order,
+    apply_hotel_distance,
+    apply_budget,
+]
+
+
+async def finalize_plan(plan: TripPlan, request: TripRequest) -> TripPlan:
+    """
+    对 planner 生成的计划执行全部后处理步骤
+
+    Args:
+        plan: planner 生成的计划
+        request: 旅行请求
+
+    Returns:
+        处理后的 TripPlan
+    """
+    for step in POSTPROCESS_STEPS:
+        plan = await step(plan, request)
+    return plan
@@ -1,69 +1,139 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
 from typing import List, Dict, Any, Optional
 from langchain_core.tools import BaseTool
 
-from ..tools.mcp_tool import MCPTool
 from ..config import get_settings
+from ..models.schemas import TripRequest, POIInfo, WeatherInfo
+from ..services.LLM import get_llm_registry
+from ..tools.amap_tool import get_amap_mcp_tool, get_amap_service
 from ..workflow.state import AgentState
 
-# 全局MCP工具实例
-_amap_mcp_tool = None
+# 偏好标签 -> 景点搜索关键词
+PREFERENCE_KEYWORDS = {
+    "历史文化": ["博物馆", "名胜古迹"],
+    "自然风光": ["风景名胜", "公园"],
+    "美食": ["美食街"],
+    "购物": ["步行街", "购物中心"],
+    "艺术": ["美术馆", "艺术区"],
+    "休闲": ["公园", "古镇"],
+}
+
+# 住宿偏好 -> 酒店搜索关键词
+ACCOMMODATION_KEYWORDS = {
+    "经济型酒店": "经济型酒店",
+    "舒适型酒店": "舒适型酒店",
+    "豪华酒店": "五星级酒店",
+    "民宿": "民宿",
+}
 
 async def get_amap_tools() -> list[BaseTool]:
     """
-    使用 LangChain MCPClient 获取高德地图 MCP 工具列表
-    异步获取高德地图MCP工具实例(单例模式)
+    获取高德地图 MCP 工具列表
+    与地图服务共享同一个 MCP 会话池
     
     Returns:
         BaseTool列表
     """
-    global _amap_mcp_tool
-    
-    if _amap_mcp_tool is not None and _amap_mcp_tool.mcp_tools is not None:
-        return _amap_mcp_tool.mcp_tools
-    
-    settings = get_settings()
-    
-    if not settings.amap_api_key:
-        raise ValueError("高德地图API Key未配置,请在.env文件中设置AMAP_API_KEY")
-    
-    # 创建MCP工具实例
-    _amap_mcp_tool = MCPTool()
-    
-    # 配置MCP服务器
-    server_config = {
-        "amap": {
-            "command": "uvx",
-            "args": ["amap-mcp-server"],
-            "env": {"AMAP_MAPS_API_KEY": settings.amap_api_key},
-            "transport": "stdio",
-        }
-    }
-    
-    # 初始化工具
-    tools = await _amap_mcp_tool.init_mcp_tools(server_config)
-    return tools
+    mcp_tool = await get_amap_mcp_tool()
+    return mcp_tool.mcp_tools
 
 async def build_tool_llm(system_prompt: str):
-    llm = ChatOpenAI(
-        model="Qwen/Qwen2.5-Coder-32B-Instruct",
-        temperature=0,
-    )
-
     # 获取高德地图MCP工具列表
     tools = await get_amap_tools()
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("human", "{input}")
-    ])
 
-    # ⭐ 关键：LLM 直接 bind tools
-    return prompt | llm.bind_tools(tools)
+    # ⭐ 关键：LLM 直接 bind tools（链由注册表缓存复用）
+    return get_llm_registry().get_tool_chain(system_prompt, tools)
+
+
+def attraction_keywords(request: TripRequest) -> List[str]:
+    """根据用户偏好生成景点搜索关键词"""
+    keywords = ["热门景点"]
+    for preference in request.preferences:
+        keywords.extend(PREFERENCE_KEYWORDS.get(preference, [preference]))
+    return list(dict.fromkeys(keywords))
+
+
+def hotel_keyword(request: TripRequest) -> str:
+    """根据住宿偏好生成酒店搜索关键词"""
+    return ACCOMMODATION_KEYWORDS.get(request.accommodation, request.accommodation or "酒店")
+
+
+def format_pois(pois: List[POIInfo]) -> str:
+    """将POI列表整理为planner可读的文本"""
+    lines = []
+    for poi in pois:
+        parts = [
+            poi.name,
+            poi.type,
+            poi.address,
+            f"经纬度 {poi.location.longitude},{poi.location.latitude}",
+        ]
+        if poi.rating is not None:
+            parts.append(f"评分 {poi.rating}")
+        if poi.cost is not None:
+            parts.append(f"人均 {poi.cost:g}元")
+        lines.append("- " + " | ".join(parts))
+    return "\n".join(lines)
+
+
+def format_weather(forecasts: List[WeatherInfo]) -> str:
+    """将天气预报整理为planner可读的文本"""
+    return "\n".join(
+        f"- {w.date}: 白天{w.day_weather} {w.day_temp}°C, 夜间{w.night_weather} {w.night_temp}°C, "
+        f"{w.wind_direction}风 {w.wind_power}"
+        for w in forecasts
+    )
+
+
+async def _search_pois(keywords: List[str], city: str) -> List[POIInfo]:
+    """并发搜索多个关键词并按POI ID去重"""
+    service = get_amap_service()
+    results = await asyncio.gather(*(service.search_poi(keyword, city) for keyword in keywords))
+
+    pois: Dict[str, POIInfo] = {}
+    for poi in (poi for result in results for poi in result):
+        pois.setdefault(poi.id, poi)
+    return list(pois.values())
+
+
+async def _direct_attractions(request: TripRequest) -> AgentState:
+    pois = await _search_pois(attraction_keywords(request), request.city)
+    if not pois:
+        raise RuntimeError(f"未搜索到 {request.city} 的景点")
+
+    return {
+        "attraction_pois": pois,
+        "attraction_results": [format_pois(pois)],
+    }
+
+
+async def _direct_weather(request: TripRequest) -> AgentState:
+    forecasts = await get_amap_service().get_weather(request.city)
+    if not forecasts:
+        raise RuntimeError(f"未查询到 {request.city} 的天气")
+
+    return {
+        "weather_forecasts": forecasts,
+        "weather_results": [format_weather(forecasts)],
+    }
+
+
+async def _direct_hotels(request: TripRequest) -> AgentState:
+    pois = await _search_pois([hotel_keyword(request)], request.city)
+    if not pois:
+        raise RuntimeError(f"未搜索到 {request.city} 的酒店")
+
+    return {
+        "hotel_pois": pois,
+        "hotel_results": [format_pois(pois)],
+    }
 
 
 async def attraction_node(state: AgentState) -> AgentState:
+    # direct 模式: 直接按请求参数调用地图工具, 不经过LLM
+    if get_settings().specialist_mode == "direct":
+        return await _direct_attractions(state["request"])
+
     chain = await build_tool_llm(
         system_prompt=(
             "你是一个旅游助手，负责使用地图工具搜索城市中的热门景点。"
@@ -74,9 +144,10 @@ async def attraction_node(state: AgentState) -> AgentState:
     city = state["request"].city
     query = f"搜索 {city} 的热门旅游景点"
 
-    result = await chain.ainvoke({
-        "input": query
-    })
+    async with get_llm_registry().slot():
+        result = await chain.ainvoke({
+            "input": query
+        })
 
     return {
         "attraction_results": [result.content]
@@ -84,6 +155,9 @@ async def attraction_node(state: AgentState) -> AgentState:
 
 
 async def weather_node(state: AgentState) -> AgentState:
+    if get_settings().specialist_mode == "direct":
+        return await _direct_weather(state["request"])
+
     chain = await build_tool_llm(
         system_prompt=(
             "你是一个天气查询助手，负责查询指定城市的天气情况。"
@@ -94,9 +168,10 @@ async def weather_node(state: AgentState) -> AgentState:
     city = state["request"].city
     query = f"查询 {city} 的天气情况"
 
-    result = await chain.ainvoke({
-        "input": query
-    })
+    async with get_llm_registry().slot():
+        result = await chain.ainvoke({
+            "input": query
+        })
 
     return {
         "weather_results": [result.content]
@@ -104,6 +179,9 @@ async def weather_node(state: AgentState) -> AgentState:
 
 
 async def hotel_node(state: AgentState) -> AgentState:
+    if get_settings().specialist_mode == "direct":
+        return await _direct_hotels(state["request"])
+
     chain = await build_tool_llm(
         system_prompt=(
             "你是一个酒店推荐助手，负责搜索城市中适合游客入住的酒店。"
@@ -114,9 +192,10 @@ async def hotel_node(state: AgentState) -> AgentState:
     city = state["request"].city
     query = f"搜索 {city} 评价较好的酒店"
 
-    result = await chain.ainvoke({
-        "input": query
-    })
+    async with get_llm_registry().slot():
+        result = await chain.ainvoke({
+            "input": query
+        })
 
     return {
         "hotel_results": [result.content]
@@ -1,8 +1,16 @@
 """FastAPI主应用"""
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from ..config import get_settings, validate_config, print_config
+from ..tools.amap_tool import get_amap_mcp_tool, close_amap_mcp_tool
+from ..services.unsplash_service import get_unsplash_service
+from ..services.LLM import get_llm_registry
+from ..services.job_queue import get_job_queue
+from ..services.limits import OverloadedError
+from ..services.telemetry import configure_tracing, metrics_available, render_metrics
+from ..models.schemas import ErrorResponse
 from .routes import trip, poi, map as map_routes
 
 # 获取配置
@@ -32,6 +40,17 @@ app.include_router(poi.router, prefix="/api")
 app.include_router(map_routes.router, prefix="/api")
 
 
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    """上游繁忙: 返回 429 并告知客户端重试时间"""
+    print(f"⚠️  请求被拒绝: {exc}")
+    return JSONResponse(
+        status_code=429,
+        content=ErrorResponse(message=str(exc), error_code="overloaded").model_dump(),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
     """应用启动事件"""
@@ -50,6 +69,18 @@ async def startup_event():
         print(f"\n❌ 配置验证失败:\n{e}")
         print("\n请检查.env文件并确保所有必要的配置项都已设置")
         raise
+
+    # 链路追踪
+    configure_tracing()
+
+    # 预热高德地图MCP会话池
+    try:
+        await get_amap_mcp_tool()
+    except Exception as e:
+        print(f"\n⚠️  高德地图MCP会话池预热失败, 将在首次调用时重试: {e}")
+
+    # 启动后台任务队列
+    await get_job_queue().start()
     
     print("\n" + "="*60)
     print("📚 API文档: http://localhost:8000/docs")
@@ -62,6 +93,11 @@ async def shutdown_event():
     """应用关闭事件"""
     print("\n" + "="*60)
     print("👋 应用正在关闭...")
+
+    await get_job_queue().stop()
+    await close_amap_mcp_tool()
+    await get_unsplash_service().close()
+    await get_llm_registry().aclose()
     print("="*60 + "\n")
 
 
@@ -87,6 +123,19 @@ async def health():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 指标"""
+    if not metrics_available():
+        raise HTTPException(
+            status_code=404,
+            detail="指标未启用(需安装 prometheus-client 并设置 METRICS_ENABLED=true)"
+        )
+
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -9,7 +9,9 @@ from ...models.schemas import (
     RouteResponse,
     WeatherResponse
 )
-from ...tools.amap_tool import get_amap_service
+from ...tools.amap_tool import get_amap_service, get_amap_mcp_tool
+from ...services.limits import OverloadedError
+from ...geo import find_spatial_index, spatial_index_info
 
 router = APIRouter(prefix="/map", tags=["地图服务"])
 
@@ -41,7 +43,7 @@ async def search_poi(
         service = get_amap_service()
         
         # 搜索POI
-        pois = service.search_poi(keywords, city, citylimit)
+        pois = await service.search_poi(keywords, city, citylimit)
         
         return POISearchResponse(
             success=True,
@@ -49,6 +51,10 @@ async def search_poi(
             data=pois
         )
         
+    except OverloadedError:
+        # 交由全局处理器返回 429
+        raise
+
     except Exception as e:
         print(f"❌ POI搜索失败: {str(e)}")
         raise HTTPException(
@@ -57,6 +63,53 @@ async def search_poi(
         )
 
 
+@router.get(
+    "/nearby",
+    response_model=POISearchResponse,
+    summary="附近POI",
+    description="在本地空间索引中查询某点附近的POI(索引由POI搜索结果填充, 不调用地图服务)"
+)
+async def nearby_poi(
+    city: str = Query(..., description="城市", example="北京"),
+    longitude: float = Query(..., description="经度", example=116.397128, ge=-180, le=180),
+    latitude: float = Query(..., description="纬度", example=39.916527, ge=-90, le=90),
+    radius: float = Query(1000, description="查询半径(米)", gt=0, le=50000),
+    limit: int = Query(20, description="返回数量上限", ge=1, le=200),
+    keywords: Optional[str] = Query(None, description="按名称或类型过滤, 如 餐厅"),
+):
+    """
+    附近POI查询
+
+    Args:
+        city: 城市
+        longitude: 经度
+        latitude: 纬度
+        radius: 查询半径(米)
+        limit: 返回数量上限
+        keywords: 名称或类型包含的关键词
+
+    Returns:
+        按距离升序的POI列表
+    """
+    # 只读查询: 不为请求中任意的城市名创建索引
+    index = find_spatial_index(city)
+    if index is None:
+        results = []
+    elif keywords:
+        # 先取半径内全部POI再过滤, 保证过滤后仍能返回 limit 个
+        results = index.within(latitude, longitude, radius / 1000)
+        results = [(poi, d) for poi, d in results if keywords in poi.name or keywords in poi.type][:limit]
+    else:
+        results = index.within(latitude, longitude, radius / 1000, limit=limit)
+
+    pois = [poi.model_copy(update={"distance": round(d * 1000, 1)}) for poi, d in results]
+    return POISearchResponse(
+        success=True,
+        message=f"找到 {len(pois)} 个附近POI",
+        data=pois
+    )
+
+
 @router.get(
     "/weather",
     response_model=WeatherResponse,
@@ -80,7 +133,7 @@ async def get_weather(
         service = get_amap_service()
         
         # 查询天气
-        weather_info = service.get_weather(city)
+        weather_info = await service.get_weather(city)
         
         return WeatherResponse(
             success=True,
@@ -88,6 +141,10 @@ async def get_weather(
             data=weather_info
         )
         
+    except OverloadedError:
+        # 交由全局处理器返回 429
+        raise
+
     except Exception as e:
         print(f"❌ 天气查询失败: {str(e)}")
         raise HTTPException(
@@ -117,7 +174,7 @@ async def plan_route(request: RouteRequest):
         service = get_amap_service()
         
         # 规划路线
-        route_info = service.plan_route(
+        route_info = await service.plan_route(
             origin_address=request.origin_address,
             destination_address=request.destination_address,
             origin_city=request.origin_city,
@@ -131,6 +188,10 @@ async def plan_route(request: RouteRequest):
             data=route_info
         )
         
+    except OverloadedError:
+        # 交由全局处理器返回 429
+        raise
+
     except Exception as e:
         print(f"❌ 路线规划失败: {str(e)}")
         raise HTTPException(
@@ -148,12 +209,14 @@ async def health_check():
     """健康检查"""
     try:
         # 检查服务是否可用
-        service = get_amap_service()
+        mcp_tool = await get_amap_mcp_tool()
         
         return {
             "status": "healthy",
             "service": "map-service",
-            "mcp_tools_count": len(service.mcp_tool.list_tools())
+            "mcp_tools_count": len(mcp_tool.mcp_tools),
+            "cache": mcp_tool.cache.info() if mcp_tool.cache else None,
+            "spatial_index": spatial_index_info()
         }
     except Exception as e:
         raise HTTPException(
@@ -3,8 +3,10 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Optional
+from ...models.schemas import TripPlan
 from ...tools.amap_tool import get_amap_service
 from ...services.unsplash_service import get_unsplash_service
+from ...services.limits import OverloadedError
 
 router = APIRouter(prefix="/poi", tags=["POI"])
 
@@ -36,7 +38,7 @@ async def get_poi_detail(poi_id: str):
         amap_service = get_amap_service()
         
         # 调用高德地图POI详情API
-        result = amap_service.get_poi_detail(poi_id)
+        result = await amap_service.get_poi_detail(poi_id)
         
         return POIDetailResponse(
             success=True,
@@ -44,6 +46,10 @@ async def get_poi_detail(poi_id: str):
             data=result
         )
         
+    except OverloadedError:
+        # 交由全局处理器返回 429
+        raise
+
     except Exception as e:
         print(f"❌ 获取POI详情失败: {str(e)}")
         raise HTTPException(
@@ -70,7 +76,7 @@ async def search_poi(keywords: str, city: str = "北京"):
     """
     try:
         amap_service = get_amap_service()
-        result = amap_service.search_poi(keywords, city)
+        result = await amap_service.search_poi(keywords, city)
 
         return {
             "success": True,
@@ -78,6 +84,10 @@ async def search_poi(keywords: str, city: str = "北京"):
             "data": result
         }
 
+    except OverloadedError:
+        # 交由全局处理器返回 429
+        raise
+
     except Exception as e:
         print(f"❌ 搜索POI失败: {str(e)}")
         raise HTTPException(
@@ -105,11 +115,7 @@ async def get_attraction_photo(name: str):
         unsplash_service = get_unsplash_service()
 
         # 搜索景点图片
-        photo_url = unsplash_service.get_photo_url(f"{name} China landmark")
-
-        if not photo_url:
-            # 如果没找到,尝试只用景点名称搜索
-            photo_url = unsplash_service.get_photo_url(name)
+        photo_url = await unsplash_service.get_attraction_photo(name)
 
         return {
             "success": True,
@@ -120,6 +126,10 @@ async def get_attraction_photo(name: str):
             }
         }
 
+    except OverloadedError:
+        # 交由全局处理器返回 429
+        raise
+
     except Exception as e:
         print(f"❌ 获取景点图片失败: {str(e)}")
         raise HTTPException(
@@ -127,3 +137,46 @@ async def get_attraction_photo(name: str):
             detail=f"获取景点图片失败: {str(e)}"
         )
 
+
+
+@router.post(
+    "/photos",
+    summary="批量获取景点图片",
+    description="并发获取旅行计划中所有景点的图片"
+)
+async def get_trip_photos(plan: TripPlan):
+    """
+    批量获取景点图片
+
+    Args:
+        plan: 旅行计划
+
+    Returns:
+        景点名称到图片URL的映射
+    """
+    try:
+        unsplash_service = get_unsplash_service()
+
+        names = [
+            attraction.name
+            for day in plan.days
+            for attraction in day.attractions
+        ]
+        photos = await unsplash_service.get_attraction_photos(names)
+
+        return {
+            "success": True,
+            "message": "获取图片成功",
+            "data": photos
+        }
+
+    except OverloadedError:
+        # 交由全局处理器返回 429
+        raise
+
+    except Exception as e:
+        print(f"❌ 批量获取景点图片失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"批量获取景点图片失败: {str(e)}"
+        )
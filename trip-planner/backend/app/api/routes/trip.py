@@ -1,15 +1,53 @@
 """旅行规划API路由"""
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Tuple, TypeVar
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from ...config import get_settings
 from ...models.schemas import (
     TripRequest,
     TripPlanResponse,
+    TripJobResponse,
     ErrorResponse
 )
-from ...workflow import get_trip_planner_workflow
+from ...services.job_queue import get_job_queue
+from ...services.limits import get_limiter, limiters_info, OverloadedError
+from ...workflow import get_trip_planner_workflow, run_trip_workflow, SPECIALIST_NODES
+from ...agents.parallel_planner import PLAN_PART_TAG, DAY_EVENT, WEATHER_EVENT
 
 router = APIRouter(prefix="/trip", tags=["旅行规划"])
 
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    """客户端在结果返回前断开连接"""
+
+
+async def _run_until_disconnected(http_request: Request, coro: Awaitable[T]) -> T:
+    """
+    执行协程, 客户端断开连接时取消执行
+
+    Raises:
+        ClientDisconnected: 客户端已断开
+    """
+    task = asyncio.ensure_future(coro)
+    interval = get_settings().disconnect_poll_interval
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
 
 @router.post(
     "/plan",
@@ -17,7 +55,7 @@ router = APIRouter(prefix="/trip", tags=["旅行规划"])
     summary="生成旅行计划",
     description="根据用户输入的旅行需求,生成详细的旅行计划"
 )
-async def plan_trip(request: TripRequest):
+async def plan_trip(request: TripRequest, http_request: Request):
     try:
         print(f"\n{'='*60}")
         print(f"📥 收到旅行规划请求:")
@@ -26,37 +64,27 @@ async def plan_trip(request: TripRequest):
         print(f"   天数: {request.travel_days}")
         print(f"{'='*60}\n")
 
-        # 1. 获取 LangGraph 工作流
-        print("🔄 获取旅行规划工作流...")
-        workflow = get_trip_planner_workflow()
-
-        # 2. 构造初始 State
-        initial_state = {
-            "messages": [],
-            "request": request,
-
-            "attraction_results": [],
-            "weather_results": [],
-            "hotel_results": [],
-
-            "final_plan": None,
-        }
-
-        # 3. 执行工作流
+        # 执行工作流(命中缓存时直接返回)
         print("🚀 开始执行旅行规划工作流...")
-        final_state = await workflow.ainvoke(initial_state)
+        trip_plan = await _run_until_disconnected(http_request, run_trip_workflow(request))
 
         print("✅ 工作流执行完成")
 
-        # 4. 从最终 State 中取结果
-        trip_plan = final_state.get("final_plan")
-
         return TripPlanResponse(
             success=True,
             message="旅行计划生成成功",
             data=trip_plan
         )
 
+    except ClientDisconnected:
+        print("⚠️  客户端已断开, 已取消旅行规划")
+        # 499: 客户端关闭请求(nginx约定), 客户端不会收到该响应
+        return Response(status_code=499)
+
+    except OverloadedError:
+        # 交由全局处理器返回 429
+        raise
+
     except Exception as e:
         print(f"❌ 生成旅行计划失败: {str(e)}")
         import traceback
@@ -67,6 +95,175 @@ async def plan_trip(request: TripRequest):
         )
 
 
+def _sse(event: str, data: Any) -> str:
+    """编码一条 SSE 消息"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def _workflow_events(request: TripRequest) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    执行工作流, 依次产出 ("event", astream_events 事件), 最后产出 ("plan", TripPlan)
+
+    与 /plan 共用行程缓存、请求合并与工作流准入控制: 命中缓存或加入相同请求进行中的
+    执行时只产出最终结果。迭代被取消(客户端断开)时放弃等待, 没有其他调用方时执行随之取消
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.ensure_future(run_trip_workflow(request, on_event=events.put))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+
+    try:
+        while (event := await events.get()) is not None:
+            yield "event", event
+        yield "plan", task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def _plan_event_stream(request: TripRequest) -> AsyncIterator[str]:
+    """
+    以 SSE 事件流的形式执行工作流
+
+    事件类型:
+        start: 请求已受理
+        node: specialist 节点完成 (status 为 completed / failed)
+        token: planner 输出的增量文本(按天并行生成时不推送)
+        day / weather: 从 planner 输出中增量解析出的对象, 按天并行时每完成一天推送一次;
+            day 事件的 draft 为 true 时是后处理(坐标校验、路线优化、预算计算)之前的草稿,
+            以 plan 事件中的行程为准
+        budget: 由每日费用计算出的预算
+        plan: 完整的 TripPlan
+        error: 执行失败
+        done: 流结束
+
+    命中缓存或加入相同请求进行中的执行时不推送中间事件, 直接推送最终的每日行程与计划
+    """
+    yield _sse("start", {"city": request.city, "travel_days": request.travel_days})
+
+    try:
+        sent_days = set()
+
+        async for item_kind, item in _workflow_events(request):
+            if item_kind == "plan":
+                trip_plan = item
+                if trip_plan is None:
+                    continue
+                # 未以流式输出或未执行工作流时, 补发尚未推送的每日行程
+                for day in trip_plan.days:
+                    if day.day_index not in sent_days:
+                        yield _sse("day", {**day.model_dump(), "draft": False})
+                if trip_plan.budget is not None:
+                    yield _sse("budget", trip_plan.budget.model_dump())
+                yield _sse("plan", trip_plan.model_dump())
+                continue
+
+            event = item
+            kind = event["event"]
+            name = event.get("name")
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_chat_model_stream" and node == "generate_plan":
+                # 并行生成的多路输出相互交错, 不逐token推送
+                if PLAN_PART_TAG in event.get("tags", []):
+                    continue
+                content = event["data"]["chunk"].content
+                if content:
+                    yield _sse("token", {"content": content})
+
+            # planner 边生成边解析, 对象一旦闭合即校验并派发, 输出格式错误时节点立即失败;
+            # 预算以后处理计算的结果为准, 不推送模型输出的预算
+            elif kind == "on_custom_event" and name == DAY_EVENT:
+                sent_days.add(event["data"]["day_index"])
+                yield _sse("day", {**event["data"], "draft": True})
+
+            elif kind == "on_custom_event" and name == WEATHER_EVENT:
+                yield _sse("weather", event["data"])
+
+            elif kind == "on_chain_end" and name == node and name in SPECIALIST_NODES:
+                output = event["data"].get("output") or {}
+                errors = output.get("specialist_errors", [])
+                yield _sse("node", {
+                    "node": name,
+                    "status": "failed" if errors else "completed",
+                    "errors": errors,
+                })
+
+        yield _sse("done", {})
+
+    except asyncio.CancelledError:
+        # 客户端断开时 StreamingResponse 会取消生成器, 工作流随之取消
+        print("⚠️  客户端已断开, 已取消流式旅行规划")
+        raise
+
+    except OverloadedError as e:
+        yield _sse("error", {"message": str(e), "retry_after": e.retry_after})
+
+    except Exception as e:
+        print(f"❌ 流式生成旅行计划失败: {str(e)}")
+        yield _sse("error", {"message": f"生成旅行计划失败: {str(e)}"})
+
+
+@router.post(
+    "/plan/stream",
+    summary="流式生成旅行计划",
+    description="以SSE事件流的形式生成旅行计划,逐步推送节点完成、planner输出与每日行程"
+)
+async def plan_trip_stream(request: TripRequest):
+    print(f"📥 收到流式旅行规划请求: {request.city} {request.travel_days}天")
+
+    # 响应开始后无法再返回 429, 因此在建立事件流之前先检查是否还能受理
+    get_limiter("workflow").check()
+
+    return StreamingResponse(
+        _plan_event_stream(request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+@router.post(
+    "/jobs",
+    response_model=TripJobResponse,
+    status_code=202,
+    summary="提交旅行规划任务",
+    description="提交后立即返回任务ID, 由后台worker生成旅行计划, 通过 GET /trip/jobs/{job_id} 查询进度与结果"
+)
+async def submit_trip_job(request: TripRequest):
+    # 队列已满时抛出 OverloadedError, 由全局处理器返回 429
+    job = await get_job_queue().submit(request)
+    print(f"📥 已受理旅行规划任务 {job.id}: {request.city} {request.travel_days}天")
+
+    return TripJobResponse(
+        success=True,
+        message="任务已提交",
+        data=job
+    )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=TripJobResponse,
+    summary="查询旅行规划任务",
+    description="返回任务状态、已完成节点的输出以及最终的旅行计划"
+)
+async def get_trip_job(job_id: str):
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"任务不存在: {job_id}"
+        )
+
+    return TripJobResponse(
+        success=True,
+        message=f"任务状态: {job.status}",
+        data=job
+    )
+
 
 @router.get(
     "/health",
@@ -83,7 +280,9 @@ async def health_check():
         
         return {
             "status": "healthy",
-            "service": "trip-planner"
+            "service": "trip-planner",
+            "jobs": get_job_queue().info(),
+            "limits": limiters_info()
         }
     except Exception as e:
         raise HTTPException(
@@ -26,15 +26,93 @@ class Settings(BaseSettings):
 
     # 高德地图API配置
     amap_api_key: str = ""
+    amap_mcp_command: str = "uvx"  # 启动 amap-mcp-server 的命令(基准测试中替换为本地模拟服务)
+    amap_mcp_args: str = "amap-mcp-server"  # 命令参数, 按shell规则分割
+    amap_mcp_pool_size: int = 2  # amap-mcp-server 长连接会话数
+    amap_mcp_health_check_interval: float = 30.0  # 会话健康检查间隔(秒)
+    amap_poi_detail_concurrency: int = 4  # 每次POI搜索中同时查询详情(补全坐标)的数量
+
+    # 工具调用缓存配置
+    tool_cache_enabled: bool = True
+    tool_cache_max_entries: int = 10000  # 内存LRU容量
+    tool_cache_sqlite_path: str = ""  # 磁盘缓存文件路径, 为空时仅使用内存缓存
 
     # Unsplash API配置
     unsplash_access_key: str = ""
     unsplash_secret_key: str = ""
+    unsplash_max_concurrency: int = 4  # 同时进行的API请求数
+    unsplash_max_connections: int = 10  # HTTP连接池大小
+    photo_cache_ttl: float = 30 * 24 * 3600  # 图片缓存时间(秒)
+    photo_cache_negative_ttl: float = 24 * 3600  # 无结果关键词的缓存时间(秒)
+    photo_cache_max_entries: int = 5000
+    photo_cache_sqlite_path: str = "data/photo_cache.sqlite"  # 磁盘缓存文件路径, 为空时仅使用内存缓存
 
     # LLM配置 (从环境变量读取)
     openai_api_key: str = ""
     openai_base_url: str = "https://api.openai.com/v1"
     openai_model: str = "gpt-4"
+    llm_provider: str = ""  # openai / modelscope / ollama / vllm, 为空时使用通用配置
+    llm_max_concurrency: int = 8  # 每个provider同时进行的LLM调用数
+    llm_max_connections: int = 20  # 每个provider的HTTP连接池大小
+    llm_timeout: float = 120.0  # 单次LLM请求超时(秒)
+
+    # 工作流配置
+    specialist_mode: str = "direct"  # direct: 直接调用地图工具; llm: 由LLM决定工具调用
+    specialist_timeout: float = 60.0  # 单个specialist分支超时(秒)
+    specialist_failure_policy: str = "partial"  # partial: 失败分支留空继续; strict: 任一分支失败即终止
+    planner_context_token_budget: int = 1500  # 压缩后景点/天气/酒店信息的基础token预算
+    planner_context_tokens_per_day: int = 200  # 每个旅行日追加的token预算(约3个景点与1天天气)
+    planner_context_token_budget_max: int = 8000  # token预算上限
+    planner_mode: str = "auto"  # single: 一次生成全部行程; parallel: 骨架+按天并行生成; auto: 按天数选择
+    planner_parallel_min_days: int = 4  # auto 模式下达到该天数时按天并行生成
+    day_clustering_enabled: bool = True  # planner 之前按地理位置把候选景点分配到每一天
+    geocode_validation_enabled: bool = True  # 生成计划后按地址批量地理编码, 校正模型编写的坐标
+    geocode_concurrency: int = 8  # 批量地理编码的并发数
+    geocode_tolerance_km: float = 2.0  # 模型坐标与地理编码结果相差超过该距离时替换
+    geocode_timeout: float = 15.0  # 批量地理编码的总超时(秒)
+    disconnect_poll_interval: float = 0.5  # 检测客户端断开的间隔(秒), 断开后取消工作流
+
+    # 行程缓存配置
+    plan_cache_enabled: bool = True
+    plan_cache_ttl: float = 24 * 3600  # 缓存时间(秒)
+    plan_cache_max_entries: int = 1000
+    plan_cache_sqlite_path: str = ""  # 磁盘缓存文件路径, 为空时仅使用内存缓存
+    plan_cache_redate: bool = True  # 命中时将行程平移到新的开始日期; False时开始日期参与缓存键
+
+    # 后台任务配置
+    job_workers: int = 4  # 同时执行的规划任务数
+    job_queue_size: int = 100  # 排队任务上限, 超出时拒绝提交
+    job_store_backend: str = "memory"  # memory / sqlite
+    job_store_path: str = "data/jobs.sqlite"  # sqlite 后端的文件路径
+    job_ttl: float = 24 * 3600  # 已结束任务的保留时间(秒)
+    job_max_retries: int = 3  # 系统繁忙(429)时任务重新排队的次数上限
+    job_heartbeat_interval: float = 30.0  # sqlite 后端刷新未完成任务心跳的间隔(秒), 超过3个间隔未刷新视为失效
+
+    # 准入控制配置: 每个上游的并发数、排队上限、排队超时(秒)与速率限制(次/秒, 0表示不限)
+    # 排队已满或超时时返回 429 及 Retry-After
+    workflow_max_concurrency: int = 16
+    workflow_max_queue: int = 64
+    workflow_queue_timeout: float = 30.0
+    workflow_rate_limit: float = 0
+    workflow_rate_burst: int = 1
+    llm_max_queue: int = 128
+    llm_queue_timeout: float = 60.0
+    llm_rate_limit: float = 0
+    llm_rate_burst: int = 1
+    amap_max_concurrency: int = 8
+    amap_max_queue: int = 256
+    amap_queue_timeout: float = 15.0
+    amap_rate_limit: float = 0
+    amap_rate_burst: int = 1
+    unsplash_max_queue: int = 64
+    unsplash_queue_timeout: float = 10.0
+    unsplash_rate_limit: float = 0
+    unsplash_rate_burst: int = 1
+
+    # 观测配置
+    metrics_enabled: bool = True  # 通过 /metrics 导出 Prometheus 指标(需安装 prometheus-client)
+    otel_enabled: bool = False  # 通过 OTLP 导出链路追踪(需安装 opentelemetry-sdk), 地址读取 OTEL_* 环境变量
+    otel_service_name: str = "trip-planner"
 
     # 日志配置
     log_level: str = "INFO"
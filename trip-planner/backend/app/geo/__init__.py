@@ -0,0 +1,6 @@
+"""地理计算: 距离矩阵、路线优化、空间聚类与POI空间索引"""
+
+from .distance import to_radians, haversine_matrix, distance_matrix, haversine_km
+from .route import order_stops, optimize_routes
+from .cluster import balanced_clusters
+from .index import SpatialIndex, get_spatial_index, find_spatial_index, spatial_index_info
@@ -0,0 +1,107 @@
+"""带容量约束的空间聚类
+
+把候选地点划分为 k 个地理上紧凑的簇, 每个簇的权重(游览时长)之和尽量均衡。
+算法为 k-means 的变体: 最远点初始化, 按"遗憾值"依次把点分配给仍有容量的最近中心。
+"""
+
+from typing import List
+
+import numpy as np
+
+from .distance import haversine_matrix
+
+# 每个簇的容量 = 平均权重 × (1 + BALANCE_SLACK)
+BALANCE_SLACK = 0.2
+
+
+def _seed_centers(points: np.ndarray, k: int) -> np.ndarray:
+    """最远点初始化: 结果确定, 且初始中心分散"""
+    centroid = points.mean(axis=0, keepdims=True)
+    chosen = [int(np.argmax(haversine_matrix(points, centroid)[:, 0]))]
+    nearest = haversine_matrix(points, points[chosen])[:, 0]
+    while len(chosen) < k:
+        index = int(np.argmax(nearest))
+        chosen.append(index)
+        nearest = np.minimum(nearest, haversine_matrix(points, points[[index]])[:, 0])
+    return points[chosen].copy()
+
+
+def _assign(distances: np.ndarray, weights: np.ndarray, capacity: float) -> np.ndarray:
+    """按遗憾值(次近与最近中心的距离差)从大到小, 把点分给仍有容量的最近中心"""
+    n, k = distances.shape
+    ranked = np.sort(distances, axis=1)
+    regret = ranked[:, 1] - ranked[:, 0] if k > 1 else np.zeros(n)
+
+    labels = np.full(n, -1)
+    load = np.zeros(k)
+    for i in np.argsort(-regret, kind="stable"):
+        for c in np.argsort(distances[i], kind="stable"):
+            if load[c] == 0 or load[c] + weights[i] <= capacity:
+                break
+        else:
+            c = int(np.argmin(load))
+        labels[i] = c
+        load[c] += weights[i]
+    return labels
+
+
+def _fill_empty(labels: np.ndarray, distances: np.ndarray, k: int) -> np.ndarray:
+    """
+    补齐空簇: 从点数多于一个的簇中移入离空簇中心最近的点
+
+    重复坐标或初始中心重合时可能有簇分不到点, 点数不少于簇数时保证每个簇至少一个点
+    """
+    counts = np.bincount(labels, minlength=k)
+    for c in np.flatnonzero(counts == 0):
+        donors = np.flatnonzero(counts[labels] > 1)
+        i = donors[np.argmin(distances[donors, c])]
+        counts[labels[i]] -= 1
+        labels[i] = c
+        counts[c] += 1
+    return labels
+
+
+def balanced_clusters(
+        points: np.ndarray,
+        weights: np.ndarray,
+        k: int,
+        iterations: int = 20,
+    ) -> List[List[int]]:
+    """
+    容量均衡的空间聚类
+
+    Args:
+        points: (n, 2) 弧度坐标
+        weights: (n,) 每个点的权重(如游览时长)
+        k: 簇的数量
+        iterations: 最大迭代次数
+
+    Returns:
+        k 个簇的下标列表, 按簇中心经度从西到东排列; 点数不少于 k 时每个簇都不为空
+    """
+    n = len(points)
+    if n == 0 or k <= 0:
+        return [[] for _ in range(max(k, 0))]
+
+    k_eff = min(k, n)
+    capacity = weights.sum() / k_eff * (1 + BALANCE_SLACK)
+    centers = _seed_centers(points, k_eff)
+
+    labels = None
+    for _ in range(iterations):
+        new_labels = _assign(haversine_matrix(points, centers), weights, capacity)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k_eff):
+            members = points[labels == c]
+            if len(members):
+                centers[c] = members.mean(axis=0)
+
+    labels = _fill_empty(labels, haversine_matrix(points, centers), k_eff)
+    for c in range(k_eff):
+        centers[c] = points[labels == c].mean(axis=0)
+
+    order = np.argsort(centers[:, 1], kind="stable")
+    clusters = [np.flatnonzero(labels == c).tolist() for c in order]
+    return clusters + [[] for _ in range(k - k_eff)]
@@ -0,0 +1,52 @@
+"""向量化的球面距离计算"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..models.schemas import Location
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def to_radians(locations: Sequence[Location]) -> np.ndarray:
+    """
+    将坐标转换为弧度数组
+
+    Returns:
+        形状为 (n, 2) 的数组, 列依次为纬度、经度
+    """
+    if not locations:
+        return np.empty((0, 2))
+    return np.radians(np.array([[loc.latitude, loc.longitude] for loc in locations], dtype=float))
+
+
+def haversine_matrix(a: np.ndarray, b: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    计算两组点之间的球面距离矩阵(公里)
+
+    Args:
+        a: (n, 2) 弧度坐标
+        b: (m, 2) 弧度坐标, 默认与 a 相同
+
+    Returns:
+        (n, m) 距离矩阵
+    """
+    if b is None:
+        b = a
+    lat1, lng1 = a[:, 0:1], a[:, 1:2]
+    lat2, lng2 = b[:, 0], b[:, 1]
+
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def distance_matrix(locations: Sequence[Location]) -> np.ndarray:
+    """一组地点两两之间的距离矩阵(公里)"""
+    points = to_radians(locations)
+    return haversine_matrix(points)
+
+
+def haversine_km(a: Location, b: Location) -> float:
+    """两点间的球面距离(公里)"""
+    return float(haversine_matrix(to_radians([a]), to_radians([b]))[0, 0])
@@ -0,0 +1,208 @@
+"""按城市划分的POI空间索引
+
+每个城市一个网格索引: 坐标存放在数组中, 网格单元(约1公里)记录落在其中的POI下标。
+半径查询只计算覆盖范围内单元的候选点, k近邻查询按环逐层向外扩展,
+距离均以向量化的方式计算。索引由 AmapService.search_poi 的结果填充。
+"""
+
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.schemas import POIInfo
+from .distance import EARTH_RADIUS_KM, haversine_matrix
+
+# 网格单元大小(度), 约 1.1 公里
+CELL_DEGREES = 0.01
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# 最多保留的城市索引数, 超出时淘汰最久未使用的城市
+MAX_INDEXES = 64
+
+
+class SpatialIndex:
+    """单个城市的POI网格索引"""
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._pois: List[POIInfo] = []
+        self._ids: Dict[str, int] = {}
+        self._coords: List[Tuple[float, float]] = []
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._array: Optional[np.ndarray] = None
+        # 已有单元的行列范围, 用于限定 k 近邻的扩展圈数
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._pois)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def _points(self) -> np.ndarray:
+        """弧度坐标数组, 新增POI后在下次查询时重建"""
+        if self._array is None:
+            self._array = np.radians(np.array(self._coords, dtype=float).reshape(-1, 2))
+        return self._array
+
+    def add(self, poi: POIInfo):
+        """加入POI, 已存在的POI(按ID)只更新信息"""
+        key = poi.id or f"{poi.name}@{poi.location.longitude},{poi.location.latitude}"
+        index = self._ids.get(key)
+        if index is not None:
+            self._pois[index] = poi
+            return
+
+        index = len(self._pois)
+        lat, lng = poi.location.latitude, poi.location.longitude
+        self._ids[key] = index
+        self._pois.append(poi)
+        self._coords.append((lat, lng))
+        row, col = self._cell(lat, lng)
+        self._cells.setdefault((row, col), []).append(index)
+        self._array = None
+
+        if self._bounds is None:
+            self._bounds = (row, row, col, col)
+        else:
+            min_row, max_row, min_col, max_col = self._bounds
+            self._bounds = (min(min_row, row), max(max_row, row), min(min_col, col), max(max_col, col))
+
+    def add_many(self, pois: List[POIInfo]):
+        for poi in pois:
+            self.add(poi)
+
+    def _ring(self, center: Tuple[int, int], radius: int) -> List[int]:
+        """与中心单元的切比雪夫距离恰为 radius 的单元中的POI"""
+        row, col = center
+        if radius == 0:
+            return list(self._cells.get(center, ()))
+
+        # 上下两行完整遍历, 左右两列去掉角上已遍历的单元
+        cells = [(row + dr, col + dc) for dr in (-radius, radius) for dc in range(-radius, radius + 1)]
+        cells += [(row + dr, col + dc) for dc in (-radius, radius) for dr in range(-radius + 1, radius)]
+
+        indices: List[int] = []
+        for cell in cells:
+            indices.extend(self._cells.get(cell, ()))
+        return indices
+
+    def _distances(self, latitude: float, longitude: float, indices: List[int]) -> np.ndarray:
+        """查询点到候选POI的距离(公里)"""
+        query = np.radians([[latitude, longitude]])
+        return haversine_matrix(query, self._points()[indices])[0]
+
+    def _cell_km(self, latitude: float) -> float:
+        """单元在经度方向(较窄的一边)的宽度"""
+        return self.cell_degrees * KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6)
+
+    def within(
+            self,
+            latitude: float,
+            longitude: float,
+            radius_km: float,
+            limit: Optional[int] = None,
+        ) -> List[Tuple[POIInfo, float]]:
+        """
+        半径查询
+
+        Returns:
+            (POI, 距离公里) 列表, 按距离升序
+        """
+        if not self._pois:
+            return []
+
+        rings = math.ceil(radius_km / self._cell_km(latitude))
+        if (2 * rings + 1) ** 2 > 4 * len(self._cells):
+            # 覆盖的单元远多于已有单元时(大半径、高纬度)直接计算全部距离
+            indices = list(range(len(self._pois)))
+        else:
+            center = self._cell(latitude, longitude)
+            indices = [i for r in range(rings + 1) for i in self._ring(center, r)]
+        if not indices:
+            return []
+
+        distances = self._distances(latitude, longitude, indices)
+        order = np.argsort(distances, kind="stable")
+        order = order[distances[order] <= radius_km][:limit]
+        return [(self._pois[indices[i]], float(distances[i])) for i in order]
+
+    def nearest(self, latitude: float, longitude: float, k: int = 10) -> List[Tuple[POIInfo, float]]:
+        """
+        k 近邻查询: 逐环扩展, 直到第 k 近的距离落在已覆盖的范围内
+
+        Returns:
+            (POI, 距离公里) 列表, 按距离升序
+        """
+        if not self._pois or k <= 0:
+            return []
+
+        center = self._cell(latitude, longitude)
+        min_row, max_row, min_col, max_col = self._bounds
+        max_ring = max(
+            abs(center[0] - min_row), abs(center[0] - max_row),
+            abs(center[1] - min_col), abs(center[1] - max_col),
+        )
+        cell_km = self._cell_km(latitude)
+
+        indices: List[int] = []
+        distances = np.empty(0)
+        for radius in range(max_ring + 1):
+            # 查询点远离已有数据时逐环扫描的空单元过多, 直接计算全部距离
+            if (2 * radius + 1) ** 2 > 4 * len(self._cells):
+                indices = list(range(len(self._pois)))
+                distances = self._distances(latitude, longitude, indices)
+                break
+
+            ring = self._ring(center, radius)
+            if ring:
+                indices.extend(ring)
+                distances = np.concatenate([distances, self._distances(latitude, longitude, ring)])
+            # 第 radius 环之内的单元完整覆盖了半径 radius × 单元宽度 的圆
+            if len(indices) >= k and np.partition(distances, k - 1)[k - 1] <= radius * cell_km:
+                break
+
+        order = np.argsort(distances, kind="stable")[:k]
+        return [(self._pois[indices[i]], float(distances[i])) for i in order]
+
+
+# 城市 -> 空间索引, 按最近使用排序
+_indexes: "OrderedDict[str, SpatialIndex]" = OrderedDict()
+
+
+def normalize_city(city: str) -> str:
+    """城市名规范化: "北京市" 与 "北京" 使用同一个索引"""
+    city = city.strip()
+    if len(city) > 2 and city.endswith("市"):
+        city = city[:-1]
+    return city
+
+
+def get_spatial_index(city: str) -> SpatialIndex:
+    """获取城市的空间索引(不存在时创建, 超出 MAX_INDEXES 时淘汰最久未使用的城市)"""
+    key = normalize_city(city)
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = SpatialIndex()
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    else:
+        _indexes.move_to_end(key)
+    return index
+
+
+def find_spatial_index(city: str) -> Optional[SpatialIndex]:
+    """获取城市已有的空间索引, 不存在时返回 None(不创建)"""
+    key = normalize_city(city)
+    index = _indexes.get(key)
+    if index is not None:
+        _indexes.move_to_end(key)
+    return index
+
+
+def spatial_index_info() -> Dict[str, int]:
+    """各城市索引中的POI数量"""
+    return {city: len(index) for city, index in _indexes.items()}
@@ -0,0 +1,142 @@
+"""每日游览顺序优化
+
+对每天的景点求解小规模 TSP: 最近邻构造初始路线, 再用 2-opt 消除交叉。
+有酒店坐标时路线从酒店出发并返回酒店, 否则为开放路线。
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.schemas import TripPlan, Location
+from .distance import distance_matrix
+
+
+def _edge(dist: np.ndarray, u: Optional[int], v: Optional[int]) -> float:
+    """开放路线的端点之外没有边"""
+    if u is None or v is None:
+        return 0.0
+    return float(dist[u, v])
+
+
+def route_length(tour: Sequence[int], dist: np.ndarray) -> float:
+    """路线总长度"""
+    return float(sum(dist[u, v] for u, v in zip(tour, tour[1:])))
+
+
+def nearest_neighbor(dist: np.ndarray, start: int, nodes: Sequence[int]) -> List[int]:
+    """从 start 出发, 每次前往最近的未访问节点"""
+    tour = [start]
+    remaining = [node for node in nodes if node != start]
+    while remaining:
+        current = tour[-1]
+        nearest = min(remaining, key=lambda node: dist[current, node])
+        tour.append(nearest)
+        remaining.remove(nearest)
+    return tour
+
+
+def two_opt(tour: Sequence[int], dist: np.ndarray, fixed_ends: bool) -> List[int]:
+    """
+    2-opt 局部优化: 反转区间使路线变短, 直到无法改进
+
+    Args:
+        tour: 初始路线
+        dist: 距离矩阵
+        fixed_ends: 首尾节点(酒店)是否固定
+    """
+    tour = list(tour)
+    n = len(tour)
+    lo, hi = (1, n - 1) if fixed_ends else (0, n)
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(lo, hi - 1):
+            for j in range(i + 1, hi):
+                before = tour[i - 1] if i > 0 else None
+                after = tour[j + 1] if j + 1 < n else None
+                delta = (
+                    _edge(dist, before, tour[j]) + _edge(dist, tour[i], after)
+                    - _edge(dist, before, tour[i]) - _edge(dist, tour[j], after)
+                )
+                if delta < -1e-9:
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    improved = True
+    return tour
+
+
+def order_stops(dist: np.ndarray, depot: Optional[int] = None) -> List[int]:
+    """
+    求解游览顺序
+
+    Args:
+        dist: (n, n) 距离矩阵
+        depot: 起终点(酒店)的下标, 为 None 时求开放路线
+
+    Returns:
+        不含 depot 的节点访问顺序
+    """
+    nodes = [node for node in range(len(dist)) if node != depot]
+    if len(nodes) <= 1:
+        return nodes
+
+    if depot is not None:
+        tour = nearest_neighbor(dist, depot, nodes) + [depot]
+        return two_opt(tour, dist, fixed_ends=True)[1:-1]
+
+    # 开放路线: 尝试每个起点, 取最短的初始路线
+    tour = min(
+        (nearest_neighbor(dist, start, nodes) for start in nodes),
+        key=lambda candidate: route_length(candidate, dist),
+    )
+    return two_opt(tour, dist, fixed_ends=False)
+
+
+def optimize_routes(plan: TripPlan) -> Tuple[float, float]:
+    """
+    就地重排每天的景点顺序
+
+    整个计划的地点只计算一次距离矩阵, 每天取其子矩阵求解。
+
+    Returns:
+        (优化前, 优化后) 的总路程(公里, 直线距离)
+    """
+    locations: List[Location] = []
+    day_nodes: List[Tuple[Optional[int], List[int]]] = []
+    for day in plan.days:
+        hotel = None
+        if day.hotel and day.hotel.location:
+            hotel = len(locations)
+            locations.append(day.hotel.location)
+        attractions = list(range(len(locations), len(locations) + len(day.attractions)))
+        locations.extend(a.location for a in day.attractions)
+        day_nodes.append((hotel, attractions))
+
+    if not locations:
+        return 0.0, 0.0
+    dist = distance_matrix(locations)
+
+    before = after = 0.0
+    for day, (hotel, attractions) in zip(plan.days, day_nodes):
+        nodes = ([hotel] if hotel is not None else []) + attractions
+        sub = dist[np.ix_(nodes, nodes)]
+        depot = 0 if hotel is not None else None
+        offset = 1 if hotel is not None else 0
+
+        current = list(range(offset, len(nodes)))
+        order = order_stops(sub, depot)
+
+        ends = [depot] if depot is not None else []
+        current_length = route_length([*ends, *current, *ends], sub)
+        order_length = route_length([*ends, *order, *ends], sub)
+
+        # 启发式结果不一定优于原顺序, 只在变短时替换
+        before += current_length
+        if order_length < current_length:
+            day.attractions = [day.attractions[node - offset] for node in order]
+            after += order_length
+        else:
+            after += current_length
+
+    return before, after
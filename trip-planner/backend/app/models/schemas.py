@@ -1,6 +1,6 @@
 """数据模型定义"""
 
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel, Field, field_validator
 from datetime import date
 
@@ -17,6 +17,16 @@ class TripRequest(BaseModel):
     accommodation: str = Field(..., description="住宿偏好", example="经济型酒店")
     preferences: List[str] = Field(default=[], description="旅行偏好标签", example=["历史文化", "美食"])
     free_text_input: Optional[str] = Field(default="", description="额外要求", example="希望多安排一些博物馆")
+
+    @field_validator('start_date', 'end_date')
+    @classmethod
+    def validate_date(cls, v):
+        """日期必须为 YYYY-MM-DD 格式"""
+        try:
+            date.fromisoformat(v)
+        except ValueError:
+            raise ValueError(f"日期格式应为 YYYY-MM-DD: {v}")
+        return v
     
     class Config:
         json_schema_extra = {
@@ -57,6 +67,12 @@ class Location(BaseModel):
     latitude: float = Field(..., description="纬度")
 
 
+class GeocodeResult(BaseModel):
+    """地理编码结果"""
+    location: Location = Field(..., description="经纬度坐标")
+    level: str = Field(default="", description="匹配级别, 如 兴趣点/门牌号/道路/区县")
+
+
 class Attraction(BaseModel):
     """景点信息"""
     name: str = Field(..., description="景点名称")
@@ -155,6 +171,7 @@ class TripPlan(BaseModel):
     weather_info: List[WeatherInfo] = Field(default=[], description="天气信息")
     overall_suggestions: str = Field(..., description="总体建议")
     budget: Optional[Budget] = Field(default=None, description="预算信息")
+    warnings: List[str] = Field(default=[], description="提示信息(如无法核实的坐标)")
 
 
 class TripPlanResponse(BaseModel):
@@ -172,6 +189,9 @@ class POIInfo(BaseModel):
     address: str = Field(..., description="地址")
     location: Location = Field(..., description="经纬度坐标")
     tel: Optional[str] = Field(default=None, description="电话")
+    rating: Optional[float] = Field(default=None, description="评分")
+    cost: Optional[float] = Field(default=None, description="人均消费(元)")
+    distance: Optional[float] = Field(default=None, description="距查询点的距离(米), 仅附近查询返回")
 
 
 class POISearchResponse(BaseModel):
@@ -196,6 +216,29 @@ class RouteResponse(BaseModel):
     data: Optional[RouteInfo] = Field(default=None, description="路线信息")
 
 
+# ============ 后台任务 ============
+
+class TripJob(BaseModel):
+    """旅行规划后台任务"""
+    id: str = Field(..., description="任务ID")
+    status: str = Field(default="queued", description="任务状态: queued / running / succeeded / failed")
+    request: TripRequest = Field(..., description="旅行规划请求")
+    created_at: float = Field(..., description="创建时间(时间戳)")
+    started_at: Optional[float] = Field(default=None, description="开始执行时间(时间戳)")
+    finished_at: Optional[float] = Field(default=None, description="结束时间(时间戳)")
+    node_outputs: Dict[str, Any] = Field(default={}, description="已完成节点的输出")
+    retries: int = Field(default=0, description="因系统繁忙重新排队的次数")
+    error: Optional[str] = Field(default=None, description="错误信息")
+    result: Optional[TripPlan] = Field(default=None, description="旅行计划")
+
+
+class TripJobResponse(BaseModel):
+    """旅行规划任务响应"""
+    success: bool = Field(..., description="是否成功")
+    message: str = Field(default="", description="消息")
+    data: Optional[TripJob] = Field(default=None, description="任务信息")
+
+
 # ============ 错误响应 ============
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,87 @@
+"""
+预热景点图片缓存
+
+用法:
+    python -m app.scripts.prewarm_photos                    # 预热所有内置城市
+    python -m app.scripts.prewarm_photos --city 北京 --top 10
+    python -m app.scripts.prewarm_photos --names 故宫 天坛
+    python -m app.scripts.prewarm_photos --file attractions.txt --delay 75
+
+结果写入 PHOTO_CACHE_SQLITE_PATH 指定的磁盘缓存, 服务进程启动后直接命中。
+Unsplash 演示 Key 限流为每小时50次, 可以用 --delay 控制请求间隔。
+"""
+
+import argparse
+import asyncio
+from typing import List
+
+from ..config import get_settings
+from ..services.unsplash_service import get_unsplash_service
+
+# 热门城市的热门景点
+TOP_ATTRACTIONS = {
+    "北京": ["故宫", "天安门广场", "八达岭长城", "颐和园", "天坛", "圆明园", "南锣鼓巷", "北海公园", "景山公园", "鸟巢"],
+    "上海": ["外滩", "东方明珠", "豫园", "南京路步行街", "田子坊", "上海迪士尼乐园", "城隍庙", "新天地", "上海博物馆", "陆家嘴"],
+    "成都": ["宽窄巷子", "锦里", "大熊猫繁育研究基地", "武侯祠", "杜甫草堂", "春熙路", "青城山", "都江堰", "文殊院", "人民公园"],
+    "西安": ["兵马俑", "大雁塔", "西安城墙", "回民街", "华清宫", "钟楼", "大唐不夜城", "陕西历史博物馆", "华山", "小雁塔"],
+    "杭州": ["西湖", "灵隐寺", "雷峰塔", "西溪湿地", "河坊街", "千岛湖", "断桥", "苏堤", "六和塔", "龙井村"],
+    "广州": ["广州塔", "沙面", "陈家祠", "白云山", "长隆野生动物世界", "北京路步行街", "越秀公园", "上下九步行街", "珠江夜游", "石室圣心大教堂"],
+    "重庆": ["洪崖洞", "解放碑", "磁器口古镇", "长江索道", "李子坝轻轨站", "武隆天生三桥", "朝天门", "南山一棵树", "重庆动物园", "鹅岭二厂"],
+}
+
+
+def _load_names(args: argparse.Namespace) -> List[str]:
+    names: List[str] = list(args.names or [])
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            names.extend(line.strip() for line in f if line.strip())
+
+    if not names:
+        cities = [args.city] if args.city else list(TOP_ATTRACTIONS)
+        for city in cities:
+            if city not in TOP_ATTRACTIONS:
+                raise SystemExit(f"没有内置 {city} 的景点列表, 请使用 --names 或 --file 指定")
+            names.extend(TOP_ATTRACTIONS[city][:args.top])
+
+    return list(dict.fromkeys(names))
+
+
+async def prewarm(names: List[str], delay: float):
+    service = get_unsplash_service()
+
+    try:
+        for index, name in enumerate(names, 1):
+            photo_url = await service.get_attraction_photo(name)
+            status = "✅" if photo_url else "➖"
+            print(f"{status} [{index}/{len(names)}] {name}")
+
+            if delay > 0 and index < len(names):
+                await asyncio.sleep(delay)
+
+        info = service.cache.info()
+        print(f"\n缓存命中 {info['hits']} 次, 请求API {info['misses']} 次, 写入 {info['sets']} 条")
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预热景点图片缓存")
+    parser.add_argument("--city", help="只预热指定城市的内置景点")
+    parser.add_argument("--top", type=int, default=10, help="每个城市预热的景点数量")
+    parser.add_argument("--names", nargs="*", help="要预热的景点名称")
+    parser.add_argument("--file", help="景点名称文件, 每行一个")
+    parser.add_argument("--delay", type=float, default=0.0, help="每个景点之间的等待时间(秒)")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if not settings.photo_cache_sqlite_path:
+        raise SystemExit("PHOTO_CACHE_SQLITE_PATH 未配置, 预热结果无法持久化")
+
+    names = _load_names(args)
+    print(f"🔥 预热 {len(names)} 个景点的图片 -> {settings.photo_cache_sqlite_path}\n")
+    asyncio.run(prewarm(names, args.delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
 # LLM.py
 import os
+import httpx
 from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Sequence, Tuple
+
+from ..config import get_settings
+from .limits import ConcurrencyLimiter, get_limiter
+from .telemetry import get_llm_callback
 
 # 加载 .env 文件中的环境变量
 load_dotenv()
@@ -88,3 +97,170 @@ class LLM:
             return None
 
 
+# 未通过 LLM_MODEL_ID 指定模型时使用的默认模型
+DEFAULT_MODEL = "Qwen/Qwen2.5-Coder-32B-Instruct"
+
+
+class LLMRegistry:
+    """
+    进程内共享的LLM客户端注册表
+
+    - 相同 provider/model/temperature 复用同一个 ChatOpenAI 实例
+    - 每个 provider 共享一组带连接池的 HTTP 客户端
+    - 缓存已绑定工具的 prompt | llm 链
+    - 按 provider 做准入控制(并发、排队与速率限制)
+    - 每次调用的耗时与token用量由观测回调记录
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple, BaseChatModel] = {}
+        self._chains: Dict[Tuple, Runnable] = {}
+        self._http_clients: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+        self._factory: Optional[Callable[..., BaseChatModel]] = None
+
+    def _resolve(self, provider: Optional[str]) -> Dict[str, Any]:
+        """解析 provider 对应的 base_url / api_key"""
+        provider = provider or get_settings().llm_provider
+        defaults = LLM.provider_defaults.get(provider, {})
+        env_key = defaults.get("env_key")
+
+        return {
+            "provider": provider or "default",
+            # 未配置时交给 ChatOpenAI 读取 OPENAI_BASE_URL / OPENAI_API_KEY
+            "base_url": os.getenv("LLM_BASE_URL") or defaults.get("base_url"),
+            "api_key": (os.getenv(env_key) if env_key else None) or os.getenv("LLM_API_KEY"),
+            "default_model": defaults.get("default_model"),
+        }
+
+    def _get_http_clients(self, provider: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        if provider not in self._http_clients:
+            settings = get_settings()
+            limits = httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_connections,
+            )
+            timeout = httpx.Timeout(settings.llm_timeout)
+            self._http_clients[provider] = (
+                httpx.Client(limits=limits, timeout=timeout),
+                httpx.AsyncClient(limits=limits, timeout=timeout),
+            )
+        return self._http_clients[provider]
+
+    def set_factory(self, factory: Optional[Callable[..., BaseChatModel]]):
+        """
+        替换模型构造函数(用于基准测试等离线场景)
+
+        factory 接收 model / temperature 关键字参数, 返回 BaseChatModel
+        """
+        self._factory = factory
+        self._models.clear()
+        self._chains.clear()
+
+    def get_chat_model(
+        self,
+        model: Optional[str] = None,
+        temperature: float = 0,
+        provider: Optional[str] = None,
+    ) -> BaseChatModel:
+        """
+        获取共享的聊天模型实例
+
+        Args:
+            model: 模型名称, 默认读取 LLM_MODEL_ID
+            temperature: 温度
+            provider: LLM provider, 默认读取配置中的 llm_provider
+
+        Returns:
+            BaseChatModel实例
+        """
+        resolved = self._resolve(provider)
+        model = model or os.getenv("LLM_MODEL_ID") or resolved["default_model"] or DEFAULT_MODEL
+        key = (resolved["provider"], model, temperature)
+
+        if key not in self._models:
+            if self._factory is not None:
+                chat_model = self._factory(model=model, temperature=temperature)
+            else:
+                http_client, http_async_client = self._get_http_clients(resolved["provider"])
+                chat_model = ChatOpenAI(
+                    model=model,
+                    temperature=temperature,
+                    api_key=resolved["api_key"],
+                    base_url=resolved["base_url"],
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                    # 流式输出时也返回token用量
+                    stream_usage=True,
+                )
+            chat_model.callbacks = [*(chat_model.callbacks or []), get_llm_callback()]
+            self._models[key] = chat_model
+
+        return self._models[key]
+
+    def get_tool_chain(
+        self,
+        system_prompt: str,
+        tools: Sequence[BaseTool],
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+    ) -> Runnable:
+        """
+        获取缓存的 prompt | llm.bind_tools(tools) 链
+
+        Args:
+            system_prompt: 系统提示词
+            tools: 绑定的工具
+            model: 模型名称
+            provider: LLM provider
+
+        Returns:
+            可直接 ainvoke({"input": ...}) 的链
+        """
+        key = (system_prompt, tuple(tool.name for tool in tools), model, provider)
+
+        if key not in self._chains:
+            llm = self.get_chat_model(model=model, temperature=0, provider=provider)
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_prompt),
+                ("human", "{input}")
+            ])
+            self._chains[key] = prompt | llm.bind_tools(tools)
+
+        return self._chains[key]
+
+    def limiter(self, provider: Optional[str] = None) -> ConcurrencyLimiter:
+        """provider 的准入控制"""
+        return get_limiter(f"llm:{self._resolve(provider)['provider']}")
+
+    def slot(self, provider: Optional[str] = None):
+        """
+        占用 provider 的一个调用名额, 排队已满或超时时抛出 OverloadedError
+
+        用法:
+            async with registry.slot():
+                await llm.ainvoke(...)
+        """
+        return self.limiter(provider).slot()
+
+    async def aclose(self):
+        """关闭所有HTTP连接池"""
+        for http_client, http_async_client in self._http_clients.values():
+            http_client.close()
+            await http_async_client.aclose()
+        self._http_clients.clear()
+        self._models.clear()
+        self._chains.clear()
+
+
+# 全局注册表实例
+_llm_registry = None
+
+
+def get_llm_registry() -> LLMRegistry:
+    """获取LLM客户端注册表(单例模式)"""
+    global _llm_registry
+
+    if _llm_registry is None:
+        _llm_registry = LLMRegistry()
+
+    return _llm_registry
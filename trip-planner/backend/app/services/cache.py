@@ -0,0 +1,227 @@
+"""通用缓存: 内存LRU + 可选SQLite磁盘层"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .telemetry import record_cache_lookup
+
+# 缓存未命中标记(缓存值本身可以是 None, 用于负缓存)
+MISSING = object()
+
+
+def make_cache_key(namespace: str, payload: Any) -> str:
+    """
+    生成内容寻址的缓存键
+
+    Args:
+        namespace: 命名空间(如工具名)
+        payload: 可JSON序列化的参数, 字典键会被排序以保证规范化
+
+    Returns:
+        形如 "namespace:sha256" 的缓存键
+    """
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class CacheStats:
+    """缓存命中统计"""
+
+    def __init__(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TTLCache:
+    """带过期时间的内存LRU缓存"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """读取缓存, 未命中或已过期返回 MISSING"""
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return MISSING
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        """写入缓存"""
+        self._data[key] = (time.time() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+
+class SQLiteCache:
+    """基于SQLite的磁盘缓存, 值以JSON存储"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Tuple[Any, float]:
+        """读取缓存及其过期时间, 未命中返回 (MISSING, 0)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return MISSING, 0.0
+
+            value, expires_at = row
+            if expires_at <= time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return MISSING, 0.0
+
+        return json.loads(value), expires_at
+
+    def set(self, key: str, value: Any, ttl: float):
+        """写入缓存"""
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + ttl),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """清理过期条目"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    两级缓存: 内存LRU在前, SQLite磁盘层在后(可选)
+
+    磁盘层命中的条目会按剩余TTL回填到内存层。
+    写入磁盘层的值必须可JSON序列化。
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024, sqlite_path: Optional[str] = None):
+        self.name = name
+        self.memory = TTLCache(max_entries)
+        self.disk = SQLiteCache(sqlite_path) if sqlite_path else None
+        self.stats = CacheStats()
+
+    async def get(self, key: str) -> Any:
+        """读取缓存, 未命中返回 MISSING"""
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self.stats.hits += 1
+            record_cache_lookup(self.name, True)
+            return value
+
+        if self.disk is not None:
+            value, expires_at = await asyncio.to_thread(self.disk.get, key)
+            if value is not MISSING:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                self.memory.set(key, value, expires_at - time.time())
+                record_cache_lookup(self.name, True)
+                return value
+
+        self.stats.misses += 1
+        record_cache_lookup(self.name, False)
+        return MISSING
+
+    async def set(self, key: str, value: Any, ttl: float):
+        """写入缓存"""
+        if ttl <= 0:
+            return
+
+        self.memory.set(key, value, ttl)
+        self.stats.sets += 1
+        self.stats.evictions = self.memory.evictions
+
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, value, ttl)
+            except (TypeError, ValueError, sqlite3.Error) as e:
+                print(f"⚠️  缓存[{self.name}]写入磁盘失败: {e}")
+
+    async def delete(self, key: str):
+        self.memory.delete(key)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.delete, key)
+
+    def info(self) -> Dict[str, Any]:
+        """缓存状态与命中统计"""
+        return {
+            "name": self.name,
+            "entries": len(self.memory),
+            "disk": self.disk.path if self.disk is not None else None,
+            **self.stats.to_dict(),
+        }
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
@@ -0,0 +1,398 @@
+"""旅行规划后台任务队列"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from ..config import get_settings
+from ..models.schemas import TripRequest, TripJob
+from .limits import OverloadedError
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+def _jsonable(value: Any) -> Any:
+    """将节点输出转换为可JSON序列化的结构"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+class InMemoryJobStore:
+    """进程内任务存储"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._jobs: Dict[str, TripJob] = {}
+
+    async def get(self, job_id: str) -> Optional[TripJob]:
+        return self._jobs.get(job_id)
+
+    async def save(self, job: TripJob):
+        self._jobs[job.id] = job
+        if job.status in FINISHED_STATUSES:
+            self._purge_expired()
+
+    def _purge_expired(self):
+        deadline = time.time() - self.ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at <= deadline
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def heartbeat(self):
+        """进程内存储随进程一起消失, 无需心跳"""
+
+    def close(self):
+        self._jobs.clear()
+
+
+class SQLiteJobStore:
+    """
+    基于SQLite的任务存储, 任务结果在进程重启后仍可查询
+
+    每个任务记录所属进程(主机名:pid), 所属进程定期刷新未完成任务的更新时间作为心跳。
+    所属进程已退出(同一 owner 重新启动)或心跳超过 stale_after 未刷新的未完成任务
+    标记为失败, 多个进程共用同一个数据库文件时不会误判其他进程仍在执行的任务。
+    """
+
+    def __init__(self, path: str, ttl: float, stale_after: float = 90.0):
+        self.path = path
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                "status TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "owner TEXT NOT NULL DEFAULT '')"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+            self._conn.commit()
+        # 同一 owner 的未完成任务来自已退出的上一个进程(pid 被复用)
+        self._mark_stale(include_own=True)
+
+    def _mark_stale(self, include_own: bool = False) -> int:
+        """将所属进程已失效的未完成任务标记为失败, 返回标记的任务数"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM jobs WHERE status NOT IN (?, ?) "
+                "AND ((owner = ? AND ?) OR (owner != ? AND updated_at <= ?))",
+                (*FINISHED_STATUSES, self.owner, include_own, self.owner, now - self.stale_after),
+            ).fetchall()
+            for (data,) in rows:
+                job = TripJob(**json.loads(data))
+                job.status = JOB_FAILED
+                job.error = "执行任务的服务已退出, 任务未完成"
+                job.finished_at = now
+                self._conn.execute(
+                    "UPDATE jobs SET data = ?, status = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(job.model_dump(), ensure_ascii=False), job.status, now, job.id),
+                )
+            self._conn.commit()
+
+        if rows:
+            print(f"⚠️  已将 {len(rows)} 个失效的未完成任务标记为失败")
+        return len(rows)
+
+    def _heartbeat(self):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE owner = ? AND status NOT IN (?, ?)",
+                (time.time(), self.owner, *FINISHED_STATUSES),
+            )
+            self._conn.commit()
+        self._mark_stale()
+
+    def _get(self, job_id: str) -> Optional[TripJob]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return TripJob(**json.loads(row[0])) if row else None
+
+    def _save(self, job: TripJob):
+        payload = json.dumps(job.model_dump(), ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, data, status, updated_at, owner) VALUES (?, ?, ?, ?, ?)",
+                (job.id, payload, job.status, now, self.owner),
+            )
+            if job.status in FINISHED_STATUSES:
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at <= ?",
+                    (*FINISHED_STATUSES, now - self.ttl),
+                )
+            self._conn.commit()
+
+    async def get(self, job_id: str) -> Optional[TripJob]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def save(self, job: TripJob):
+        await asyncio.to_thread(self._save, job)
+
+    async def heartbeat(self):
+        """刷新本进程未完成任务的心跳, 并标记其他进程遗留的失效任务"""
+        await asyncio.to_thread(self._heartbeat)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """
+    有界的旅行规划任务队列
+
+    - submit 立即返回任务, 队列已满时抛出 OverloadedError
+    - 固定数量的 worker 依次执行工作流, 每个节点完成后更新任务的部分结果
+    - 工作流与同步接口共用准入控制与请求合并; 系统繁忙时任务在 Retry-After 后重新排队
+    """
+
+    def __init__(
+            self,
+            store,
+            workers: int = 4,
+            max_size: int = 100,
+            max_retries: int = 3,
+            heartbeat_interval: float = 30.0,
+        ):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.heartbeat_interval = heartbeat_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_size))
+        self._tasks: List[asyncio.Task] = []
+        self._avg_duration = 30.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """启动 worker"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(index))
+            for index in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        print(f"✅ 任务队列已启动: {self.workers} 个worker, 队列上限 {self._queue.maxsize}")
+
+    async def stop(self):
+        """停止 worker, 正在执行的任务被取消, 仍在排队的任务标记为失败"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status = JOB_FAILED
+            job.error = "服务已关闭, 任务未执行"
+            job.finished_at = time.time()
+            await self.store.save(job)
+            self._queue.task_done()
+        self.store.close()
+
+    async def submit(self, request: TripRequest) -> TripJob:
+        """
+        提交旅行规划任务
+
+        Raises:
+            OverloadedError: 排队任务已达上限
+        """
+        job = TripJob(id=uuid.uuid4().hex, request=request, created_at=time.time())
+        # 先入队占住名额: 检查与入队之间没有 await, 并发提交不会超出上限
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise OverloadedError("jobs", self.retry_after())
+
+        await self.store.save(job)
+        return job
+
+    def retry_after(self) -> float:
+        """按最近任务的平均耗时估算队列腾出空位的时间(秒)"""
+        return self._avg_duration * self._queue.qsize() / self.workers
+
+    async def get(self, job_id: str) -> Optional[TripJob]:
+        """查询任务"""
+        return await self.store.get(job_id)
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                try:
+                    await self._run_job(job)
+                except OverloadedError as e:
+                    await self._requeue(job, e)
+            except asyncio.CancelledError:
+                job.status = JOB_FAILED
+                job.error = "任务已取消"
+                job.finished_at = time.time()
+                await asyncio.shield(self.store.save(job))
+                raise
+            except Exception as e:
+                print(f"❌ 任务 {job.id} 执行失败: {e}")
+                job.status = JOB_FAILED
+                job.error = str(e)
+                job.finished_at = time.time()
+                await self.store.save(job)
+            finally:
+                self._queue.task_done()
+
+    async def _requeue(self, job: TripJob, error: OverloadedError):
+        """系统繁忙: 等待 Retry-After 后重新排队, 超过重试次数或队列已满时标记为失败"""
+        if job.retries >= self.max_retries:
+            print(f"❌ 任务 {job.id} 因系统繁忙未能执行: {error}")
+            job.status = JOB_FAILED
+            job.error = f"系统繁忙, 请稍后重新提交: {error}"
+            job.finished_at = time.time()
+            await self.store.save(job)
+            return
+
+        delay = max(error.retry_after, 1.0)
+        job.retries += 1
+        job.status = JOB_QUEUED
+        job.started_at = None
+        job.node_outputs = {}
+        job.error = f"系统繁忙, {delay:.0f}秒后重试"
+        await self.store.save(job)
+        print(f"⏳ 任务 {job.id} 因系统繁忙将在 {delay:.0f}s 后重新排队(第{job.retries}次)")
+
+        await asyncio.sleep(delay)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            job.status = JOB_FAILED
+            job.error = f"系统繁忙, 请稍后重新提交: {error}"
+            job.finished_at = time.time()
+            await self.store.save(job)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.store.heartbeat()
+            except Exception as e:
+                print(f"⚠️  任务心跳刷新失败: {e}")
+
+    async def _run_job(self, job: TripJob):
+        # 延迟导入, 避免 services 与 workflow 之间的循环导入
+        from ..workflow import run_trip_workflow, SPECIALIST_NODES
+
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        job.error = None
+        await self.store.save(job)
+
+        async def on_event(event: Dict[str, Any]):
+            node = event.get("metadata", {}).get("langgraph_node")
+            if event["event"] != "on_chain_end" or event.get("name") != node:
+                return
+
+            output = event["data"].get("output")
+            output = output if isinstance(output, dict) else {}
+            if node in SPECIALIST_NODES:
+                errors = output.get("specialist_errors", [])
+                job.node_outputs = {
+                    **job.node_outputs,
+                    node: {
+                        "status": JOB_FAILED if errors else "completed",
+                        "errors": errors,
+                        "output": _jsonable({
+                            key: value for key, value in output.items()
+                            if key != "specialist_errors"
+                        }),
+                    },
+                }
+            elif "final_plan" in output:
+                job.node_outputs = {**job.node_outputs, node: {"status": "completed"}}
+            await self.store.save(job)
+
+        # 与同步接口共用缓存、请求合并与工作流准入控制;
+        # 加入其他请求进行中的执行时不会收到节点事件, 只得到最终结果
+        trip_plan = await run_trip_workflow(job.request, on_event=on_event)
+
+        if trip_plan is None:
+            raise RuntimeError("工作流未生成旅行计划")
+
+        job.result = trip_plan
+        job.status = JOB_SUCCEEDED
+        job.finished_at = time.time()
+        await self.store.save(job)
+        # 指数滑动平均, 用于估算 Retry-After
+        self._avg_duration = 0.8 * self._avg_duration + 0.2 * (job.finished_at - job.started_at)
+        print(f"✅ 任务 {job.id} 完成, 耗时 {job.finished_at - job.started_at:.1f}s")
+
+    def info(self) -> Dict[str, Any]:
+        """队列状态"""
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "max_size": self._queue.maxsize,
+            "running": self.running,
+        }
+
+
+# 全局任务队列实例
+_job_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """获取任务队列实例(单例模式)"""
+    global _job_queue
+
+    if _job_queue is None:
+        settings = get_settings()
+        if settings.job_store_backend == "sqlite":
+            store = SQLiteJobStore(
+                settings.job_store_path,
+                ttl=settings.job_ttl,
+                stale_after=3 * settings.job_heartbeat_interval,
+            )
+        else:
+            store = InMemoryJobStore(ttl=settings.job_ttl)
+        _job_queue = JobQueue(
+            store,
+            workers=settings.job_workers,
+            max_size=settings.job_queue_size,
+            max_retries=settings.job_max_retries,
+            heartbeat_interval=settings.job_heartbeat_interval,
+        )
+
+    return _job_queue
@@ -0,0 +1,175 @@
+"""准入控制: 按上游限制并发、排队与请求速率"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from ..config import get_settings
+
+
+class OverloadedError(RuntimeError):
+    """上游排队已满或等待超时, 请求被拒绝"""
+
+    def __init__(self, upstream: str, retry_after: float, reason: str = "排队已满"):
+        self.upstream = upstream
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"{upstream} 繁忙({reason}), 请 {self.retry_after} 秒后重试")
+
+
+class TokenBucket:
+    """
+    令牌桶限速
+
+    以 rate 个/秒的速度补充令牌, 最多积累 burst 个。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """
+        取一个令牌, 不足时等待
+
+        Raises:
+            OverloadedError: 需要等待的时间超过 timeout
+        """
+        self._refill()
+        # 预留令牌: 余额可以为负, 表示后续调用需要等待的时长
+        wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+        if timeout is not None and wait > timeout:
+            raise OverloadedError("rate_limit", wait, "超出请求速率")
+
+        self._tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class ConcurrencyLimiter:
+    """
+    单个上游的准入控制
+
+    - 最多 max_concurrency 个调用同时进行
+    - 最多 max_queue 个调用排队, 超出时立即拒绝
+    - 排队超过 queue_timeout 秒的调用被拒绝
+    - rate > 0 时额外按令牌桶限速
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int = 0,
+        queue_timeout: float = 30.0,
+        rate: float = 0,
+        burst: int = 1,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._active = 0
+        self._waiting = 0
+        self.rejected = 0
+
+    def _reject(self, reason: str) -> OverloadedError:
+        self.rejected += 1
+        return OverloadedError(self.name, self.queue_timeout, reason)
+
+    def check(self):
+        """
+        不占用名额地检查是否还能受理
+
+        Raises:
+            OverloadedError: 并发与排队均已满
+        """
+        if self._active + self._waiting >= self.max_concurrency + self.max_queue:
+            raise self._reject("排队已满")
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        占用一个并发名额
+
+        Raises:
+            OverloadedError: 排队已满或等待超时
+        """
+        self.check()
+
+        deadline = time.monotonic() + self.queue_timeout
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("等待超时") from None
+        finally:
+            self._waiting -= 1
+
+        self._active += 1
+        try:
+            if self.bucket is not None:
+                try:
+                    await self.bucket.acquire(timeout=max(0.0, deadline - time.monotonic()))
+                except OverloadedError as e:
+                    self.rejected += 1
+                    raise OverloadedError(self.name, e.retry_after, "超出请求速率") from None
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    def info(self) -> Dict[str, Any]:
+        """当前负载"""
+        return {
+            "name": self.name,
+            "active": self._active,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+
+# 全局限流器实例
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+
+def _limiter_settings(upstream: str) -> Dict[str, Any]:
+    settings = get_settings()
+    prefix = upstream.split(":", 1)[0]
+    return {
+        "max_concurrency": getattr(settings, f"{prefix}_max_concurrency"),
+        "max_queue": getattr(settings, f"{prefix}_max_queue"),
+        "queue_timeout": getattr(settings, f"{prefix}_queue_timeout"),
+        "rate": getattr(settings, f"{prefix}_rate_limit"),
+        "burst": getattr(settings, f"{prefix}_rate_burst"),
+    }
+
+
+def get_limiter(upstream: str) -> ConcurrencyLimiter:
+    """
+    获取上游的限流器(单例模式)
+
+    Args:
+        upstream: workflow / llm / amap / unsplash, 可带后缀区分同类上游(如 "llm:openai"),
+            参数读取前缀对应的 {prefix}_max_concurrency 等配置
+    """
+    if upstream not in _limiters:
+        _limiters[upstream] = ConcurrencyLimiter(upstream, **_limiter_settings(upstream))
+    return _limiters[upstream]
+
+
+def limiters_info() -> Dict[str, Dict[str, Any]]:
+    """所有限流器的当前负载"""
+    return {name: limiter.info() for name, limiter in _limiters.items()}
@@ -0,0 +1,143 @@
+"""旅行计划缓存"""
+
+import re
+import unicodedata
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from ..config import get_settings
+from ..models.schemas import TripRequest, TripPlan
+from .cache import TieredCache, MISSING, make_cache_key
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    """规范化自由文本: 全半角统一、小写、合并空白、去掉首尾标点"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" .,;!?。，；！？、")
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_trip_request(request: TripRequest, include_start_date: bool = False) -> Dict[str, Any]:
+    """
+    将旅行请求规范化为缓存键的组成部分
+
+    日期只保留相对开始日期的跨度, 因此同一行程在不同日期出发时可以复用,
+    include_start_date 为 True 时开始日期也参与缓存键。
+    """
+    city = _normalize_text(request.city)
+    if len(city) > 2 and city.endswith("市"):
+        city = city[:-1]
+
+    start = _parse_date(request.start_date)
+    end = _parse_date(request.end_date)
+    span = (end - start).days if start and end else f"{request.start_date}~{request.end_date}"
+
+    normalized = {
+        "city": city,
+        "travel_days": request.travel_days,
+        "span": span,
+        "transportation": _normalize_text(request.transportation),
+        "accommodation": _normalize_text(request.accommodation),
+        "preferences": sorted({_normalize_text(p) for p in request.preferences if _normalize_text(p)}),
+        "free_text_input": _normalize_text(request.free_text_input),
+    }
+    if include_start_date:
+        normalized["start_date"] = request.start_date
+    return normalized
+
+
+def _shift(value: str, delta: timedelta) -> str:
+    parsed = _parse_date(value)
+    return (parsed + delta).isoformat() if parsed else value
+
+
+def redate_trip_plan(plan: TripPlan, start_date: str) -> TripPlan:
+    """
+    将行程平移到新的开始日期
+
+    天气与具体日期绑定, 平移后不再有效, 因此会被清空。
+    """
+    old_start = _parse_date(plan.start_date)
+    new_start = _parse_date(start_date)
+    if old_start is None or new_start is None or old_start == new_start:
+        return plan
+
+    delta = new_start - old_start
+    redated = plan.model_copy(deep=True)
+    redated.start_date = _shift(plan.start_date, delta)
+    redated.end_date = _shift(plan.end_date, delta)
+    for day in redated.days:
+        day.date = _shift(day.date, delta)
+    redated.weather_info = []
+    return redated
+
+
+class PlanCache:
+    """基于规范化 TripRequest 的行程缓存"""
+
+    def __init__(self, cache: TieredCache, ttl: float, redate: bool = True):
+        """
+        Args:
+            cache: 底层缓存
+            ttl: 缓存时间(秒)
+            redate: 命中时是否把缓存的行程平移到新的开始日期,
+                为 False 时开始日期参与缓存键
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.redate = redate
+
+    def key_for(self, request: TripRequest) -> str:
+        """请求对应的缓存键"""
+        normalized = normalize_trip_request(request, include_start_date=not self.redate)
+        return make_cache_key("trip_plan", normalized)
+
+    async def get(self, request: TripRequest) -> Optional[TripPlan]:
+        """查找缓存的行程"""
+        data = await self.cache.get(self.key_for(request))
+        if data is MISSING:
+            return None
+
+        plan = TripPlan(**data)
+        if self.redate:
+            plan = redate_trip_plan(plan, request.start_date)
+        return plan
+
+    async def set(self, request: TripRequest, plan: TripPlan):
+        """缓存生成的行程"""
+        await self.cache.set(self.key_for(request), plan.model_dump(), self.ttl)
+
+
+# 全局缓存实例
+_plan_cache = None
+
+
+def get_plan_cache() -> Optional[PlanCache]:
+    """获取行程缓存实例(单例模式), 未启用时返回 None"""
+    global _plan_cache
+
+    settings = get_settings()
+    if not settings.plan_cache_enabled:
+        return None
+
+    if _plan_cache is None:
+        _plan_cache = PlanCache(
+            TieredCache(
+                "trip_plan",
+                max_entries=settings.plan_cache_max_entries,
+                sqlite_path=settings.plan_cache_sqlite_path or None,
+            ),
+            ttl=settings.plan_cache_ttl,
+            redate=settings.plan_cache_redate,
+        )
+
+    return _plan_cache
@@ -0,0 +1,78 @@
+"""并发请求合并(single-flight)"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    合并相同键的并发调用
+
+    同一时刻相同键只会执行一次 fn, 其余调用方等待并共享同一个结果(或异常)。
+    调用结束后键立即释放, 不会缓存结果。
+    所有调用方都已取消(如客户端断开)时, 进行中的执行也会被取消。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self.executions = 0
+        self.shared = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行或加入一个进行中的调用
+
+        Args:
+            key: 合并键
+            fn: 实际执行的协程工厂
+
+        Returns:
+            fn 的结果
+        """
+        future = self._inflight.get(key)
+
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            self._waiters[key] = 0
+            future.add_done_callback(lambda f: self._release(key, f))
+            self.executions += 1
+        else:
+            self.shared += 1
+
+        self._waiters[key] += 1
+        try:
+            # shield: 单个调用方取消不影响其他等待同一结果的调用方
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self._inflight.get(key) is future:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not future.done():
+                    # 最后一个调用方也离开了, 结果无人需要
+                    self.abandoned += 1
+                    future.cancel()
+            raise
+
+    def _release(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+            del self._waiters[key]
+
+        # 取出异常, 避免所有调用方都已离开时产生 "never retrieved" 警告
+        if not future.cancelled():
+            future.exception()
+
+    def info(self) -> Dict[str, Any]:
+        """合并统计"""
+        return {
+            "name": self.name,
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "shared": self.shared,
+            "abandoned": self.abandoned,
+        }
@@ -0,0 +1,278 @@
+"""性能观测: Prometheus 指标 + 可选的 OpenTelemetry 链路追踪
+
+两个依赖都是可选的, 未安装时对应功能自动关闭:
+    pip install prometheus-client
+    pip install opentelemetry-sdk opentelemetry-exporter-otlp
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from ..config import get_settings
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:
+    otel_trace = None
+
+
+# ============ 指标定义 ============
+
+# 秒级耗时分桶: MCP调用在毫秒级, planner 在数十秒级
+_LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+_SIZE_BUCKETS = (100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+
+_metrics: Dict[str, Any] = {}
+
+if prometheus_client is not None and get_settings().metrics_enabled:
+    _metrics = {
+        "node_duration": prometheus_client.Histogram(
+            "trip_node_duration_seconds", "工作流节点耗时",
+            ["node", "status"], buckets=_LATENCY_BUCKETS,
+        ),
+        "tool_duration": prometheus_client.Histogram(
+            "trip_tool_call_duration_seconds", "MCP工具调用耗时(含缓存命中)",
+            ["tool", "status", "cache"], buckets=_LATENCY_BUCKETS,
+        ),
+        "tool_payload": prometheus_client.Histogram(
+            "trip_tool_payload_bytes", "MCP工具参数与结果大小",
+            ["tool", "direction"], buckets=_SIZE_BUCKETS,
+        ),
+        "llm_duration": prometheus_client.Histogram(
+            "trip_llm_call_duration_seconds", "LLM调用耗时",
+            ["model", "status"], buckets=_LATENCY_BUCKETS,
+        ),
+        "llm_tokens": prometheus_client.Counter(
+            "trip_llm_tokens_total", "LLM消耗的token数",
+            ["model", "kind"],
+        ),
+        "cache_lookups": prometheus_client.Counter(
+            "trip_cache_lookups_total", "缓存查询次数",
+            ["cache", "result"],
+        ),
+    }
+
+
+def metrics_available() -> bool:
+    """Prometheus 指标是否启用"""
+    return bool(_metrics)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    以 Prometheus 文本格式导出指标
+
+    Returns:
+        (内容, Content-Type)
+    """
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def record_node(node: str, seconds: float, status: str):
+    if _metrics:
+        _metrics["node_duration"].labels(node, status).observe(seconds)
+
+
+def record_tool_call(
+        tool: str,
+        seconds: float,
+        status: str,
+        cache_hit: bool,
+        request_bytes: int = 0,
+        response_bytes: int = 0,
+    ):
+    if _metrics:
+        _metrics["tool_duration"].labels(tool, status, "hit" if cache_hit else "miss").observe(seconds)
+        _metrics["tool_payload"].labels(tool, "request").observe(request_bytes)
+        if response_bytes:
+            _metrics["tool_payload"].labels(tool, "response").observe(response_bytes)
+
+
+def record_llm_call(model: str, seconds: float, status: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+    if _metrics:
+        _metrics["llm_duration"].labels(model, status).observe(seconds)
+        if prompt_tokens:
+            _metrics["llm_tokens"].labels(model, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            _metrics["llm_tokens"].labels(model, "completion").inc(completion_tokens)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    if _metrics:
+        _metrics["cache_lookups"].labels(cache, "hit" if hit else "miss").inc()
+
+
+# ============ 链路追踪 ============
+
+_tracer = otel_trace.get_tracer("trip-planner") if otel_trace is not None else None
+
+
+def configure_tracing():
+    """
+    按配置启用 OpenTelemetry 导出(OTLP), 导出地址等参数读取标准的 OTEL_* 环境变量
+    """
+    global _tracer
+
+    settings = get_settings()
+    if not settings.otel_enabled:
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError as e:
+        print(f"⚠️  OpenTelemetry 未安装, 链路追踪未启用: {e}")
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.otel_service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    otel_trace.set_tracer_provider(provider)
+    _tracer = otel_trace.get_tracer("trip-planner")
+    print(f"✅ OpenTelemetry 链路追踪已启用: {settings.otel_service_name}")
+
+
+class Span:
+    """一次计时区间, 可附加属性"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    计时并(在启用时)创建 OpenTelemetry span
+
+    用法:
+        with span("mcp.tool", tool=tool_name) as s:
+            ...
+            s.set("cache_hit", True)
+    """
+    record = Span(name, attributes)
+    # start_as_current_span 使嵌套的节点/工具调用形成父子关系, 并自动记录异常
+    otel_context = _tracer.start_as_current_span(name) if _tracer is not None else nullcontext()
+
+    with otel_context as otel_span:
+        try:
+            yield record
+        except BaseException:
+            record.status = "error"
+            raise
+        finally:
+            record.duration = time.perf_counter() - record.started
+            if otel_span is not None:
+                for key, value in record.attributes.items():
+                    if isinstance(value, (str, bool, int, float)):
+                        otel_span.set_attribute(key, value)
+
+
+def traced_node(
+        name: str,
+        node: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    ) -> Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+    """
+    为工作流节点记录耗时
+
+    节点返回 specialist_errors 时状态记为 degraded
+    """
+
+    async def instrumented(state):
+        record: Optional[Span] = None
+        try:
+            with span(f"node.{name}", node=name) as record:
+                output = await node(state)
+                if output and output.get("specialist_errors"):
+                    record.status = "degraded"
+                    record.set("errors", len(output["specialist_errors"]))
+            return output
+        finally:
+            if record is not None:
+                record_node(name, record.duration, record.status)
+
+    instrumented.__name__ = getattr(node, "__name__", name)
+    return instrumented
+
+
+class LLMTelemetryCallback(AsyncCallbackHandler):
+    """记录每次LLM调用的耗时与token用量"""
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[float, str, Any]] = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        params = kwargs.get("invocation_params") or {}
+        metadata = kwargs.get("metadata") or {}
+        model = params.get("model") or params.get("model_name") or metadata.get("ls_model_name") or "unknown"
+        otel_span = None
+        if _tracer is not None:
+            otel_span = _tracer.start_span("llm.call", attributes={"model": model})
+        self._runs[run_id] = (time.perf_counter(), model, otel_span)
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        started, model, otel_span = self._runs.pop(run_id, (None, "unknown", None))
+        if started is None:
+            return
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        record_llm_call(model, time.perf_counter() - started, "ok", prompt_tokens, completion_tokens)
+        if otel_span is not None:
+            otel_span.set_attribute("prompt_tokens", prompt_tokens)
+            otel_span.set_attribute("completion_tokens", completion_tokens)
+            otel_span.end()
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        started, model, otel_span = self._runs.pop(run_id, (None, "unknown", None))
+        if started is None:
+            return
+
+        record_llm_call(model, time.perf_counter() - started, "error")
+        if otel_span is not None:
+            otel_span.record_exception(error)
+            otel_span.set_status(Status(StatusCode.ERROR, str(error)))
+            otel_span.end()
+
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    """取出 (prompt_tokens, completion_tokens), 兼容流式与非流式返回"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+# 全局回调实例
+_llm_callback = None
+
+
+def get_llm_callback() -> LLMTelemetryCallback:
+    """获取LLM观测回调(单例模式)"""
+    global _llm_callback
+
+    if _llm_callback is None:
+        _llm_callback = LLMTelemetryCallback()
+
+    return _llm_callback
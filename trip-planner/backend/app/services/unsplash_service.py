@@ -1,8 +1,12 @@
 """Unsplash图片服务"""
 
-import requests
-from typing import List, Optional
+import asyncio
+import httpx
+from typing import Dict, Iterable, List, Optional
 from ..config import get_settings
+from .cache import TieredCache, MISSING, make_cache_key
+from .singleflight import SingleFlight
+from .limits import get_limiter, OverloadedError
 
 class UnsplashService:
     """Unsplash图片服务类"""
@@ -12,8 +16,61 @@ class UnsplashService:
         settings = get_settings()
         self.access_key = settings.unsplash_access_key
         self.base_url = "https://api.unsplash.com"
+        self.max_connections = settings.unsplash_max_connections
+        self.flight = SingleFlight("unsplash")
+        self.cache_ttl = settings.photo_cache_ttl
+        self.negative_ttl = settings.photo_cache_negative_ttl
+        self.cache = TieredCache(
+            "unsplash",
+            max_entries=settings.photo_cache_max_entries,
+            sqlite_path=settings.photo_cache_sqlite_path or None,
+        )
+        self.limiter = get_limiter("unsplash")
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """共享的HTTP连接池"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=10,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+    
+    async def _search(self, query: str, per_page: int) -> List[dict]:
+        """调用搜索API, 请求失败时抛出异常"""
+        params = {
+            "query": query,
+            "per_page": per_page,
+            "client_id": self.access_key
+        }
+
+        # 限制同时进行的API请求数与请求速率
+        async with self.limiter.slot():
+            response = await self._get_client().get("/search/photos", params=params)
+        response.raise_for_status()
+
+        data = response.json()
+        results = data.get("results", [])
+
+        # 提取图片URL
+        photos = []
+        for photo in results:
+            photos.append({
+                "id": photo.get("id"),
+                "url": photo.get("urls", {}).get("regular"),
+                "thumb": photo.get("urls", {}).get("thumb"),
+                "description": photo.get("description") or photo.get("alt_description"),
+                "photographer": photo.get("user", {}).get("name")
+            })
+
+        return photos
     
-    def search_photos(self, query: str, per_page: int = 5) -> List[dict]:
+    async def search_photos(self, query: str, per_page: int = 5) -> List[dict]:
         """
         搜索图片
         
@@ -25,51 +82,91 @@ class UnsplashService:
             图片列表
         """
         try:
-            url = f"{self.base_url}/search/photos"
-            params = {
-                "query": query,
-                "per_page": per_page,
-                "client_id": self.access_key
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = data.get("results", [])
-            
-            # 提取图片URL
-            photos = []
-            for photo in results:
-                photos.append({
-                    "id": photo.get("id"),
-                    "url": photo.get("urls", {}).get("regular"),
-                    "thumb": photo.get("urls", {}).get("thumb"),
-                    "description": photo.get("description") or photo.get("alt_description"),
-                    "photographer": photo.get("user", {}).get("name")
-                })
-            
-            return photos
-            
+            return await self._search(query, per_page)
+        except OverloadedError:
+            raise
         except Exception as e:
             print(f"❌ Unsplash搜索失败: {str(e)}")
             return []
     
-    def get_photo_url(self, query: str) -> Optional[str]:
+    async def get_photo_url(self, query: str) -> Optional[str]:
         """
         获取单张图片URL
 
+        结果(包括"没有图片")会被缓存, 相同关键词的并发请求只会调用一次API
+
         Args:
             query: 搜索关键词
 
         Returns:
             图片URL
         """
-        photos = self.search_photos(query, per_page=1)
+        cache_key = make_cache_key("unsplash", query.strip().lower())
+        cached = await self.cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
+
+        return await self.flight.do(cache_key, lambda: self._fetch_photo_url(query, cache_key))
+
+    async def _fetch_photo_url(self, query: str, cache_key: str) -> Optional[str]:
+        try:
+            photos = await self._search(query, per_page=1)
+        except OverloadedError:
+            # 交由上层返回 429, 同样不写入缓存
+            raise
+        except Exception as e:
+            # 请求失败(如触发限流)不写入缓存, 下次重试
+            print(f"❌ Unsplash搜索失败: {str(e)}")
+            return None
+
         if photos:
-            return photos[0].get("url")
+            photo_url = photos[0].get("url")
+            await self.cache.set(cache_key, photo_url, self.cache_ttl)
+            return photo_url
+
+        # 负缓存: 没有结果的关键词在较短时间内不再请求
+        await self.cache.set(cache_key, None, self.negative_ttl)
         return None
 
+    async def get_attraction_photo(self, name: str) -> Optional[str]:
+        """
+        获取景点图片URL
+
+        Args:
+            name: 景点名称
+
+        Returns:
+            图片URL
+        """
+        photo_url = await self.get_photo_url(f"{name} China landmark")
+
+        if not photo_url:
+            # 如果没找到,尝试只用景点名称搜索
+            photo_url = await self.get_photo_url(name)
+
+        return photo_url
+
+    async def get_attraction_photos(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        并发获取多个景点的图片URL
+
+        Args:
+            names: 景点名称(重复名称只查询一次)
+
+        Returns:
+            景点名称 -> 图片URL
+        """
+        unique_names = list(dict.fromkeys(name for name in names if name))
+        urls = await asyncio.gather(*(self.get_attraction_photo(name) for name in unique_names))
+        return dict(zip(unique_names, urls))
+
+    async def close(self):
+        """关闭HTTP连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self.cache.close()
+
 
 # 全局服务实例
 _unsplash_service = None
@@ -83,4 +180,3 @@ def get_unsplash_service() -> UnsplashService:
         _unsplash_service = UnsplashService()
     
     return _unsplash_service
-
@@ -0,0 +1,203 @@
+"""高德地图MCP工具结果解析"""
+
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+from ..models.schemas import GeocodeResult, Location, POIInfo, WeatherInfo, RouteInfo
+
+
+class AmapResultError(ValueError):
+    """高德工具返回错误或无法解析的结果"""
+
+
+def extract_text(result: Any) -> str:
+    """
+    取出工具结果中的文本
+
+    langchain-mcp-adapters 可能返回字符串、内容块列表或 (content, artifact) 元组
+    """
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, str):
+        return result
+    if isinstance(result, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in result
+        )
+    content = getattr(result, "content", None)
+    if content is not None:
+        return extract_text(content)
+    return str(result)
+
+
+def load_result(result: Any) -> Dict[str, Any]:
+    """
+    将工具结果解析为字典
+
+    Raises:
+        AmapResultError: 结果不是JSON对象或包含 error 字段
+    """
+    if isinstance(result, dict):
+        data = result
+    else:
+        text = extract_text(result).strip()
+        if not text.startswith("{"):
+            # 兼容JSON前后带有说明文字的情况
+            start, end = text.find("{"), text.rfind("}")
+            if start == -1 or end < start:
+                raise AmapResultError(f"无法解析高德返回结果: {text[:100]}")
+            text = text[start:end + 1]
+        try:
+            data = _json.loads(text)
+        except ValueError as e:
+            raise AmapResultError(f"无法解析高德返回结果: {e}") from e
+
+    if not isinstance(data, dict):
+        raise AmapResultError("高德返回结果不是JSON对象")
+    if data.get("error"):
+        raise AmapResultError(str(data["error"]))
+    return data
+
+
+def _text(value: Any) -> str:
+    """高德REST接口对空字段返回 [], 统一转为字符串"""
+    if value is None or isinstance(value, (list, dict)):
+        return ""
+    return str(value)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_location(value: Any) -> Optional[Location]:
+    """解析 "经度,纬度" 字符串或坐标字典"""
+    if isinstance(value, Location):
+        return value
+    if isinstance(value, dict):
+        longitude = _to_float(value.get("longitude", value.get("lng")))
+        latitude = _to_float(value.get("latitude", value.get("lat")))
+    elif isinstance(value, str) and "," in value:
+        lng, _, lat = value.partition(",")
+        longitude, latitude = _to_float(lng), _to_float(lat)
+    else:
+        return None
+
+    if longitude is None or latitude is None:
+        return None
+    return Location(longitude=longitude, latitude=latitude)
+
+
+def parse_poi(item: Dict[str, Any]) -> Optional[POIInfo]:
+    """解析单个POI, 没有坐标时返回 None"""
+    location = parse_location(item.get("location"))
+    if location is None or not item.get("id"):
+        return None
+
+    biz_ext = item.get("biz_ext") if isinstance(item.get("biz_ext"), dict) else item
+    return POIInfo(
+        id=_text(item.get("id")),
+        name=_text(item.get("name")),
+        type=_text(item.get("type")) or _text(item.get("typecode")),
+        address=_text(item.get("address")),
+        location=location,
+        tel=_text(item.get("tel")) or None,
+        rating=_to_float(biz_ext.get("rating")),
+        cost=_to_float(biz_ext.get("cost")),
+    )
+
+
+def parse_pois(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """取出POI搜索结果中的原始POI列表"""
+    pois = data.get("pois")
+    return [poi for poi in pois if isinstance(poi, dict)] if isinstance(pois, list) else []
+
+
+def parse_weather(data: Dict[str, Any]) -> List[WeatherInfo]:
+    """
+    解析天气预报
+
+    兼容 amap-mcp-server 的 {"forecasts": casts} 与REST接口的 {"forecasts": [{"casts": ...}]}
+    """
+    forecasts = data.get("forecasts") or []
+    if forecasts and isinstance(forecasts[0], dict) and "casts" in forecasts[0]:
+        forecasts = forecasts[0]["casts"]
+
+    weather = []
+    for cast in forecasts:
+        if not isinstance(cast, dict) or not cast.get("date"):
+            continue
+        power = _text(cast.get("daypower"))
+        weather.append(WeatherInfo(
+            date=cast["date"],
+            day_weather=_text(cast.get("dayweather")),
+            night_weather=_text(cast.get("nightweather")),
+            day_temp=_text(cast.get("daytemp")),
+            night_temp=_text(cast.get("nighttemp")),
+            wind_direction=_text(cast.get("daywind")),
+            wind_power=power if not power or power.endswith("级") else f"{power}级",
+        ))
+    return weather
+
+
+def parse_route(data: Dict[str, Any], route_type: str) -> Optional[RouteInfo]:
+    """解析路线规划结果, 取第一条方案"""
+    route = data.get("route")
+    if not isinstance(route, dict):
+        return None
+
+    if route.get("transits"):
+        transit = route["transits"][0]
+        lines = [
+            busline.get("name")
+            for segment in transit.get("segments") or []
+            for busline in (segment.get("bus") or {}).get("buslines") or []
+            if busline.get("name")
+        ]
+        distance = _to_float(transit.get("distance")) or _to_float(route.get("distance")) or 0.0
+        return RouteInfo(
+            distance=distance,
+            duration=int(_to_float(transit.get("duration")) or 0),
+            route_type=route_type,
+            description=" → ".join(lines) if lines else "步行",
+        )
+
+    paths = route.get("paths") or []
+    if not paths:
+        return None
+
+    path = paths[0]
+    instructions = [
+        step.get("instruction")
+        for step in path.get("steps") or []
+        if step.get("instruction")
+    ]
+    return RouteInfo(
+        distance=_to_float(path.get("distance")) or 0.0,
+        duration=int(_to_float(path.get("duration")) or 0),
+        route_type=route_type,
+        description="；".join(instructions),
+    )
+
+
+def parse_geocode(data: Dict[str, Any]) -> Optional[GeocodeResult]:
+    """
+    解析地理编码结果, 取第一个匹配
+
+    兼容 amap-mcp-server 的 {"return": [...]} 与REST接口的 {"geocodes": [...]}
+    """
+    results = data.get("return") or data.get("geocodes") or data.get("results") or []
+    for item in results:
+        if isinstance(item, dict):
+            location = parse_location(item.get("location"))
+            if location is not None:
+                return GeocodeResult(location=location, level=_text(item.get("level")))
+    return None
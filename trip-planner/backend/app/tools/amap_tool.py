@@ -1,12 +1,57 @@
 """高德地图MCP服务封装"""
 
+import asyncio
+import shlex
 from typing import List, Dict, Any, Optional
 from .mcp_tool import MCPTool
+from .amap_parser import (
+    load_result,
+    parse_pois,
+    parse_poi,
+    parse_weather,
+    parse_route,
+    parse_geocode,
+)
+from ..services.cache import TieredCache
+from ..services.limits import get_limiter, OverloadedError
 from ..config import get_settings
-from ..models.schemas import Location, POIInfo, WeatherInfo
+from ..geo import get_spatial_index
+from ..models.schemas import GeocodeResult, POIInfo, WeatherInfo, RouteInfo
 
-# 全局MCP工具实例
+# 各高德工具的缓存时间(秒): 天气变化快, 地理编码与POI详情基本不变
+AMAP_TOOL_CACHE_TTLS = {
+    "maps_weather": 30 * 60,
+    "maps_text_search": 24 * 3600,
+    "maps_around_search": 24 * 3600,
+    "maps_search_detail": 7 * 24 * 3600,
+    "maps_geo": 30 * 24 * 3600,
+    "maps_regeocode": 30 * 24 * 3600,
+    "maps_direction_walking_by_address": 24 * 3600,
+    "maps_direction_driving_by_address": 24 * 3600,
+    "maps_direction_transit_integrated_by_address": 24 * 3600,
+}
+
+# 全局MCP工具实例(进程内共享一个会话池)
 _amap_mcp_tool = None
+_amap_mcp_lock = asyncio.Lock()
+
+
+def _amap_server_config() -> Dict[str, Any]:
+    """高德地图MCP服务器配置"""
+    settings = get_settings()
+
+    if not settings.amap_api_key:
+        raise ValueError("高德地图API Key未配置,请在.env文件中设置AMAP_API_KEY")
+
+    return {
+        "amap": {
+            "command": settings.amap_mcp_command,
+            "args": shlex.split(settings.amap_mcp_args),
+            "env": {"AMAP_MAPS_API_KEY": settings.amap_api_key},
+            "transport": "stdio",
+        }
+    }
+
 
 async def get_amap_mcp_tool() -> MCPTool:
     """
@@ -20,36 +65,63 @@ async def get_amap_mcp_tool() -> MCPTool:
     
     if _amap_mcp_tool is not None:
         return _amap_mcp_tool
-    
-    settings = get_settings()
-    
-    if not settings.amap_api_key:
-        raise ValueError("高德地图API Key未配置,请在.env文件中设置AMAP_API_KEY")
-    
-    # 创建MCP工具实例
-    _amap_mcp_tool = MCPTool()
-    
-    # 配置MCP服务器
-    server_config = {
-        "amap": {
-            "command": "uvx",
-            "args": ["amap-mcp-server"],
-            "env": {"AMAP_MAPS_API_KEY": settings.amap_api_key},
-            "transport": "stdio",
-        }
-    }
 
-    await _amap_mcp_tool.init_mcp_tools(server_config)
+    async with _amap_mcp_lock:
+        if _amap_mcp_tool is not None:
+            return _amap_mcp_tool
+
+        settings = get_settings()
+
+        cache = None
+        if settings.tool_cache_enabled:
+            cache = TieredCache(
+                "amap",
+                max_entries=settings.tool_cache_max_entries,
+                sqlite_path=settings.tool_cache_sqlite_path or None,
+            )
+
+        # 创建MCP工具实例并建立会话池
+        mcp_tool = MCPTool(
+            pool_size=settings.amap_mcp_pool_size,
+            health_check_interval=settings.amap_mcp_health_check_interval,
+            cache=cache,
+            cache_ttls=AMAP_TOOL_CACHE_TTLS,
+            limiter=get_limiter("amap"),
+        )
+        await mcp_tool.init_mcp_tools(_amap_server_config())
+        _amap_mcp_tool = mcp_tool
+
     return _amap_mcp_tool
 
+
+async def close_amap_mcp_tool():
+    """关闭高德地图MCP会话池"""
+    global _amap_mcp_tool
+
+    if _amap_mcp_tool is not None:
+        await _amap_mcp_tool.close()
+        _amap_mcp_tool = None
+
 class AmapService:
     """高德地图服务封装类"""
     
     def __init__(self):
         """初始化服务"""
-        self.mcp_tool = get_amap_mcp_tool()
+        self.mcp_tool: Optional[MCPTool] = None
+
+    async def _call(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """调用高德MCP工具并解析为字典"""
+        if self.mcp_tool is None:
+            self.mcp_tool = await get_amap_mcp_tool()
+
+        result = await self.mcp_tool.run({
+            "action": "call_tool",
+            "tool_name": tool_name,
+            "arguments": arguments
+        })
+        return load_result(result)
     
-    def search_poi(self, keywords: str, city: str, citylimit: bool = True) -> List[POIInfo]:
+    async def search_poi(self, keywords: str, city: str, citylimit: bool = True) -> List[POIInfo]:
         """
         搜索POI
         
@@ -62,30 +134,52 @@ class AmapService:
             POI信息列表
         """
         try:
-            # 调用MCP工具
-            result = self.mcp_tool.run({
-                "action": "call_tool",
-                "tool_name": "maps_text_search",
-                "arguments": {
-                    "keywords": keywords,
-                    "city": city,
-                    "citylimit": str(citylimit).lower()
-                }
+            data = await self._call("maps_text_search", {
+                "keywords": keywords,
+                "city": city,
+                "citylimit": str(citylimit).lower()
             })
+
+            pois = await self._resolve_pois(parse_pois(data))
+
+            # 记入城市空间索引, 供附近查询在本地完成; 没有结果时不创建索引
+            if pois:
+                get_spatial_index(city).add_many(pois)
+            return pois
             
-            # 解析结果
-            # 注意: MCP工具返回的是字符串,需要解析
-            # 这里简化处理,实际应该解析JSON
-            print(f"POI搜索结果: {result[:200]}...")  # 打印前200字符
-            
-            # TODO: 解析实际的POI数据
-            return []
-            
+        except OverloadedError:
+            raise
         except Exception as e:
             print(f"❌ POI搜索失败: {str(e)}")
             return []
+
+    async def _resolve_pois(self, items: List[Dict[str, Any]]) -> List[POIInfo]:
+        """
+        解析搜索结果
+
+        不含坐标的结果通过POI详情补全(详情会被长期缓存)。详情查询经过高德准入控制,
+        单次搜索同时进行的查询数受 amap_poi_detail_concurrency 限制, 避免一次搜索占满调用名额
+        """
+        semaphore = asyncio.Semaphore(max(get_settings().amap_poi_detail_concurrency, 1))
+
+        async def _detail(poi_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_poi_detail(poi_id)
+
+        pending = []
+        pois: List[Optional[POIInfo]] = []
+        for item in items:
+            poi = parse_poi(item)
+            if poi is None and item.get("id"):
+                pending.append((len(pois), item))
+            pois.append(poi)
+
+        details = await asyncio.gather(*(_detail(item["id"]) for _, item in pending))
+        for (index, item), detail in zip(pending, details):
+            pois[index] = parse_poi({**item, **detail})
+        return [poi for poi in pois if poi is not None]
     
-    def get_weather(self, city: str) -> List[WeatherInfo]:
+    async def get_weather(self, city: str) -> List[WeatherInfo]:
         """
         查询天气
         
@@ -96,32 +190,25 @@ class AmapService:
             天气信息列表
         """
         try:
-            # 调用MCP工具
-            result = self.mcp_tool.run({
-                "action": "call_tool",
-                "tool_name": "maps_weather",
-                "arguments": {
-                    "city": city
-                }
+            data = await self._call("maps_weather", {
+                "city": city
             })
+            return parse_weather(data)
             
-            print(f"天气查询结果: {result[:200]}...")
-            
-            # TODO: 解析实际的天气数据
-            return []
-            
+        except OverloadedError:
+            raise
         except Exception as e:
             print(f"❌ 天气查询失败: {str(e)}")
             return []
     
-    def plan_route(
+    async def plan_route(
         self,
         origin_address: str,
         destination_address: str,
         origin_city: Optional[str] = None,
         destination_city: Optional[str] = None,
         route_type: str = "walking"
-    ) -> Dict[str, Any]:
+    ) -> Optional[RouteInfo]:
         """
         规划路线
         
@@ -151,36 +238,22 @@ class AmapService:
                 "destination_address": destination_address
             }
             
-            # 公共交通需要城市参数
-            if route_type == "transit":
-                if origin_city:
-                    arguments["origin_city"] = origin_city
-                if destination_city:
-                    arguments["destination_city"] = destination_city
-            else:
-                # 其他路线类型也可以提供城市参数提高准确性
-                if origin_city:
-                    arguments["origin_city"] = origin_city
-                if destination_city:
-                    arguments["destination_city"] = destination_city
-            
-            # 调用MCP工具
-            result = self.mcp_tool.run({
-                "action": "call_tool",
-                "tool_name": tool_name,
-                "arguments": arguments
-            })
+            # 提供城市参数提高准确性(公共交通必须提供)
+            if origin_city:
+                arguments["origin_city"] = origin_city
+            if destination_city:
+                arguments["destination_city"] = destination_city
             
-            print(f"路线规划结果: {result[:200]}...")
-            
-            # TODO: 解析实际的路线数据
-            return {}
+            data = await self._call(tool_name, arguments)
+            return parse_route(data, route_type)
             
+        except OverloadedError:
+            raise
         except Exception as e:
             print(f"❌ 路线规划失败: {str(e)}")
-            return {}
+            return None
     
-    def geocode(self, address: str, city: Optional[str] = None) -> Optional[Location]:
+    async def geocode(self, address: str, city: Optional[str] = None) -> Optional[GeocodeResult]:
         """
         地理编码(地址转坐标)
 
@@ -189,29 +262,56 @@ class AmapService:
             city: 城市
 
         Returns:
-            经纬度坐标
+            经纬度坐标与匹配级别
         """
         try:
             arguments = {"address": address}
             if city:
                 arguments["city"] = city
 
-            result = self.mcp_tool.run({
-                "action": "call_tool",
-                "tool_name": "maps_geo",
-                "arguments": arguments
-            })
-
-            print(f"地理编码结果: {result[:200]}...")
-
-            # TODO: 解析实际的坐标数据
-            return None
+            data = await self._call("maps_geo", arguments)
+            return parse_geocode(data)
 
+        except OverloadedError:
+            raise
         except Exception as e:
             print(f"❌ 地理编码失败: {str(e)}")
             return None
 
-    def get_poi_detail(self, poi_id: str) -> Dict[str, Any]:
+    async def geocode_many(
+            self,
+            addresses: List[str],
+            city: Optional[str] = None,
+            concurrency: int = 8,
+        ) -> Dict[str, Optional[GeocodeResult]]:
+        """
+        批量地理编码: 地址去重后并发查询
+
+        并发数受 concurrency 限制, 重复地址由工具缓存直接返回。
+        单个地址过载或失败时结果为 None, 不影响其他地址。
+
+        Args:
+            addresses: 地址列表
+            city: 城市
+            concurrency: 最大并发数
+
+        Returns:
+            地址 -> 地理编码结果
+        """
+        unique = list(dict.fromkeys(address for address in addresses if address))
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def _one(address: str) -> Optional[GeocodeResult]:
+            async with semaphore:
+                try:
+                    return await self.geocode(address, city)
+                except OverloadedError:
+                    return None
+
+        results = await asyncio.gather(*(_one(address) for address in unique))
+        return dict(zip(unique, results))
+
+    async def get_poi_detail(self, poi_id: str) -> Dict[str, Any]:
         """
         获取POI详情
 
@@ -222,28 +322,12 @@ class AmapService:
             POI详情信息
         """
         try:
-            result = self.mcp_tool.run({
-                "action": "call_tool",
-                "tool_name": "maps_search_detail",
-                "arguments": {
-                    "id": poi_id
-                }
+            return await self._call("maps_search_detail", {
+                "id": poi_id
             })
 
-            print(f"POI详情结果: {result[:200]}...")
-
-            # 解析结果并提取图片
-            import json
-            import re
-
-            # 尝试从结果中提取JSON
-            json_match = re.search(r'\{.*\}', result, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                return data
-
-            return {"raw": result}
-
+        except OverloadedError:
+            raise
         except Exception as e:
             print(f"❌ 获取POI详情失败: {str(e)}")
             return {}
@@ -0,0 +1,187 @@
+"""MCP长连接会话池"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from langchain.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession
+
+
+class PooledSession:
+    """
+    单个长连接 MCP 会话
+
+    stdio 会话的上下文必须在同一个任务中进入与退出,
+    因此每个会话由一个独立的后台任务持有整个生命周期。
+    """
+
+    def __init__(self, client: MultiServerMCPClient, server_name: str, index: int):
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.tools: Dict[str, BaseTool] = {}
+        self._client = client
+        self._server_name = server_name
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def alive(self) -> bool:
+        """会话是否可用"""
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self.session is not None
+        )
+
+    async def start(self):
+        """启动子进程并完成握手"""
+        self._ready.clear()
+        self._closing.clear()
+        self._error = None
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+
+        if self._error is not None:
+            raise RuntimeError(f"MCP会话#{self.index}启动失败: {self._error}")
+
+    async def _run(self):
+        try:
+            async with self._client.session(self._server_name) as session:
+                tools = await load_mcp_tools(session, server_name=self._server_name)
+                self.session = session
+                self.tools = {tool.name: tool for tool in tools}
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            self.tools = {}
+            self._ready.set()
+
+    async def ping(self, timeout: float = 5.0) -> bool:
+        """健康检查"""
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def stop(self, timeout: float = 5.0):
+        """关闭会话并结束子进程"""
+        if self._task is None:
+            return
+        self._closing.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except Exception:
+            self._task.cancel()
+        self._task = None
+
+    async def restart(self):
+        """重建会话(子进程崩溃或健康检查失败时)"""
+        print(f"🔁 重建MCP会话#{self.index}")
+        await self.stop()
+        await self.start()
+
+
+class MCPSessionPool:
+    """
+    单个 MCP 服务器的长连接会话池
+
+    - 启动时预先建立 size 个会话, 工具调用复用已握手的会话
+    - 定期对空闲会话做 ping 健康检查, 失败自动重建
+    - 调用过程中出错且会话不可用时, 归还前自动重建
+    """
+
+    def __init__(
+        self,
+        client: MultiServerMCPClient,
+        server_name: str,
+        size: int = 2,
+        health_check_interval: float = 30.0,
+    ):
+        self.server_name = server_name
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+        self._sessions = [
+            PooledSession(client, server_name, index)
+            for index in range(self.size)
+        ]
+        self._idle: asyncio.Queue[PooledSession] = asyncio.Queue()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def tools(self) -> List[BaseTool]:
+        """工具列表(取自任一可用会话, 用于查看工具名称与参数定义)"""
+        for pooled in self._sessions:
+            if pooled.tools:
+                return list(pooled.tools.values())
+        return []
+
+    async def start(self):
+        """建立全部会话并启动健康检查"""
+        await asyncio.gather(*(pooled.start() for pooled in self._sessions))
+        for pooled in self._sessions:
+            self._idle.put_nowait(pooled)
+
+        if self.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledSession]:
+        """借出一个可用会话, 用完自动归还"""
+        pooled = await self._idle.get()
+        try:
+            if not pooled.alive:
+                await pooled.restart()
+            yield pooled
+        except Exception:
+            if not await pooled.ping():
+                await self._safe_restart(pooled)
+            raise
+        finally:
+            self._idle.put_nowait(pooled)
+
+    async def _safe_restart(self, pooled: PooledSession):
+        try:
+            await pooled.restart()
+        except Exception as e:
+            print(f"❌ MCP会话#{pooled.index}重建失败: {e}")
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+
+            # 只检查当前空闲的会话, 不影响正在执行的调用;
+            # ping 期间其他调用可能借走剩余的空闲会话, 取不到时结束本轮
+            for _ in range(self._idle.qsize()):
+                try:
+                    pooled = self._idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                try:
+                    if not await pooled.ping():
+                        await self._safe_restart(pooled)
+                except Exception as e:
+                    # 单个会话检查出错不能终止健康检查任务
+                    print(f"⚠️  MCP会话#{pooled.index}健康检查失败: {e}")
+                finally:
+                    self._idle.put_nowait(pooled)
+
+    async def close(self):
+        """关闭全部会话"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        await asyncio.gather(
+            *(pooled.stop() for pooled in self._sessions),
+            return_exceptions=True,
+        )
@@ -1,15 +1,92 @@
 import asyncio
+import json
 from typing import Optional, Dict, Any
 from langchain.tools import BaseTool
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
+from .mcp_pool import MCPSessionPool
+from ..services.cache import TieredCache, MISSING, make_cache_key
+from ..services.limits import ConcurrencyLimiter
+from ..services.telemetry import span, record_tool_call
+from ..services.singleflight import SingleFlight
+
+
+def _canonical_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """规范化工具参数, 使等价调用得到相同的缓存键"""
+    return {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in arguments.items()
+        if value is not None
+    }
+
+
+def _is_cacheable(result: Any) -> bool:
+    """
+    只缓存正常的JSON结果
+
+    工具错误(isError)以普通文本块返回, 如 INVALID_USER_KEY; 业务错误为带 error 字段
+    或 status 为 0 的JSON。两者都可能只是暂时的(密钥、配额), 不能缓存。
+    """
+    if isinstance(result, str):
+        text = result
+    elif isinstance(result, list) and all(
+        isinstance(block, dict) and block.get("type") == "text"
+        for block in result
+    ):
+        text = "".join(block.get("text", "") for block in result)
+    else:
+        return False
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return False
+    if not isinstance(data, dict):
+        return False
+    return not data.get("error") and str(data.get("status", "1")) != "0"
+
+
+def _payload_size(value: Any) -> int:
+    """参数或结果的大致字节数(用于观测)"""
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, list):
+        return sum(_payload_size(block.get("text", "")) for block in value if isinstance(block, dict))
+    try:
+        return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return 0
+
 
 class MCPTool:
     """MCP工具管理器"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        pool_size: int = 1,
+        health_check_interval: float = 30.0,
+        cache: Optional[TieredCache] = None,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        limiter: Optional[ConcurrencyLimiter] = None,
+    ):
+        """
+        Args:
+            pool_size: 每个MCP服务器的长连接会话数
+            health_check_interval: 会话健康检查间隔(秒), 0表示不检查
+            cache: 工具调用结果缓存
+            cache_ttls: 各工具的缓存时间(秒), 未列出的工具不缓存
+            limiter: 工具调用的准入控制, 缓存命中的调用不占用名额
+        """
         self.mcp_tools: Optional[list[BaseTool]] = None
         self.mcp_client: Optional[MultiServerMCPClient] = None
+        self.pool_size = pool_size
+        self.health_check_interval = health_check_interval
+        self._pools: Dict[str, MCPSessionPool] = {}
+        self._tool_servers: Dict[str, str] = {}
+        self.cache = cache
+        self.cache_ttls = cache_ttls or {}
+        self.flight = SingleFlight("mcp_tool")
+        self.limiter = limiter
         
     async def init_mcp_tools(self, server_config: Dict[str, Any]) -> list[BaseTool]:
         """
@@ -25,9 +102,27 @@ class MCPTool:
             return self.mcp_tools
         
         self.mcp_client = MultiServerMCPClient(server_config)
-        self.mcp_tools = await self.mcp_client.get_tools()
+
+        # 为每个服务器建立长连接会话池, 避免每次调用都启动子进程并握手
+        tools: list[BaseTool] = []
+        for server_name in server_config:
+            pool = MCPSessionPool(
+                self.mcp_client,
+                server_name,
+                size=self.pool_size,
+                health_check_interval=self.health_check_interval,
+            )
+            await pool.start()
+            self._pools[server_name] = pool
+
+            for tool in pool.tools:
+                self._tool_servers[tool.name] = server_name
+                tools.append(tool)
+
+        self.mcp_tools = tools
         
         print(f"✅ MCP工具初始化成功")
+        print(f"   会话池: {', '.join(f'{name}×{pool.size}' for name, pool in self._pools.items())}")
         print(f"   工具数量: {len(self.mcp_tools)}")
         
         if len(self.mcp_tools):
@@ -60,14 +155,72 @@ class MCPTool:
             raise ValueError(f"不支持的action: {action}")
         
         # 查找对应的工具
-        tool = next(
-            (t for t in self.mcp_tools if t.name == tool_name),
-            None
-        )
+        server_name = self._tool_servers.get(tool_name)
 
-        if tool is None:
+        if server_name is None:
             raise ValueError(f"未找到工具: {tool_name}")
-            
-        # 调用工具
-        result = await tool.ainvoke(arguments)
+
+        cache_key = make_cache_key(tool_name, _canonical_arguments(arguments))
+        ttl = self.cache_ttls.get(tool_name, 0) if self.cache is not None else 0
+
+        record = None
+        result = None
+        try:
+            with span("mcp.tool", tool=tool_name, server=server_name) as record:
+                # 相同工具+相同参数的结果直接从缓存返回
+                cached = await self.cache.get(cache_key) if ttl > 0 else MISSING
+                record.set("cache_hit", cached is not MISSING)
+
+                if cached is not MISSING:
+                    result = cached
+                else:
+                    # 相同参数的并发调用只执行一次
+                    result = await self.flight.do(
+                        cache_key,
+                        lambda: self._call_tool(server_name, tool_name, arguments, cache_key, ttl),
+                    )
+            return result
+        finally:
+            if record is not None:
+                record_tool_call(
+                    tool_name,
+                    record.duration,
+                    record.status,
+                    record.attributes.get("cache_hit", False),
+                    request_bytes=_payload_size(arguments),
+                    response_bytes=_payload_size(result) if result is not None else 0,
+                )
+
+    async def _call_tool(
+        self,
+        server_name: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        cache_key: str,
+        ttl: float,
+    ) -> Any:
+        if self.limiter is not None:
+            async with self.limiter.slot():
+                result = await self._invoke(server_name, tool_name, arguments)
+        else:
+            result = await self._invoke(server_name, tool_name, arguments)
+
+        if ttl > 0 and _is_cacheable(result):
+            await self.cache.set(cache_key, result, ttl)
         return result
+
+    async def _invoke(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        # 从会话池借出会话并调用工具
+        async with self._pools[server_name].acquire() as pooled:
+            tool = pooled.tools[tool_name]
+            return await tool.ainvoke(arguments)
+
+    async def close(self):
+        """关闭所有MCP会话"""
+        for pool in self._pools.values():
+            await pool.close()
+        self._pools.clear()
+        self._tool_servers.clear()
+        self.mcp_tools = None
+        if self.cache is not None:
+            self.cache.close()
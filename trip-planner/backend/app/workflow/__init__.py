@@ -1,5 +1,7 @@
 # workflow/__init__.py
-from .graph import build_graph
+from .graph import build_graph, SPECIALIST_NODES
+from .state import create_initial_state
+from .runner import run_trip_workflow, get_cached_trip_plan, cache_trip_plan
 
 _workflow = None
 
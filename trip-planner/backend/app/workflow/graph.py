@@ -1,22 +1,79 @@
+import asyncio
+from typing import Awaitable, Callable
+
 from langgraph.graph import StateGraph, START, END
 from .state import AgentState
 from ..agents.specialists import attraction_node, weather_node, hotel_node
+from ..agents.compactor import compact_node
+from ..agents.clustering import cluster_node
+from ..agents.hotel_placement import hotel_placement_node
 from ..agents.planner_agent import planner_node
+from ..config import get_settings
+from ..services.limits import OverloadedError
+from ..services.telemetry import traced_node
+
+# specialist 节点名 -> (节点函数, 写入的 State 字段)
+SPECIALIST_NODES = {
+    "search_attractions": (attraction_node, "attraction_results"),
+    "search_weather": (weather_node, "weather_results"),
+    "search_hotels": (hotel_node, "hotel_results"),
+}
+
+
+def _with_timeout(
+        name: str,
+        node: Callable[[AgentState], Awaitable[AgentState]],
+        result_key: str,
+    ) -> Callable[[AgentState], Awaitable[AgentState]]:
+    """
+    为 specialist 节点加上超时与部分结果策略
+
+    partial: 超时或异常时该分支返回空结果并记录错误, 规划继续
+    strict: 任一分支失败即终止整个工作流
+
+    两种策略下过载(OverloadedError)都直接抛出, 由上层返回 429 而不是生成残缺的计划
+    """
+
+    async def wrapped(state: AgentState) -> AgentState:
+        settings = get_settings()
+        try:
+            return await asyncio.wait_for(node(state), timeout=settings.specialist_timeout)
+        except OverloadedError:
+            raise
+        except Exception as e:
+            reason = "超时" if isinstance(e, asyncio.TimeoutError) else str(e)
+            if settings.specialist_failure_policy == "strict":
+                raise RuntimeError(f"{name} 执行失败: {reason}") from e
+
+            print(f"⚠️  {name} 执行失败, 使用部分结果继续: {reason}")
+            return {
+                result_key: [],
+                "specialist_errors": [f"{name}: {reason}"],
+            }
+
+    wrapped.__name__ = name
+    return wrapped
+
 
 def build_graph():
     workflow = StateGraph(AgentState)
 
     # 1. 添加节点
-    workflow.add_node("search_attractions", attraction_node)
-    workflow.add_node("search_weather", weather_node)
-    workflow.add_node("search_hotels", hotel_node)
-    workflow.add_node("generate_plan", planner_node)
-
-    # 2. 定义边
-    workflow.add_edge(START, "search_attractions")
-    workflow.add_edge("search_attractions", "search_weather")
-    workflow.add_edge("search_weather", "search_hotels")
-    workflow.add_edge("search_hotels", "generate_plan")
+    for name, (node, result_key) in SPECIALIST_NODES.items():
+        workflow.add_node(name, traced_node(name, _with_timeout(name, node, result_key)))
+    workflow.add_node("compact_context", traced_node("compact_context", compact_node))
+    workflow.add_node("cluster_days", traced_node("cluster_days", cluster_node))
+    workflow.add_node("place_hotels", traced_node("place_hotels", hotel_placement_node))
+    workflow.add_node("generate_plan", traced_node("generate_plan", planner_node))
+
+    # 2. 定义边: 三个 specialist 从 START 并行扇出, 全部完成后汇合,
+    #    压缩结果、按天分组景点并选定酒店后交给 planner
+    for name in SPECIALIST_NODES:
+        workflow.add_edge(START, name)
+    workflow.add_edge(list(SPECIALIST_NODES), "compact_context")
+    workflow.add_edge("compact_context", "cluster_days")
+    workflow.add_edge("cluster_days", "place_hotels")
+    workflow.add_edge("place_hotels", "generate_plan")
     workflow.add_edge("generate_plan", END)
 
     return workflow.compile()
@@ -24,4 +81,4 @@ def build_graph():
 
 if __name__ == "__main__":
     graph = build_graph()
-    print("Graph built successfully.")
\ No newline at end of file
+    print("Graph built successfully.")
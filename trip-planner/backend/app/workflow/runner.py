@@ -0,0 +1,115 @@
+"""工作流执行入口"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..models.schemas import TripRequest, TripPlan
+from ..services.cache import make_cache_key
+from ..services.plan_cache import get_plan_cache, normalize_trip_request, redate_trip_plan
+from ..services.singleflight import SingleFlight
+from ..services.limits import get_limiter
+from .state import create_initial_state
+
+# 合并相同请求的并发工作流执行
+_plan_flight = SingleFlight("trip_plan")
+
+# 工作流事件回调, 参数为 astream_events(v2) 的事件
+EventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def _flight_key(request: TripRequest) -> str:
+    """合并键: 与行程缓存使用相同的规范化规则"""
+    plan_cache = get_plan_cache()
+    if plan_cache is not None:
+        return plan_cache.key_for(request)
+    return make_cache_key("trip_plan", normalize_trip_request(request, include_start_date=True))
+
+
+async def get_cached_trip_plan(request: TripRequest) -> Optional[TripPlan]:
+    """查找缓存的旅行计划"""
+    plan_cache = get_plan_cache()
+    if plan_cache is None:
+        return None
+
+    trip_plan = await plan_cache.get(request)
+    if trip_plan is not None:
+        print(f"⚡ 命中行程缓存: {request.city} {request.travel_days}天")
+    return trip_plan
+
+
+async def cache_trip_plan(
+        request: TripRequest,
+        trip_plan: Optional[TripPlan],
+        specialist_errors: Optional[List[str]] = None,
+    ):
+    """
+    缓存生成的旅行计划
+
+    有 specialist 分支失败(超时、上游繁忙等)时计划是部分降级的结果, 不缓存,
+    后续相同的请求重新生成
+    """
+    plan_cache = get_plan_cache()
+    if plan_cache is None or trip_plan is None:
+        return
+    if specialist_errors:
+        print(f"⚠️  部分 specialist 失败, 不缓存本次行程: {'; '.join(specialist_errors)}")
+        return
+    await plan_cache.set(request, trip_plan)
+
+
+async def run_trip_workflow(
+        request: TripRequest,
+        on_event: Optional[EventCallback] = None,
+    ) -> Optional[TripPlan]:
+    """
+    生成旅行计划, 优先使用缓存, 相同请求的并发执行会被合并
+
+    Args:
+        request: 旅行规划请求
+        on_event: 工作流事件回调(节点完成、planner输出等)。只有实际执行工作流的调用方
+            会收到事件, 命中缓存或加入进行中的执行时只返回最终结果
+
+    Returns:
+        旅行计划
+
+    Raises:
+        OverloadedError: 工作流排队已满或等待超时
+    """
+    trip_plan = await get_cached_trip_plan(request)
+    if trip_plan is not None:
+        return trip_plan
+
+    trip_plan = await _plan_flight.do(_flight_key(request), lambda: _execute_workflow(request, on_event))
+
+    # 合并执行的结果可能来自开始日期不同的请求
+    if trip_plan is not None and trip_plan.start_date != request.start_date:
+        trip_plan = redate_trip_plan(trip_plan, request.start_date)
+    return trip_plan
+
+
+async def _execute_workflow(request: TripRequest, on_event: Optional[EventCallback] = None) -> Optional[TripPlan]:
+    """执行工作流并缓存结果"""
+    # 延迟导入, 避免 agents 与 workflow 之间的循环导入
+    from . import get_trip_planner_workflow
+
+    workflow = get_trip_planner_workflow()
+    initial_state = create_initial_state(request)
+
+    # 排队已满或等待超时时抛出 OverloadedError
+    async with get_limiter("workflow").slot():
+        if on_event is None:
+            final_state = await workflow.ainvoke(initial_state)
+            trip_plan = final_state.get("final_plan")
+            specialist_errors = final_state.get("specialist_errors")
+        else:
+            trip_plan, specialist_errors = None, []
+            async for event in workflow.astream_events(initial_state, version="v2"):
+                node = event.get("metadata", {}).get("langgraph_node")
+                if event["event"] == "on_chain_end" and event.get("name") == node:
+                    output = event["data"].get("output")
+                    output = output if isinstance(output, dict) else {}
+                    specialist_errors.extend(output.get("specialist_errors", []))
+                    trip_plan = output.get("final_plan", trip_plan)
+                await on_event(event)
+
+    await cache_trip_plan(request, trip_plan, specialist_errors)
+    return trip_plan
@@ -1,9 +1,9 @@
-from typing import TypedDict, Annotated, List, Optional
+from typing import TypedDict, Annotated, Dict, List, Optional
 from operator import add
 from langgraph.graph.message import add_messages
 from langchain_core.messages import BaseMessage
 
-from ..models.schemas import TripRequest, TripPlan
+from ..models.schemas import TripRequest, TripPlan, POIInfo, WeatherInfo
 
 class AgentState(TypedDict):
     # 1. 对话 / 思考上下文（如果你有 LLM reasoning）
@@ -17,5 +17,43 @@ class AgentState(TypedDict):
     weather_results: Annotated[List[str], add]
     hotel_results: Annotated[List[str], add]
 
+    # direct 模式下 specialist 的结构化结果
+    attraction_pois: Annotated[List[POIInfo], add]
+    weather_forecasts: Annotated[List[WeatherInfo], add]
+    hotel_pois: Annotated[List[POIInfo], add]
+
+    # 失败或超时的 specialist 分支（部分结果策略）
+    specialist_errors: Annotated[List[str], add]
+
+    # 压缩后的 planner 输入(attractions / weather / hotels)
+    planner_context: Optional[Dict[str, str]]
+
+    # 按地理位置分好的每日候选景点
+    day_clusters: Optional[List[List[POIInfo]]]
+
+    # 每天入住的酒店
+    day_hotels: Optional[List[POIInfo]]
+
     # 4. Planner Node 的最终结果
     final_plan: Optional[TripPlan]
+
+
+def create_initial_state(request: TripRequest) -> AgentState:
+    """构造工作流的初始 State"""
+    return {
+        "messages": [],
+        "request": request,
+
+        "attraction_results": [],
+        "weather_results": [],
+        "hotel_results": [],
+        "attraction_pois": [],
+        "weather_forecasts": [],
+        "hotel_pois": [],
+        "specialist_errors": [],
+        "planner_context": None,
+        "day_clusters": None,
+        "day_hotels": None,
+
+        "final_plan": None,
+    }
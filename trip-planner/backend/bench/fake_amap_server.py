@@ -0,0 +1,188 @@
+"""amap-mcp-server 的本地模拟服务(stdio)
+
+工具名称、参数与返回结构与 amap-mcp-server 一致, 结果由关键词与城市确定性生成,
+不访问网络。
+
+用法:
+    python bench/fake_amap_server.py --latency 0.05
+"""
+
+import argparse
+import asyncio
+import hashlib
+from datetime import date, timedelta
+from typing import Optional
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("amap")
+
+# 每次工具调用的模拟延迟(秒)
+LATENCY = 0.0
+
+POIS_PER_SEARCH = 10
+POI_TYPES = ["风景名胜", "博物馆", "公园", "酒店", "美食"]
+WEATHER = ["晴", "多云", "阴", "小雨"]
+
+
+def _digest(*parts: str) -> int:
+    return int(hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _city_center(city: str) -> tuple:
+    """城市中心点: 落在国内经纬度范围内"""
+    h = _digest(city)
+    return 100 + (h % 2200) / 100, 22 + (h // 2200 % 1800) / 100
+
+
+def _address_location(city: str, address: str) -> str:
+    """地址对应的坐标: 城市中心附近, POI坐标与地理编码结果一致"""
+    lng, lat = _city_center(city)
+    h = _digest(address)
+    return f"{lng + (h % 2000 - 1000) / 10000:.6f},{lat + (h // 2000 % 2000 - 1000) / 10000:.6f}"
+
+
+def _poi(poi_id: str) -> dict:
+    """由ID还原POI: ID 中编码了城市与关键词"""
+    head, index = poi_id.rsplit("_", 1)
+    _, city, keywords = head.split("_", 2)
+    h = _digest(poi_id)
+    address = f"{city}中心区{h % 200}号"
+    return {
+        "id": poi_id,
+        "name": f"{city}{keywords}{int(index) + 1}号",
+        "location": _address_location(city, address),
+        "address": address,
+        "type": POI_TYPES[h % len(POI_TYPES)],
+        "rating": f"{3.5 + (h % 15) / 10:.1f}",
+        "cost": str(50 + h % 500),
+    }
+
+
+async def _delay():
+    if LATENCY > 0:
+        await asyncio.sleep(LATENCY)
+
+
+@mcp.tool()
+async def maps_text_search(keywords: str, city: str = "", citylimit: str = "false") -> dict:
+    await _delay()
+    pois = []
+    for index in range(POIS_PER_SEARCH):
+        poi = _poi(f"B0_{city}_{keywords}_{index}")
+        pois.append({"id": poi["id"], "name": poi["name"], "address": poi["address"], "typecode": "110000"})
+    return {"suggestion": {"keywords": [], "cities": []}, "pois": pois}
+
+
+@mcp.tool()
+async def maps_around_search(keywords: str, location: str, radius: str = "1000") -> dict:
+    await _delay()
+    return {"pois": [_poi(f"B0_附近_{keywords}_{index}") for index in range(POIS_PER_SEARCH)]}
+
+
+@mcp.tool()
+async def maps_search_detail(id: str) -> dict:
+    await _delay()
+    try:
+        return _poi(id)
+    except ValueError:
+        return {"error": f"Get poi detail failed: {id}"}
+
+
+@mcp.tool()
+async def maps_weather(city: str) -> dict:
+    await _delay()
+    today = date.today()
+    casts = []
+    for offset in range(4):
+        h = _digest(city, str(offset))
+        casts.append({
+            "date": (today + timedelta(days=offset)).isoformat(),
+            "week": str((today + timedelta(days=offset)).isoweekday()),
+            "dayweather": WEATHER[h % len(WEATHER)],
+            "nightweather": WEATHER[h // 7 % len(WEATHER)],
+            "daytemp": str(20 + h % 12),
+            "nighttemp": str(10 + h % 8),
+            "daywind": "南",
+            "nightwind": "南",
+            "daypower": "1-3",
+            "nightpower": "1-3",
+        })
+    return {"city": city, "forecasts": casts}
+
+
+@mcp.tool()
+async def maps_geo(address: str, city: Optional[str] = None) -> dict:
+    await _delay()
+    return {"return": [{
+        "country": "中国",
+        "province": city or "",
+        "city": city or "",
+        "location": _address_location(city or address, address),
+        "level": "兴趣点",
+    }]}
+
+
+@mcp.tool()
+async def maps_regeocode(location: str) -> dict:
+    await _delay()
+    return {"province": "", "city": "", "district": "", "formatted_address": f"模拟地址({location})"}
+
+
+def _path(origin: str, destination: str, speed: float) -> dict:
+    distance = 500 + _digest(origin, destination) % 20000
+    return {
+        "distance": str(distance),
+        "duration": str(int(distance / speed)),
+        "steps": [
+            {"instruction": f"从{origin}出发", "distance": str(distance // 2)},
+            {"instruction": f"到达{destination}", "distance": str(distance - distance // 2)},
+        ],
+    }
+
+
+@mcp.tool()
+async def maps_direction_walking_by_address(
+        origin_address: str,
+        destination_address: str,
+        origin_city: Optional[str] = None,
+        destination_city: Optional[str] = None,
+    ) -> dict:
+    await _delay()
+    return {"route": {"paths": [_path(origin_address, destination_address, 1.2)]}}
+
+
+@mcp.tool()
+async def maps_direction_driving_by_address(
+        origin_address: str,
+        destination_address: str,
+        origin_city: Optional[str] = None,
+        destination_city: Optional[str] = None,
+    ) -> dict:
+    await _delay()
+    return {"route": {"paths": [_path(origin_address, destination_address, 8.0)]}}
+
+
+@mcp.tool()
+async def maps_direction_transit_integrated_by_address(
+        origin_address: str,
+        destination_address: str,
+        origin_city: str,
+        destination_city: str,
+    ) -> dict:
+    await _delay()
+    path = _path(origin_address, destination_address, 5.0)
+    return {"route": {"distance": path["distance"], "transits": [{
+        "duration": path["duration"],
+        "walking_distance": "300",
+        "segments": [{"bus": {"buslines": [{"name": "地铁1号线"}]}}],
+    }]}}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="amap-mcp-server 模拟服务")
+    parser.add_argument("--latency", type=float, default=0.0, help="每次工具调用的模拟延迟(秒)")
+    args = parser.parse_args()
+
+    LATENCY = args.latency
+    mcp.run()
@@ -0,0 +1,318 @@
+"""确定性的模拟聊天模型
+
+根据 planner 提示词中的城市、日期、景点与酒店信息生成合法的 TripPlan JSON
+(按天并行模式下生成骨架与单日行程),
+可配置首token延迟与输出速度, 用于离线压测。
+"""
+
+import asyncio
+import json
+import re
+import time
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TITLE = re.compile(r"生成\s*(\S+?)\s*的\s*(\d+)\s*天旅行计划")
+_SKELETON = re.compile(r"请为\s*(\S+?)\s*的\s*(\d+)\s*天行程分配每日景点与酒店")
+_DAY = re.compile(r"请生成\s*(\S+?)\s*第\s*(\d+)\s*天\((\d{4}-\d{2}-\d{2})\)的行程")
+_DATES = re.compile(r"日期:\s*(\d{4}-\d{2}-\d{2})\s*至\s*(\d{4}-\d{2}-\d{2})")
+_POI = re.compile(
+    r"^\s*-\s*(?P<name>[^|\n]+?)\s*\|\s*(?P<type>[^|\n]*?)\s*\|\s*(?P<address>[^|\n]*?)\s*\|"
+    r"\s*经纬度\s*(?P<lng>-?[\d.]+),(?P<lat>-?[\d.]+)(?P<rest>[^\n]*)$",
+    re.MULTILINE,
+)
+# 压缩节点输出的表格行: 名称|类别|经纬度|评分|人均(元)|地址
+_ROW = re.compile(
+    r"^(?P<name>[^|\n]+)\|(?P<type>[^|\n]*)\|(?P<lng>-?[\d.]+),(?P<lat>-?[\d.]+)\|"
+    r"(?P<rating>[\d.]*)\|(?P<cost>[\d.]*)\|(?P<address>[^\n]*)$",
+    re.MULTILINE,
+)
+_COST = re.compile(r"人均\s*([\d.]+)元")
+_RATING = re.compile(r"评分\s*([\d.]+)")
+
+
+def _section(text: str, title: str) -> str:
+    """取出 【title】 到下一个 【 之间的内容"""
+    start = text.find(f"【{title}】")
+    if start == -1:
+        return ""
+    end = text.find("【", start + len(title) + 2)
+    return text[start:end if end != -1 else len(text)]
+
+
+def _pois(text: str) -> List[Dict[str, Any]]:
+    pois = []
+    for match in _POI.finditer(text):
+        cost = _COST.search(match["rest"])
+        rating = _RATING.search(match["rest"])
+        pois.append({
+            "name": match["name"],
+            "type": match["type"],
+            "address": match["address"],
+            "location": {"longitude": float(match["lng"]), "latitude": float(match["lat"])},
+            "cost": float(cost.group(1)) if cost else None,
+            "rating": rating.group(1) if rating else None,
+        })
+    for match in _ROW.finditer(text):
+        pois.append({
+            "name": match["name"],
+            "type": match["type"],
+            "address": match["address"],
+            "location": {"longitude": float(match["lng"]), "latitude": float(match["lat"])},
+            "cost": float(match["cost"]) if match["cost"] else None,
+            "rating": match["rating"] or None,
+        })
+    return pois
+
+
+def _day_groups(section: str) -> Dict[int, List[Dict[str, Any]]]:
+    """按 "第N天" / "第N-M天" 标签分组的表格 -> {day_index: POI列表}"""
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    parts = re.split(r"^第(\d+)(?:-(\d+))?天$", section, flags=re.MULTILINE)
+    for i in range(1, len(parts) - 2, 3):
+        first = int(parts[i])
+        last = int(parts[i + 1] or first)
+        for day in range(first, last + 1):
+            groups[day - 1] = _pois(parts[i + 2])
+    return groups
+
+
+def _day(city: str, day_index: int, day_date: str, picked: List[Dict[str, Any]], hotel: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "date": day_date,
+        "day_index": day_index,
+        "description": f"第{day_index + 1}天: " + "、".join(p["name"] for p in picked),
+        "transportation": "公共交通",
+        "accommodation": "酒店",
+        "hotel": {
+            "name": hotel["name"],
+            "address": hotel["address"],
+            "location": hotel["location"],
+            "price_range": "300-500元",
+            "rating": hotel["rating"] or "4.5",
+            "distance": "距离景点2公里",
+            "type": hotel["type"] or "经济型酒店",
+            "estimated_cost": int(hotel["cost"] or 400),
+        } if hotel else None,
+        "attractions": [{
+            "name": p["name"],
+            "address": p["address"],
+            "location": p["location"],
+            "visit_duration": 120,
+            "description": f"{p['name']}是{city}的代表性景点",
+            "category": p["type"] or "景点",
+            "ticket_price": int(p["cost"] or 60),
+        } for p in picked],
+        "meals": [
+            {"type": "breakfast", "name": "酒店早餐", "description": "简单早餐", "estimated_cost": 30},
+            {"type": "lunch", "name": f"{city}特色午餐", "description": "当地小吃", "estimated_cost": 60},
+            {"type": "dinner", "name": f"{city}特色晚餐", "description": "地方菜", "estimated_cost": 100},
+        ],
+    }
+
+
+def _default_attractions(city: str) -> List[Dict[str, Any]]:
+    return [{
+        "name": f"{city}景点{i + 1}",
+        "type": "风景名胜",
+        "address": f"{city}市中心",
+        "location": {"longitude": 116.39 + i / 100, "latitude": 39.9 + i / 100},
+        "cost": None,
+        "rating": None,
+    } for i in range(3)]
+
+
+def build_trip_plan(prompt: str) -> Dict[str, Any]:
+    """根据 planner 提示词生成确定性的 TripPlan 字典"""
+    title = _TITLE.search(prompt)
+    city, travel_days = (title.group(1), int(title.group(2))) if title else ("北京", 1)
+    dates = _DATES.search(prompt)
+    start = date.fromisoformat(dates.group(1)) if dates else date.today()
+
+    attractions = _pois(_section(prompt, "景点信息")) or _default_attractions(city)
+    hotels = _pois(_section(prompt, "酒店信息"))
+
+    # 景点已按天分组、酒店已按天指定时按分组安排
+    groups = _day_groups(_section(prompt, "景点信息"))
+    day_hotels = _day_groups(_section(prompt, "酒店信息"))
+
+    days = []
+    for day_index in range(travel_days):
+        if day_index in groups:
+            picked = groups[day_index]
+        else:
+            picked = [attractions[(day_index * 3 + i) % len(attractions)] for i in range(min(3, len(attractions)))]
+        if day_hotels.get(day_index):
+            hotel = day_hotels[day_index][0]
+        else:
+            hotel = hotels[day_index % len(hotels)] if hotels else None
+        days.append(_day(city, day_index, (start + timedelta(days=day_index)).isoformat(), picked, hotel))
+
+    weather_info = [{
+        "date": day["date"],
+        "day_weather": "晴",
+        "night_weather": "多云",
+        "day_temp": 25,
+        "night_temp": 15,
+        "wind_direction": "南风",
+        "wind_power": "1-3级",
+    } for day in days]
+
+    return {
+        "city": city,
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=travel_days - 1)).isoformat(),
+        "days": days,
+        "weather_info": weather_info,
+        "overall_suggestions": f"{city}{travel_days}日游, 注意劳逸结合。",
+    }
+
+
+def build_skeleton(prompt: str) -> Dict[str, Any]:
+    """按天并行模式的骨架: 依次为每天分配 3 个景点"""
+    title = _SKELETON.search(prompt)
+    city, travel_days = title.group(1), int(title.group(2))
+    attractions = _pois(_section(prompt, "景点信息")) or _default_attractions(city)
+    hotels = _pois(_section(prompt, "酒店信息"))
+
+    return {
+        "days": [{
+            "day_index": day_index,
+            "theme": f"{city}第{day_index + 1}天",
+            "attractions": [attractions[(day_index * 3 + i) % len(attractions)]["name"] for i in range(min(3, len(attractions)))],
+            "hotel": hotels[0]["name"] if hotels else None,
+        } for day_index in range(travel_days)],
+        "overall_suggestions": f"{city}{travel_days}日游, 注意劳逸结合。",
+    }
+
+
+def build_day_plan(prompt: str) -> Dict[str, Any]:
+    """按天并行模式的单日行程"""
+    title = _DAY.search(prompt)
+    city, day_index, day_date = title.group(1), int(title.group(2)) - 1, title.group(3)
+    attractions = _pois(_section(prompt, "景点信息"))
+    hotels = _pois(_section(prompt, "酒店信息"))
+    return _day(city, day_index, day_date, attractions, hotels[0] if hotels else None)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    模拟 ChatOpenAI
+
+    - 提示词是旅行计划请求时输出 ```json 包裹的 TripPlan(按天并行模式下为骨架或单日行程),
+      否则输出简短文本
+    - first_token_latency: 首token前的等待(秒)
+    - tokens_per_second: 输出速度, 0 表示不限速
+    """
+
+    model: str = "fake-chat"
+    temperature: float = 0
+    first_token_latency: float = 0.0
+    tokens_per_second: float = 0.0
+    chars_per_token: int = 4
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def bind_tools(self, tools, **kwargs):
+        # 模拟模型不发起工具调用
+        return self
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        for pattern, build in ((_TITLE, build_trip_plan), (_SKELETON, build_skeleton), (_DAY, build_day_plan)):
+            if pattern.search(prompt):
+                data = build(prompt)
+                return "```json\n" + json.dumps(data, ensure_ascii=False, indent=2) + "\n```"
+        return "已完成查询: " + prompt[-50:]
+
+    def _tokens(self, text: str) -> List[str]:
+        size = max(1, self.chars_per_token)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _usage(self, messages: List[BaseMessage], tokens: List[str]) -> Dict[str, int]:
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        input_tokens = prompt_chars // max(1, self.chars_per_token)
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": len(tokens),
+            "total_tokens": input_tokens + len(tokens),
+        }
+
+    def _duration(self, tokens: List[str]) -> float:
+        rate = len(tokens) / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        return self.first_token_latency + rate
+
+    def _batch_size(self) -> int:
+        # 每批约 20ms 的输出, 避免逐token调度的开销
+        return max(1, int(self.tokens_per_second * 0.02)) if self.tokens_per_second > 0 else 1 << 30
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._respond(messages)
+        tokens = self._tokens(text)
+        time.sleep(self._duration(tokens))
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._respond(messages)
+        tokens = self._tokens(text)
+        await asyncio.sleep(self._duration(tokens))
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens = self._tokens(self._respond(messages))
+        time.sleep(self.first_token_latency)
+        batch = self._batch_size()
+        for start in range(0, len(tokens), batch):
+            for token in tokens[start:start + batch]:
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if self.tokens_per_second > 0:
+                time.sleep(batch / self.tokens_per_second)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, tokens)))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tokens = self._tokens(self._respond(messages))
+        await asyncio.sleep(self.first_token_latency)
+        batch = self._batch_size()
+        for start in range(0, len(tokens), batch):
+            for token in tokens[start:start + batch]:
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if self.tokens_per_second > 0:
+                await asyncio.sleep(batch / self.tokens_per_second)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, tokens)))
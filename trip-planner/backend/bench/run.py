@@ -0,0 +1,319 @@
+"""离线基准测试
+
+在进程内启动 FastAPI 应用(含启动/关闭事件), LLM 替换为 bench.fake_llm.FakeChatModel,
+amap-mcp-server 替换为 bench/fake_amap_server.py, Unsplash 请求由本地模拟返回,
+不访问任何外部服务。
+
+用法(在 backend 目录下):
+    python -m bench.run --scenario plan --requests 100 --concurrency 20
+    python -m bench.run --scenario mixed --requests 500 --concurrency 50 --llm-latency 0.5 --token-rate 300
+    python -m bench.run --scenario map --amap-latency 0.05 --json result.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+CITIES = ["北京", "上海", "成都", "西安", "杭州", "广州", "重庆", "南京", "武汉", "苏州"]
+PREFERENCES = [["历史文化"], ["美食"], ["自然风光"], ["购物", "美食"], []]
+
+SCENARIOS = ("plan", "stream", "map", "poi", "mixed")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="旅行规划后端离线基准测试")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed", help="压测场景")
+    parser.add_argument("--requests", type=int, default=100, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发数")
+    parser.add_argument("--warmup", type=int, default=5, help="预热请求数(不计入统计)")
+    parser.add_argument("--distinct", type=int, default=0, help="不同行程请求的数量, 0 表示每个请求都不同")
+    parser.add_argument("--days", type=int, default=3, help="行程天数")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="LLM首token延迟(秒)")
+    parser.add_argument("--token-rate", type=float, default=500, help="LLM输出速度(token/秒), 0表示不限速")
+    parser.add_argument("--amap-latency", type=float, default=0.02, help="每次地图工具调用的延迟(秒)")
+    parser.add_argument("--unsplash-latency", type=float, default=0.05, help="每次图片搜索的延迟(秒)")
+    parser.add_argument("--plan-cache", action="store_true", help="启用行程缓存")
+    parser.add_argument("--no-tool-cache", action="store_true", help="关闭地图工具调用缓存")
+    parser.add_argument("--json", dest="json_path", help="将结果写入JSON文件")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace):
+    """在导入应用之前设置环境变量, 使配置指向模拟服务"""
+    server = Path(__file__).with_name("fake_amap_server.py")
+    os.environ.update({
+        "AMAP_API_KEY": "bench",
+        "AMAP_MCP_COMMAND": sys.executable,
+        "AMAP_MCP_ARGS": f"{server} --latency {args.amap_latency}",
+        "AMAP_MCP_HEALTH_CHECK_INTERVAL": "0",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench"),
+        "UNSPLASH_ACCESS_KEY": "bench",
+        "PHOTO_CACHE_SQLITE_PATH": "",
+        "TOOL_CACHE_SQLITE_PATH": "",
+        "PLAN_CACHE_SQLITE_PATH": "",
+        "PLAN_CACHE_ENABLED": "true" if args.plan_cache else "false",
+        "TOOL_CACHE_ENABLED": "false" if args.no_tool_cache else "true",
+        "JOB_STORE_BACKEND": "memory",
+    })
+
+
+def install_fakes(args: argparse.Namespace):
+    """替换LLM与Unsplash客户端"""
+    from app.services.LLM import get_llm_registry
+    from app.services.unsplash_service import get_unsplash_service
+    from .fake_llm import FakeChatModel
+
+    get_llm_registry().set_factory(lambda model, temperature: FakeChatModel(
+        model=model,
+        temperature=temperature,
+        first_token_latency=args.llm_latency,
+        tokens_per_second=args.token_rate,
+    ))
+
+    async def unsplash_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(args.unsplash_latency)
+        query = request.url.params.get("query", "")
+        return httpx.Response(200, json={"results": [{
+            "id": str(abs(hash(query))),
+            "urls": {"regular": f"https://images.example.com/{query}.jpg", "thumb": ""},
+            "alt_description": query,
+            "user": {"name": "bench"},
+        }]})
+
+    service = get_unsplash_service()
+    service._client = httpx.AsyncClient(
+        base_url=service.base_url,
+        transport=httpx.MockTransport(unsplash_handler),
+    )
+
+
+# ============ 请求生成 ============
+
+def _trip_request(index: int, args: argparse.Namespace) -> Dict[str, Any]:
+    variant = index % args.distinct if args.distinct else index
+    city = CITIES[variant % len(CITIES)]
+    start = f"2025-{6 + variant // 300 % 6:02d}-{1 + variant // len(CITIES) % 28:02d}"
+    end_day = int(start[-2:]) + args.days - 1
+    return {
+        "city": city,
+        "start_date": start,
+        "end_date": f"{start[:-2]}{end_day:02d}",
+        "travel_days": args.days,
+        "transportation": "公共交通",
+        "accommodation": "经济型酒店",
+        "preferences": PREFERENCES[variant // len(CITIES) % len(PREFERENCES)],
+        "free_text_input": f"bench-{variant}",
+    }
+
+
+async def _plan(client: httpx.AsyncClient, index: int, args) -> List[Tuple[str, float, int]]:
+    started = time.perf_counter()
+    response = await client.post("/api/trip/plan", json=_trip_request(index, args))
+    return [("POST /api/trip/plan", time.perf_counter() - started, response.status_code)]
+
+
+async def _stream(client: httpx.AsyncClient, index: int, args) -> List[Tuple[str, float, int]]:
+    started = time.perf_counter()
+    samples = []
+    async with client.stream("POST", "/api/trip/plan/stream", json=_trip_request(index, args)) as response:
+        async for line in response.aiter_lines():
+            if line == "event: day" and not samples:
+                samples.append(("SSE first day", time.perf_counter() - started, response.status_code))
+            elif line == "event: error":
+                samples.append(("SSE error", time.perf_counter() - started, 500))
+    samples.append(("POST /api/trip/plan/stream", time.perf_counter() - started, response.status_code))
+    return samples
+
+
+async def _map(client: httpx.AsyncClient, index: int, args) -> List[Tuple[str, float, int]]:
+    city = CITIES[index % len(CITIES)]
+    kind = index % 3
+    started = time.perf_counter()
+    if kind == 0:
+        name = "GET /api/map/poi"
+        response = await client.get("/api/map/poi", params={"keywords": f"景点{index % 20}", "city": city})
+    elif kind == 1:
+        name = "GET /api/map/weather"
+        response = await client.get("/api/map/weather", params={"city": city})
+    else:
+        name = "POST /api/map/route"
+        response = await client.post("/api/map/route", json={
+            "origin_address": f"{city}火车站",
+            "destination_address": f"{city}景点{index % 20}",
+            "origin_city": city,
+            "destination_city": city,
+            "route_type": ("walking", "driving", "transit")[index % 3],
+        })
+    return [(name, time.perf_counter() - started, response.status_code)]
+
+
+async def _poi(client: httpx.AsyncClient, index: int, args) -> List[Tuple[str, float, int]]:
+    city = CITIES[index % len(CITIES)]
+    kind = index % 3
+    started = time.perf_counter()
+    if kind == 0:
+        name = "GET /api/poi/search"
+        response = await client.get("/api/poi/search", params={"keywords": f"博物馆{index % 20}", "city": city})
+    elif kind == 1:
+        name = "GET /api/poi/detail"
+        response = await client.get(f"/api/poi/detail/B0_{city}_博物馆_{index % 10}")
+    else:
+        name = "GET /api/poi/photo"
+        response = await client.get("/api/poi/photo", params={"name": f"{city}景点{index % 50}"})
+    return [(name, time.perf_counter() - started, response.status_code)]
+
+
+async def _mixed(client: httpx.AsyncClient, index: int, args) -> List[Tuple[str, float, int]]:
+    # 约 1/5 为行程规划, 其余为地图与POI查询
+    if index % 5 == 0:
+        return await _plan(client, index // 5, args)
+    if index % 5 in (1, 2):
+        return await _map(client, index, args)
+    return await _poi(client, index, args)
+
+
+SCENARIO_FUNCS: Dict[str, Callable] = {
+    "plan": _plan,
+    "stream": _stream,
+    "map": _map,
+    "poi": _poi,
+    "mixed": _mixed,
+}
+
+
+# ============ 统计 ============
+
+def percentile(values: List[float], q: float) -> float:
+    """线性插值百分位"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float) -> Dict[str, Any]:
+    by_endpoint: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+    for name, seconds, status in samples:
+        by_endpoint[name].append((seconds, status))
+
+    endpoints = {}
+    for name, items in sorted(by_endpoint.items()):
+        latencies = [seconds for seconds, _ in items]
+        statuses: Dict[str, int] = defaultdict(int)
+        for _, status in items:
+            statuses[str(status)] += 1
+        endpoints[name] = {
+            "count": len(items),
+            "errors": sum(1 for _, status in items if status >= 400),
+            "statuses": dict(statuses),
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": max(latencies) * 1000,
+        }
+    return endpoints
+
+
+def print_report(result: Dict[str, Any]):
+    print("\n" + "=" * 100)
+    print(f"场景: {result['scenario']}  请求: {result['requests']}  并发: {result['concurrency']}  "
+          f"耗时: {result['elapsed_s']:.2f}s  吞吐: {result['throughput_rps']:.1f} req/s")
+    print(f"内存: RSS峰值 {result['peak_rss_mb']:.1f} MB (启动后 {result['baseline_rss_mb']:.1f} MB)")
+    print("-" * 100)
+    print(f"{'接口':<32}{'次数':>7}{'错误':>7}{'平均ms':>10}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}{'最大ms':>10}")
+    for name, stats in result["endpoints"].items():
+        print(f"{name:<32}{stats['count']:>7}{stats['errors']:>7}{stats['mean_ms']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+    print("=" * 100)
+
+
+def _peak_rss_mb() -> float:
+    # Linux 上 ru_maxrss 单位为KB, macOS 上为字节
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# ============ 执行 ============
+
+async def drive(client: httpx.AsyncClient, func: Callable, total: int, concurrency: int, args, offset: int = 0):
+    """以固定并发执行 total 个请求"""
+    samples: List[Tuple[str, float, int]] = []
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            try:
+                samples.extend(await func(client, offset + index, args))
+            except Exception as e:
+                samples.append((f"EXCEPTION {type(e).__name__}", 0.0, 599))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return samples
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    from app.api.main import app
+
+    install_fakes(args)
+    func = SCENARIO_FUNCS[args.scenario]
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            if args.warmup:
+                # 预热使用独立的请求序号, 避免提前填充被测请求的缓存
+                await drive(client, func, args.warmup, min(args.warmup, args.concurrency), args, offset=10 ** 6)
+
+            baseline_rss = _peak_rss_mb()
+            started = time.perf_counter()
+            samples = await drive(client, func, args.requests, args.concurrency, args)
+            elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": args.scenario,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": elapsed,
+        "throughput_rps": args.requests / elapsed if elapsed else 0.0,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+        "settings": {
+            "llm_latency": args.llm_latency,
+            "token_rate": args.token_rate,
+            "amap_latency": args.amap_latency,
+            "unsplash_latency": args.unsplash_latency,
+            "days": args.days,
+            "distinct": args.distinct,
+            "plan_cache": args.plan_cache,
+            "tool_cache": not args.no_tool_cache,
+        },
+        "endpoints": summarize(samples, elapsed),
+    }
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    configure_environment(arguments)
+    result = asyncio.run(main(arguments))
+    print_report(result)
+
+    if arguments.json_path:
+        with open(arguments.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {arguments.json_path}")
@@ -0,0 +1,2 @@
+# 先加载工作流包: agents 模块经由 workflow.state 导入时会触发 graph 的循环导入
+import app.workflow  # noqa: F401
@@ -0,0 +1,114 @@
+"""高德MCP工具结果解析"""
+
+import pytest
+
+from app.tools.amap_parser import (
+    AmapResultError,
+    extract_text,
+    load_result,
+    parse_geocode,
+    parse_location,
+    parse_poi,
+    parse_pois,
+    parse_route,
+    parse_weather,
+)
+
+
+def test_extract_text_from_adapter_shapes():
+    assert extract_text('{"a": 1}') == '{"a": 1}'
+    assert extract_text([{"type": "text", "text": '{"a"'}, {"type": "text", "text": ": 1}"}]) == '{"a": 1}'
+    assert extract_text(('{"a": 1}', None)) == '{"a": 1}'
+
+
+def test_load_result_strips_surrounding_text():
+    assert load_result('结果如下: {"status": "1", "pois": []} 以上') == {"status": "1", "pois": []}
+
+
+@pytest.mark.parametrize("result", ['{"error": "INVALID_USER_KEY"}', "服务暂不可用", "[1, 2]"])
+def test_load_result_rejects_errors(result):
+    with pytest.raises(AmapResultError):
+        load_result(result)
+
+
+def test_parse_location():
+    assert parse_location("116.397,39.908").longitude == 116.397
+    assert parse_location({"lng": "121.47", "lat": "31.23"}).latitude == 31.23
+    assert parse_location("") is None
+    assert parse_location("116.397,") is None
+    assert parse_location([]) is None
+
+
+def test_parse_poi_normalizes_empty_fields():
+    poi = parse_poi({
+        "id": "B000A8UIN8",
+        "name": "故宫博物院",
+        "type": [],
+        "typecode": "110201",
+        "address": [],
+        "location": "116.397,39.918",
+        "tel": [],
+        "biz_ext": {"rating": "4.9", "cost": []},
+    })
+    assert poi.type == "110201" and poi.address == "" and poi.tel is None
+    assert poi.rating == 4.9 and poi.cost is None
+
+    # 没有坐标或ID的结果由调用方补查详情
+    assert parse_poi({"id": "B1", "name": "x", "location": ""}) is None
+    assert parse_poi({"name": "x", "location": "116.3,39.9"}) is None
+
+
+def test_parse_pois_skips_non_objects():
+    assert parse_pois({"pois": [{"id": "1"}, "x", None]}) == [{"id": "1"}]
+    assert parse_pois({"pois": "[]"}) == []
+
+
+def test_parse_weather_both_shapes():
+    casts = [
+        {"date": "2026-05-01", "dayweather": "晴", "nightweather": "多云", "daytemp": "25",
+         "nighttemp": "15", "daywind": "南", "daypower": "1-3"},
+        {"date": "2026-05-02", "dayweather": "雨", "daypower": "4级"},
+        {"dayweather": "缺少日期"},
+    ]
+    mcp = parse_weather({"forecasts": casts})
+    rest = parse_weather({"forecasts": [{"city": "北京市", "casts": casts}]})
+
+    assert mcp == rest
+    assert [w.date for w in mcp] == ["2026-05-01", "2026-05-02"]
+    assert mcp[0].wind_power == "1-3级" and mcp[1].wind_power == "4级"
+    assert mcp[0].day_temp == 25
+
+
+def test_parse_route_transit_and_paths():
+    transit = parse_route({"route": {"distance": "9000", "transits": [{
+        "duration": "1800",
+        "segments": [
+            {"bus": {"buslines": [{"name": "地铁1号线"}]}},
+            {"bus": {"buslines": []}},
+            {"bus": {"buslines": [{"name": "52路"}]}},
+        ],
+    }]}}, "transit")
+    assert transit.distance == 9000 and transit.duration == 1800
+    assert transit.description == "地铁1号线 → 52路"
+
+    walking = parse_route({"route": {"paths": [{
+        "distance": "1200", "duration": "900",
+        "steps": [{"instruction": "向北步行100米"}, {"instruction": "右转"}],
+    }]}}, "walking")
+    assert walking.distance == 1200 and walking.description == "向北步行100米；右转"
+
+    assert parse_route({"route": {"paths": []}}, "driving") is None
+    assert parse_route({}, "driving") is None
+
+
+def test_parse_geocode_takes_first_located_match():
+    result = parse_geocode({"return": [
+        {"location": "", "level": "城市"},
+        {"location": "116.397,39.918", "level": "兴趣点"},
+    ]})
+    assert result.level == "兴趣点" and result.location.latitude == 39.918
+
+    rest = parse_geocode({"geocodes": [{"location": "121.47,31.23", "level": []}]})
+    assert rest.level == "" and rest.location.longitude == 121.47
+
+    assert parse_geocode({"return": []}) is None
@@ -0,0 +1,70 @@
+"""由每日行程计算预算"""
+
+import pytest
+
+from app.agents.budget import DETOUR_FACTOR, TRANSPORT_COSTS, compute_budget, transport_cost
+from app.geo import haversine_km
+from app.models.schemas import Attraction, DayPlan, Hotel, Location, Meal
+
+
+def _attraction(name: str, longitude: float, latitude: float, price: int = 0) -> Attraction:
+    return Attraction(
+        name=name, address="", location=Location(longitude=longitude, latitude=latitude),
+        visit_duration=60, description="", ticket_price=price,
+    )
+
+
+def _day(attractions, hotel=None, meals=(), transportation="公共交通") -> DayPlan:
+    return DayPlan(
+        date="2026-05-01", day_index=0, description="", transportation=transportation,
+        accommodation="", hotel=hotel, attractions=list(attractions), meals=list(meals),
+    )
+
+
+HOTEL = Hotel(name="酒店", location=Location(longitude=116.40, latitude=39.90), estimated_cost=400)
+FAR = [_attraction("A", 116.45, 39.93, 60), _attraction("B", 116.30, 39.99, 40)]
+
+
+def _expected(stops, transportation):
+    model = TRANSPORT_COSTS[transportation]
+    cost = model["per_day"]
+    for origin, destination in zip(stops, stops[1:]):
+        km = haversine_km(origin, destination) * DETOUR_FACTOR
+        if km > model["walk_km"]:
+            cost += model["per_leg"] + km * model["per_km"]
+    return round(cost)
+
+
+@pytest.mark.parametrize("transportation", ["公共交通", "自驾", "混合", "步行"])
+def test_round_trip_from_hotel(transportation):
+    day = _day(FAR, hotel=HOTEL, transportation=transportation)
+    stops = [HOTEL.location, FAR[0].location, FAR[1].location, HOTEL.location]
+    assert transport_cost(day) == _expected(stops, transportation)
+
+
+def test_short_legs_are_walked():
+    # 两个景点相距约 0.3km, 换算道路距离后仍在步行范围内
+    close = [_attraction("A", 116.400, 39.900), _attraction("B", 116.403, 39.901)]
+    assert transport_cost(_day(close)) == 0
+    assert transport_cost(_day(close), "自驾") == TRANSPORT_COSTS["自驾"]["per_day"] + round(
+        haversine_km(close[0].location, close[1].location) * DETOUR_FACTOR * TRANSPORT_COSTS["自驾"]["per_km"]
+    )
+
+
+def test_unknown_transport_and_empty_day():
+    assert transport_cost(_day(FAR, transportation="骑行")) == transport_cost(_day(FAR))
+    assert transport_cost(_day([], transportation="自驾")) == 0
+
+
+def test_budget_totals_match_items():
+    meals = [Meal(type="lunch", name="午餐", estimated_cost=80), Meal(type="dinner", name="晚餐", estimated_cost=120)]
+    days = [_day(FAR, hotel=HOTEL, meals=meals), _day(FAR[:1])]
+
+    budget = compute_budget(days, "公共交通")
+    assert budget.total_attractions == 60 + 40 + 60
+    assert budget.total_hotels == 400
+    assert budget.total_meals == 200
+    assert budget.total_transportation == sum(transport_cost(day, "公共交通") for day in days)
+    assert budget.total == (
+        budget.total_attractions + budget.total_hotels + budget.total_meals + budget.total_transportation
+    )
@@ -0,0 +1,85 @@
+"""两级缓存: 内存LRU、过期、负缓存与SQLite磁盘层回填"""
+
+import asyncio
+
+from app.services import cache as cache_module
+from app.services.cache import MISSING, TTLCache, TieredCache, make_cache_key
+
+
+def test_cache_key_is_canonical():
+    assert make_cache_key("poi", {"city": "北京", "keywords": "故宫"}) == \
+        make_cache_key("poi", {"keywords": "故宫", "city": "北京"})
+    assert make_cache_key("poi", {"city": "北京"}) != make_cache_key("weather", {"city": "北京"})
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = TTLCache()
+    cache.set("a", 1, ttl=10)
+
+    now[0] += 9.9
+    assert cache.get("a") == 1
+    now[0] += 0.2
+    assert cache.get("a") is MISSING
+    assert len(cache) == 0
+
+
+def test_tiered_cache_keeps_none_and_skips_zero_ttl():
+    async def run():
+        cache = TieredCache("test")
+        await cache.set("empty", None, ttl=60)
+        await cache.set("skipped", 1, ttl=0)
+        return await cache.get("empty"), await cache.get("skipped"), cache.info()
+
+    empty, skipped, info = asyncio.run(run())
+    # None 是合法的缓存值(负缓存), 与未命中区分
+    assert empty is None
+    assert skipped is MISSING
+    assert info["hits"] == 1 and info["misses"] == 1 and info["sets"] == 1
+
+
+def test_tiered_cache_backfills_memory_from_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+
+    async def run():
+        writer = TieredCache("writer", sqlite_path=path)
+        await writer.set("k", {"pois": [1, 2]}, ttl=60)
+        writer.close()
+
+        reader = TieredCache("reader", sqlite_path=path)
+        first = await reader.get("k")
+        second = await reader.get("k")
+        info = reader.info()
+        reader.close()
+        return first, second, info
+
+    first, second, info = asyncio.run(run())
+    assert first == second == {"pois": [1, 2]}
+    assert info["hits"] == 2 and info["disk_hits"] == 1 and info["entries"] == 1
+
+
+def test_tiered_cache_survives_unserializable_values(tmp_path):
+    async def run():
+        cache = TieredCache("test", sqlite_path=str(tmp_path / "cache.sqlite"))
+        value = object()
+        await cache.set("k", value, ttl=60)
+        result = await cache.get("k")
+        cache.close()
+        return value, result
+
+    value, result = asyncio.run(run())
+    # 磁盘层写入失败只打印警告, 内存层仍然可用
+    assert result is value
@@ -0,0 +1,81 @@
+"""容量均衡聚类"""
+
+import numpy as np
+
+from app.geo.cluster import BALANCE_SLACK, balanced_clusters
+
+
+def _random_points(rng, n):
+    return np.radians(np.column_stack([39.9 + rng.random(n) * 0.2, 116.3 + rng.random(n) * 0.2]))
+
+
+def test_partition_and_load_bound():
+    rng = np.random.default_rng(22)
+    for _ in range(200):
+        n = int(rng.integers(1, 30))
+        k = int(rng.integers(1, 8))
+        points = _random_points(rng, n)
+        weights = rng.choice([60, 90, 120, 150], n).astype(float)
+
+        clusters = balanced_clusters(points, weights, k)
+        assert len(clusters) == k
+        assert sorted(i for cluster in clusters for i in cluster) == list(range(n))
+
+        # 放不下时分给负载最小的簇, 负载最多超出容量一个点的权重
+        k_eff = min(k, n)
+        capacity = weights.sum() / k_eff * (1 + BALANCE_SLACK)
+        assert max(weights[c].sum() for c in clusters) <= capacity + weights.max()
+
+
+def test_equal_weights_stay_within_capacity():
+    rng = np.random.default_rng(23)
+    for _ in range(100):
+        k = int(rng.integers(2, 6))
+        n = k * 3
+        clusters = balanced_clusters(_random_points(rng, n), np.full(n, 120.0), k)
+        assert all(len(cluster) == 3 for cluster in clusters)
+
+
+def test_separated_groups_ordered_west_to_east():
+    rng = np.random.default_rng(24)
+    centers = [(39.9, 116.0), (39.9, 116.5), (39.9, 117.0)]
+    # 打乱顺序, 结果应与输入顺序无关
+    labels = rng.permutation(np.repeat(np.arange(3), 4))
+    points = np.radians([
+        (centers[c][0] + rng.normal(0, 0.01), centers[c][1] + rng.normal(0, 0.01))
+        for c in labels
+    ])
+
+    clusters = balanced_clusters(points, np.full(len(points), 120.0), 3)
+    assert [sorted(set(labels[c].tolist())) for c in clusters] == [[0], [1], [2]]
+
+
+def test_more_days_than_points():
+    points = _random_points(np.random.default_rng(25), 2)
+    clusters = balanced_clusters(points, np.full(2, 120.0), 4)
+    assert sorted(len(cluster) for cluster in clusters) == [0, 0, 1, 1]
+    assert clusters[2:] == [[], []]
+
+
+def test_no_empty_day_when_enough_points():
+    rng = np.random.default_rng(26)
+    for trial in range(600):
+        n = int(rng.integers(1, 25))
+        k = int(rng.integers(1, n + 1))
+        if trial % 2:
+            # 重复坐标: 只有 3 个不同地点
+            base = np.column_stack([39.9 + rng.random(3) * 0.2, 116.3 + rng.random(3) * 0.2])
+            points = np.radians(base[rng.integers(0, 3, n)])
+        else:
+            points = _random_points(rng, n)
+        weights = rng.choice([60, 90, 120, 240], n).astype(float)
+
+        clusters = balanced_clusters(points, weights, k)
+        assert all(clusters), (n, k)
+        assert sorted(i for cluster in clusters for i in cluster) == list(range(n))
+
+
+def test_identical_points_fill_every_day():
+    points = np.radians([[39.9, 116.4]] * 5)
+    clusters = balanced_clusters(points, np.full(5, 120.0), 3)
+    assert sorted(len(cluster) for cluster in clusters) == [1, 2, 2]
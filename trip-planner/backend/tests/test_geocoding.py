@@ -0,0 +1,101 @@
+"""计划坐标校验: 精确编码结果替换、候选POI沿用、无法核实的提示"""
+
+import asyncio
+
+from app.agents import geocoding
+from app.geo import get_spatial_index
+from app.models.schemas import Attraction, DayPlan, GeocodeResult, Hotel, Location, Meal, POIInfo, TripPlan
+
+CITY = "坐标测试城"
+CENTER = Location(longitude=116.40, latitude=39.90)
+
+
+def _loc(longitude: float, latitude: float) -> Location:
+    return Location(longitude=longitude, latitude=latitude)
+
+
+def _attraction(name: str, address: str, location: Location) -> Attraction:
+    return Attraction(name=name, address=address, location=location, visit_duration=60, description="")
+
+
+def _plan(attractions, hotel=None, meals=()) -> TripPlan:
+    day = DayPlan(
+        date="2026-05-01", day_index=0, description="", transportation="公共交通",
+        accommodation="", hotel=hotel, attractions=list(attractions), meals=list(meals),
+    )
+    return TripPlan(city=CITY, start_date="2026-05-01", end_date="2026-05-01", days=[day], overall_suggestions="")
+
+
+class FakeAmap:
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    async def geocode_many(self, addresses, city=None, concurrency=8):
+        self.queries.extend(addresses)
+        return {address: self.results.get(address) for address in addresses}
+
+
+def _validate(monkeypatch, plan, results):
+    amap = FakeAmap(results)
+    monkeypatch.setattr(geocoding, "get_amap_service", lambda: amap)
+    corrected, warnings = asyncio.run(geocoding.validate_locations(plan, CITY))
+    return corrected, warnings, amap.queries
+
+
+def test_precise_geocodes_replace_distant_coordinates(monkeypatch):
+    moved = _attraction("故宫", "景山前街4号", _loc(116.45, 39.95))
+    close = _attraction("天坛", "天坛东里甲1号", _loc(116.411, 39.882))
+    plan = _plan([moved, close])
+
+    corrected, warnings, _ = _validate(monkeypatch, plan, {
+        CITY: GeocodeResult(location=CENTER, level="城市"),
+        "景山前街4号": GeocodeResult(location=_loc(116.397, 39.918), level="兴趣点"),
+        "天坛东里甲1号": GeocodeResult(location=_loc(116.410, 39.881), level="门牌号"),
+    })
+
+    assert corrected == 1 and warnings == []
+    assert (moved.location.longitude, moved.location.latitude) == (116.397, 39.918)
+    # 在容差范围内的模型坐标保留
+    assert (close.location.longitude, close.location.latitude) == (116.411, 39.882)
+
+
+def test_imprecise_or_out_of_city_geocodes_only_warn(monkeypatch):
+    road = _attraction("胡同", "南锣鼓巷", _loc(0, 0))
+    elsewhere = _attraction("同名景点", "人民路1号", _loc(116.39, 39.91))
+    plan = _plan([road, elsewhere])
+
+    corrected, warnings, _ = _validate(monkeypatch, plan, {
+        CITY: GeocodeResult(location=CENTER, level="城市"),
+        "南锣鼓巷": GeocodeResult(location=_loc(116.403, 39.937), level="道路"),
+        "人民路1号": GeocodeResult(location=_loc(121.47, 31.23), level="门牌号"),
+    })
+
+    assert corrected == 0
+    assert (road.location.longitude, road.location.latitude) == (0, 0)
+    assert (elsewhere.location.longitude, elsewhere.location.latitude) == (116.39, 39.91)
+    assert warnings == ["第1天「胡同」的位置未能核实, 请以实际地址为准"]
+
+
+def test_unknown_city_center_never_replaces(monkeypatch):
+    attraction = _attraction("故宫", "景山前街4号", _loc(116.45, 39.95))
+    corrected, warnings, _ = _validate(monkeypatch, _plan([attraction]), {
+        "景山前街4号": GeocodeResult(location=_loc(116.397, 39.918), level="兴趣点"),
+    })
+
+    assert corrected == 0 and warnings == []
+    assert attraction.location.latitude == 39.95
+
+
+def test_candidate_pois_and_meals_without_address_are_skipped(monkeypatch):
+    get_spatial_index(CITY).add(POIInfo(
+        id="H1", name="北京饭店", type="酒店", address="东长安街33号", location=_loc(116.4108, 39.9085),
+    ))
+    hotel = Hotel(name="北京饭店", address="东长安街33号", location=_loc(116.4108, 39.9085))
+    meal = Meal(type="lunch", name="午餐", location=_loc(0, 0))
+    plan = _plan([], hotel=hotel, meals=[meal])
+
+    corrected, warnings, queries = _validate(monkeypatch, plan, {})
+
+    # 照抄候选POI的地点不参与编码; 没有可校验的地点时不发起请求
+    assert (corrected, warnings, queries) == (0, [], [])
@@ -0,0 +1,64 @@
+"""酒店选址: 动态规划与枚举全部入住安排的结果对比"""
+
+import itertools
+
+import numpy as np
+
+from app.agents.hotel_placement import SWITCH_PENALTY, assign_hotels
+
+
+def _total(scores: np.ndarray, plan, penalty: float) -> float:
+    switches = sum(a != b for a, b in zip(plan, plan[1:]))
+    return float(sum(scores[h, day] for day, h in enumerate(plan))) - penalty * switches
+
+
+def test_assignment_matches_brute_force():
+    rng = np.random.default_rng(23)
+    for _ in range(300):
+        n_hotels = int(rng.integers(1, 5))
+        n_days = int(rng.integers(1, 6))
+        scores = rng.random((n_hotels, n_days))
+        penalty = float(rng.choice([0.0, SWITCH_PENALTY, 0.5]))
+
+        plan = assign_hotels(scores, penalty)
+        assert len(plan) == n_days
+        best = max(
+            _total(scores, candidate, penalty)
+            for candidate in itertools.product(range(n_hotels), repeat=n_days)
+        )
+        assert abs(_total(scores, plan, penalty) - best) < 1e-9
+
+
+def test_large_penalty_keeps_one_hotel():
+    scores = np.array([[1.0, 0.0, 1.0], [0.0, 1.0, 0.0]])
+    assert assign_hotels(scores, switch_penalty=10.0) == [0, 0, 0]
+    assert assign_hotels(scores, switch_penalty=0.0) == [0, 1, 0]
+
+
+def _switches(plan) -> int:
+    return sum(a != b for a, b in zip(plan, plan[1:]))
+
+
+def test_switch_only_when_gain_exceeds_penalty():
+    # 后三天酒店1每晚多 margin 分: 三晚累计的收益超过一次换酒店的惩罚才换
+    for margin, expected in ((0.04, [0, 0, 0, 0, 0, 0]), (0.06, [0, 0, 0, 1, 1, 1])):
+        scores = np.array([
+            [0.8, 0.8, 0.8, 0.5, 0.5, 0.5],
+            [0.5, 0.5, 0.5, 0.5 + margin, 0.5 + margin, 0.5 + margin],
+        ])
+        assert assign_hotels(scores, SWITCH_PENALTY) == expected
+
+
+def test_single_better_night_costs_two_switches():
+    # 中间一晚换到酒店1再换回来需要两次惩罚
+    for gain, expected in ((0.25, [0, 0, 0]), (0.35, [0, 1, 0])):
+        scores = np.array([[0.5, 0.5, 0.5], [0.0, 0.5 + gain, 0.0]])
+        assert assign_hotels(scores, SWITCH_PENALTY) == expected
+
+
+def test_switches_decrease_with_penalty():
+    rng = np.random.default_rng(24)
+    for _ in range(100):
+        scores = rng.random((int(rng.integers(2, 5)), int(rng.integers(2, 8))))
+        counts = [_switches(assign_hotels(scores, penalty)) for penalty in (0.0, 0.1, 0.2, 0.4, 0.8)]
+        assert counts == sorted(counts, reverse=True)
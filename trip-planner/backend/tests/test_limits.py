@@ -0,0 +1,106 @@
+"""准入控制: 并发与排队上限、排队超时、令牌桶限速"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.limits import ConcurrencyLimiter, OverloadedError, TokenBucket
+
+
+def test_retry_after_is_rounded_up():
+    assert OverloadedError("amap", 0.2).retry_after == 1
+    assert OverloadedError("amap", 2.1).retry_after == 3
+
+
+def test_rejects_when_concurrency_and_queue_are_full():
+    async def run():
+        limiter = ConcurrencyLimiter("test", max_concurrency=2, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot():
+                await release.wait()
+
+        holders = [asyncio.create_task(hold()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        info = limiter.info()
+
+        with pytest.raises(OverloadedError) as excinfo:
+            async with limiter.slot():
+                pass
+
+        release.set()
+        await asyncio.gather(*holders)
+        return limiter, info, excinfo.value
+
+    limiter, info, error = asyncio.run(run())
+    assert info["active"] == 2 and info["waiting"] == 1
+    assert error.upstream == "test" and error.retry_after == 5
+    assert limiter.rejected == 1
+    assert limiter.info()["active"] == 0 and limiter.info()["waiting"] == 0
+
+
+def test_rejects_after_queue_timeout():
+    async def run():
+        limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        async with limiter.slot():
+            with pytest.raises(OverloadedError, match="等待超时"):
+                async with limiter.slot():
+                    pass
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.rejected == 1 and limiter.info()["waiting"] == 0
+
+
+def test_slot_released_on_error():
+    async def run():
+        limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=0, queue_timeout=0.05)
+        with pytest.raises(ValueError):
+            async with limiter.slot():
+                raise ValueError("boom")
+        # 名额已归还, 不会因等待超时被拒绝
+        async with limiter.slot():
+            pass
+        return limiter
+
+    assert asyncio.run(run()).rejected == 0
+
+
+def test_token_bucket_spaces_calls_after_burst():
+    async def run():
+        bucket = TokenBucket(rate=20, burst=2)
+        started = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 前两次使用积累的令牌, 后两次各等待 1/20 秒
+    elapsed = asyncio.run(run())
+    assert 0.08 <= elapsed < 0.5
+
+
+def test_token_bucket_rejects_waits_beyond_timeout():
+    async def run():
+        bucket = TokenBucket(rate=1, burst=1)
+        await bucket.acquire(timeout=0)
+        with pytest.raises(OverloadedError, match="超出请求速率"):
+            await bucket.acquire(timeout=0.1)
+
+    asyncio.run(run())
+
+
+def test_rate_limited_slot_reports_limiter_name():
+    async def run():
+        limiter = ConcurrencyLimiter("llm", max_concurrency=4, max_queue=4, queue_timeout=0.05, rate=1, burst=1)
+        async with limiter.slot():
+            pass
+        with pytest.raises(OverloadedError) as excinfo:
+            async with limiter.slot():
+                pass
+        return limiter, excinfo.value
+
+    limiter, error = asyncio.run(run())
+    assert error.upstream == "llm" and limiter.rejected == 1
+    assert limiter.info()["active"] == 0
@@ -0,0 +1,137 @@
+"""TripPlan 增量解析: 分块边界、字符串中的括号、校验失败与缺省字段"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.agents.plan_parser import TripPlanParseError, TripPlanStreamParser, parse_trip_plan_stream
+
+
+def _day(index: int, description: str = "游览") -> dict:
+    return {
+        "date": f"2026-05-0{index + 1}",
+        "day_index": index,
+        "description": description,
+        "transportation": "地铁",
+        "accommodation": "酒店",
+        "attractions": [],
+        "meals": [],
+    }
+
+
+def _plan(**overrides) -> dict:
+    plan = {
+        "city": "北京",
+        "start_date": "2026-05-01",
+        "end_date": "2026-05-03",
+        "days": [_day(0), _day(1), _day(2)],
+        "weather_info": [{"date": "2026-05-01", "day_weather": "晴", "day_temp": "25°C"}],
+        "overall_suggestions": "注意防晒",
+        "budget": {"total": 1200},
+    }
+    plan.update(overrides)
+    return plan
+
+
+def _pieces(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+async def _stream(pieces):
+    for piece in pieces:
+        yield piece
+
+
+def _collect(pieces):
+    async def run():
+        return [event async for event in parse_trip_plan_stream(_stream(pieces))]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, 100000])
+def test_days_split_across_chunks(size):
+    text = "```json\n" + json.dumps(_plan(), ensure_ascii=False) + "\n```"
+    events = _collect(_pieces(text, size))
+
+    kinds = [kind for kind, _ in events]
+    assert kinds == ["day", "day", "day", "weather", "budget", "plan"]
+    assert [day.day_index for kind, day in events if kind == "day"] == [0, 1, 2]
+    plan = events[-1][1]
+    assert plan.city == "北京" and len(plan.days) == 3 and plan.budget.total == 1200
+
+
+def test_days_emitted_as_soon_as_they_close():
+    text = json.dumps(_plan(), ensure_ascii=False)
+    first_end = text.index("}", text.index('"days"')) + 1
+
+    parser = TripPlanStreamParser()
+    assert parser.feed(text[:first_end - 1]) == []
+    events = parser.feed(text[first_end - 1:first_end])
+    assert [(kind, day.day_index) for kind, day in events] == [("day", 0)]
+
+
+def test_braces_inside_strings():
+    tricky = '景区{东门}入场, 路线 [A]→[B], 引号\\"内\\"的 "}]"'
+    plan = _plan(days=[_day(0, tricky), _day(1, "{{{"), _day(2, "]]}}")], overall_suggestions="{}[]")
+    events = _collect(_pieces(json.dumps(plan, ensure_ascii=False), 2))
+
+    days = [day for kind, day in events if kind == "day"]
+    assert [day.description for day in days] == [tricky, "{{{", "]]}}"]
+    assert events[-1][1].overall_suggestions == "{}[]"
+
+
+def test_malformed_day_fails_fast():
+    bad = _day(1)
+    del bad["description"]
+    text = json.dumps(_plan(days=[_day(0), bad, _day(2)]), ensure_ascii=False)
+    second_end = text.index('"day_index": 2') - 1
+
+    consumed = []
+
+    async def chunks():
+        for piece in _pieces(text, 5):
+            consumed.append(piece)
+            yield piece
+
+    async def run():
+        events = []
+        with pytest.raises(TripPlanParseError, match="DayPlan"):
+            async for event in parse_trip_plan_stream(chunks()):
+                events.append(event)
+        return events
+
+    events = asyncio.run(run())
+    assert [kind for kind, _ in events] == ["day"]
+    # 第二天闭合后立即失败, 不再读取后续输出
+    assert len("".join(consumed)) < second_end + 5
+
+
+def test_mismatched_brackets_fail_fast():
+    parser = TripPlanStreamParser()
+    with pytest.raises(TripPlanParseError, match="不匹配"):
+        parser.feed('{"days": [{"date": "2026-05-01"]')
+
+
+def test_missing_weather_and_budget_at_close():
+    plan = _plan()
+    del plan["weather_info"], plan["budget"]
+    events = _collect(_pieces(json.dumps(plan, ensure_ascii=False), 11))
+
+    assert [kind for kind, _ in events] == ["day", "day", "day", "plan"]
+    result = events[-1][1]
+    assert result.weather_info == [] and result.budget is None
+
+
+def test_incomplete_output_at_close():
+    text = json.dumps(_plan(), ensure_ascii=False)
+    parser = TripPlanStreamParser()
+    parser.feed(text[:-1])
+    with pytest.raises(TripPlanParseError, match="不完整"):
+        parser.close()
+
+
+def test_trailing_output_after_root_is_ignored():
+    text = json.dumps(_plan(), ensure_ascii=False) + "\n```\n以上是行程 {不是JSON"
+    events = _collect(_pieces(text, 9))
+    assert events[-1][0] == "plan" and len(events[-1][1].days) == 3
@@ -0,0 +1,82 @@
+"""游览顺序优化: 与枚举全部排列的最优解对比"""
+
+import itertools
+
+import numpy as np
+
+from app.geo.distance import haversine_matrix
+from app.geo.route import order_stops, route_length
+
+CASES = 100
+
+
+def _random_days(seed: int):
+    """随机生成 2~6 个景点(外加一个酒店)的单日距离矩阵, 范围约 20 公里"""
+    rng = np.random.default_rng(seed)
+    for _ in range(CASES):
+        n = int(rng.integers(2, 7)) + 1
+        points = np.radians(np.column_stack([39.9 + rng.random(n) * 0.2, 116.3 + rng.random(n) * 0.2]))
+        yield haversine_matrix(points)
+
+
+def test_closed_route_close_to_optimum():
+    ratios = []
+    for dist in _random_days(21):
+        order = order_stops(dist, depot=0)
+        assert sorted(order) == list(range(1, len(dist)))
+
+        length = route_length([0, *order, 0], dist)
+        best = min(
+            route_length([0, *perm, 0], dist)
+            for perm in itertools.permutations(range(1, len(dist)))
+        )
+        ratios.append(length / best)
+
+    assert max(ratios) <= 1.15
+    assert np.mean(ratios) <= 1.01
+
+
+def test_open_route_close_to_optimum():
+    ratios = []
+    for dist in _random_days(22):
+        order = order_stops(dist)
+        assert sorted(order) == list(range(len(dist)))
+
+        length = route_length(order, dist)
+        best = min(route_length(perm, dist) for perm in itertools.permutations(range(len(dist))))
+        ratios.append(length / best)
+
+    assert max(ratios) <= 1.15
+    assert np.mean(ratios) <= 1.01
+
+
+def test_fewer_than_three_stops():
+    dist = haversine_matrix(np.radians([[39.90, 116.40], [39.95, 116.45]]))
+
+    assert order_stops(dist[:0, :0]) == []
+    assert order_stops(dist[:1, :1]) == [0]
+    assert order_stops(dist[:1, :1], depot=0) == []
+    assert sorted(order_stops(dist)) == [0, 1]
+    assert order_stops(dist, depot=0) == [1]
+    assert order_stops(dist, depot=1) == [0]
+
+
+def test_duplicate_coordinates():
+    rng = np.random.default_rng(23)
+    for _ in range(50):
+        base = np.column_stack([39.9 + rng.random(3) * 0.2, 116.3 + rng.random(3) * 0.2])
+        # 同一地点的多个景点(如同一园区内), 距离为 0
+        points = np.radians(base[rng.integers(0, 3, int(rng.integers(3, 7)))])
+        dist = haversine_matrix(points)
+
+        open_order = order_stops(dist)
+        assert sorted(open_order) == list(range(len(dist)))
+        best = min(route_length(perm, dist) for perm in itertools.permutations(range(len(dist))))
+        assert route_length(open_order, dist) <= best * 1.15 + 1e-9
+
+        closed_order = order_stops(dist, depot=0)
+        assert sorted(closed_order) == list(range(1, len(dist)))
+
+    same = haversine_matrix(np.radians([[39.9, 116.4]] * 4))
+    assert route_length(order_stops(same), same) == 0.0
+    assert sorted(order_stops(same, depot=2)) == [0, 1, 3]
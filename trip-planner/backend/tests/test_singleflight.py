@@ -0,0 +1,96 @@
+"""请求合并: 共享结果与异常、取消语义"""
+
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def run():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": len(calls)}
+
+        results = await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+        other = await flight.do("other", fn)
+        return flight, calls, results, other
+
+    flight, calls, results, other = asyncio.run(run())
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results)
+    assert other == {"value": 2}
+    assert flight.info() == {"name": "test", "in_flight": 0, "executions": 2, "shared": 4, "abandoned": 0}
+
+
+def test_exception_is_shared_and_key_released():
+    async def run():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+        # 调用结束后键立即释放, 不缓存异常
+        with pytest.raises(ValueError):
+            await flight.do("k", failing)
+        return calls, results
+
+    calls, results = asyncio.run(run())
+    assert len(calls) == 2
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    async def run():
+        flight = SingleFlight("test")
+        started = asyncio.Event()
+
+        async def fn():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(flight.do("k", fn))
+        second = asyncio.create_task(flight.do("k", fn))
+        await started.wait()
+        first.cancel()
+        return flight, await second, first.cancelled()
+
+    flight, result, cancelled = asyncio.run(run())
+    assert result == "done" and cancelled
+    assert flight.abandoned == 0
+
+
+def test_execution_cancelled_when_all_callers_leave():
+    async def run():
+        flight = SingleFlight("test")
+        started = asyncio.Event()
+        finished = []
+
+        async def fn():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            finally:
+                finished.append(True)
+
+        callers = [asyncio.create_task(flight.do("k", fn)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flight, finished
+
+    flight, finished = asyncio.run(run())
+    assert finished == [True]
+    assert flight.abandoned == 1 and flight.info()["in_flight"] == 0
@@ -0,0 +1,112 @@
+"""POI空间索引: 与对全部POI计算距离的结果对比"""
+
+import numpy as np
+
+from app.geo.distance import EARTH_RADIUS_KM, haversine_matrix
+from app.geo.index import SpatialIndex
+from app.models.schemas import Location, POIInfo
+
+
+def _build(seed: int, n: int = 3000):
+    rng = np.random.default_rng(seed)
+    coords = np.column_stack([39.8 + rng.random(n) * 0.3, 116.2 + rng.random(n) * 0.4])
+    index = SpatialIndex()
+    index.add_many([
+        POIInfo(id=str(i), name=f"POI{i}", type="", address="",
+                location=Location(latitude=lat, longitude=lng))
+        for i, (lat, lng) in enumerate(coords)
+    ])
+    return index, coords, rng
+
+
+def _brute_force(coords: np.ndarray, latitude: float, longitude: float) -> np.ndarray:
+    return haversine_matrix(np.radians([[latitude, longitude]]), np.radians(coords))[0]
+
+
+def test_within_matches_brute_force():
+    index, coords, rng = _build(24)
+    for _ in range(200):
+        lat, lng = 39.75 + rng.random() * 0.4, 116.15 + rng.random() * 0.5
+        radius = float(rng.choice([0.3, 1.0, 3.0, 10.0]))
+
+        expected = np.flatnonzero(_brute_force(coords, lat, lng) <= radius)
+        result = index.within(lat, lng, radius)
+        assert sorted(int(poi.id) for poi, _ in result) == sorted(expected.tolist())
+        distances = [d for _, d in result]
+        assert distances == sorted(distances)
+
+
+def test_nearest_matches_brute_force():
+    index, coords, rng = _build(25)
+    for _ in range(200):
+        # 部分查询点远离已有数据, 覆盖全量计算的分支
+        lat, lng = 39.5 + rng.random() * 1.0, 115.9 + rng.random() * 1.0
+        k = int(rng.integers(1, 30))
+
+        expected = np.sort(_brute_force(coords, lat, lng))[:k]
+        result = index.nearest(lat, lng, k)
+        assert np.allclose([d for _, d in result], expected)
+
+
+def test_polar_queries_return_quickly():
+    index, _, _ = _build(26, n=500)
+    # 高纬度时单元宽度趋近于 0, 应退化为一次全量计算而不是逐环扫描
+    for lat in (89.5, 90.0, -90.0):
+        assert index.within(lat, 116.3, 50.0) == []
+        assert len(index.nearest(lat, 116.3, 3)) == 3
+
+
+def _destination(latitude: float, longitude: float, km: float, bearing: float):
+    """从给定点沿方位角(度)移动 km 公里后的坐标(球面公式, 与 haversine 使用同一地球半径)"""
+    lat1, lng1, theta = np.radians(latitude), np.radians(longitude), np.radians(bearing)
+    delta = km / EARTH_RADIUS_KM
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(delta) + np.cos(lat1) * np.sin(delta) * np.cos(theta))
+    lng2 = lng1 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(lat1), np.cos(delta) - np.sin(lat1) * np.sin(lat2))
+    return float(np.degrees(lat2)), float(np.degrees(lng2))
+
+
+def _index_of(coords) -> SpatialIndex:
+    index = SpatialIndex()
+    index.add_many([
+        POIInfo(id=str(i), name=f"POI{i}", type="", address="",
+                location=Location(latitude=lat, longitude=lng))
+        for i, (lat, lng) in enumerate(coords)
+    ])
+    return index
+
+
+def test_radius_boundary_across_cells():
+    # 查询点位于单元边界上、边界附近与单元中间; 半径取单元宽度的整数倍附近
+    for lat, lng in ((39.90, 116.40), (39.90 + 1e-9, 116.40 - 1e-9), (39.905, 116.405), (60.0, 10.0), (75.3, 20.1)):
+        for radius in (0.5, 1.11, 2.2, 4.99):
+            coords = []
+            for bearing in range(0, 360, 15):
+                coords.append(_destination(lat, lng, radius * (1 - 1e-6), bearing))
+                coords.append(_destination(lat, lng, radius * (1 + 1e-6), bearing))
+            # 周围填满单元, 保证走逐环扫描而不是全量计算
+            span = 3 * radius / 111.0 / np.cos(np.radians(lat))
+            for dlat in np.linspace(-3 * radius / 111.0, 3 * radius / 111.0, 25):
+                for dlng in np.linspace(-span, span, 25):
+                    coords.append((lat + dlat, lng + dlng))
+            coords = np.array(coords)
+            index = _index_of(coords)
+
+            expected = np.flatnonzero(_brute_force(coords, lat, lng) <= radius)
+            found = sorted(int(poi.id) for poi, _ in index.within(lat, lng, radius))
+            assert found == expected.tolist(), (lat, lng, radius)
+            # 边界内侧的点全部命中, 外侧的点全部排除
+            assert set(range(0, 48, 2)) <= set(found)
+            assert not set(range(1, 48, 2)) & set(found)
+
+
+def test_nearest_crosses_cell_boundary():
+    # 查询点在单元东侧边缘: 最近的点在相邻单元, 同一单元内的点更远
+    lat, lng = 39.905, 116.4099
+    neighbour = _destination(lat, lng, 0.2, 90)
+    same_cell = _destination(lat, lng, 0.5, 270)
+    far = _destination(lat, lng, 3.0, 0)
+    index = _index_of([same_cell, neighbour, far])
+
+    result = index.nearest(lat, lng, k=2)
+    assert [poi.id for poi, _ in result] == ["1", "0"]
+    assert np.allclose([d for _, d in result], [0.2, 0.5])
@@ -1,5 +1,5 @@
 import axios from 'axios'
-import type { TripFormData, TripPlanResponse } from '@/types'
+import type { TripFormData, TripPlan, TripPlanResponse, TripPlanStreamHandlers } from '@/types'
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000'
 
@@ -48,6 +48,93 @@ export async function generateTripPlan(formData: TripFormData): Promise<TripPlan
   }
 }
 
+/**
+ * 流式生成旅行计划(SSE)
+ *
+ * 逐步回调节点完成、planner输出与每日行程,返回最终的旅行计划
+ * (草稿行程会在后处理中校正坐标与顺序,展示结果时以返回的计划为准)
+ */
+export async function streamTripPlan(
+  formData: TripFormData,
+  handlers: TripPlanStreamHandlers = {}
+): Promise<TripPlan> {
+  const response = await fetch(`${API_BASE_URL}/api/trip/plan/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(formData)
+  })
+
+  if (!response.ok || !response.body) {
+    throw new Error(`生成旅行计划失败: HTTP ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  let plan: TripPlan | null = null
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+
+    buffer += decoder.decode(value, { stream: true })
+
+    // SSE消息以空行分隔
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const frame = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf('\n\n')
+
+      let event = 'message'
+      let data = ''
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      const payload = data ? JSON.parse(data) : {}
+
+      switch (event) {
+        case 'node':
+          handlers.onNode?.(payload.node, payload.status)
+          break
+        case 'token':
+          handlers.onToken?.(payload.content)
+          break
+        case 'day': {
+          const { draft = false, ...day } = payload
+          handlers.onDay?.(day, draft)
+          break
+        }
+        case 'plan':
+          plan = payload
+          handlers.onPlan?.(payload)
+          break
+        case 'error':
+          throw new Error(payload.message || '生成旅行计划失败')
+      }
+    }
+  }
+
+  if (!plan) {
+    throw new Error('生成旅行计划失败: 未收到完整行程')
+  }
+  return plan
+}
+
+/**
+ * 批量获取旅行计划中所有景点的图片
+ */
+export async function getTripPhotos(plan: TripPlan): Promise<Record<string, string | null>> {
+  try {
+    const response = await apiClient.post('/api/poi/photos', plan)
+    return response.data.data || {}
+  } catch (error: any) {
+    console.error('获取景点图片失败:', error)
+    throw new Error(error.response?.data?.detail || error.message || '获取景点图片失败')
+  }
+}
+
 /**
  * 健康检查
  */
@@ -74,6 +74,7 @@ export interface TripPlan {
   weather_info: WeatherInfo[]
   overall_suggestions: string
   budget?: Budget
+  warnings?: string[]
 }
 
 export interface TripFormData {
@@ -93,3 +94,13 @@ export interface TripPlanResponse {
   data?: TripPlan
 }
 
+
+export type SpecialistNode = 'search_attractions' | 'search_weather' | 'search_hotels'
+
+export interface TripPlanStreamHandlers {
+  onNode?: (node: SpecialistNode, status: 'completed' | 'failed') => void
+  onToken?: (content: string) => void
+  // draft 为 true 时是后处理之前的草稿, 以 onPlan 收到的行程为准
+  onDay?: (day: DayPlan, draft: boolean) => void
+  onPlan?: (plan: TripPlan) => void
+}